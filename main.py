@@ -1,7 +1,12 @@
 import sys
+import argparse
+from modules import latency, profiler, replay
+from modules.logger import prompt, setup_logging
 from modules.current_price import run_current_price_flow
 from modules.calculations import run_calculation_flow
 from modules.scalper import run_scalper_flow
+from modules.market_scanner import run_scanner_flow
+from modules.spread_monitor import run_spread_monitor_flow
 
 # Import the paper trader
 from modules.paper_trader import run_paper_trader
@@ -14,19 +19,25 @@ def main_menu():
         print("2) Calculation Flow")
         print("3) Scalper Flow")
         print("4) Paper Trader (Bybit)")
-        print("5) Exit")
+        print("5) Market Scanner")
+        print("6) Spread Monitor (MEXC vs Bybit)")
+        print("7) Exit")
 
-        choice = input("Select an option: ").strip()
+        choice = prompt("Select an option: ").strip()
         print()
         if choice == "1":
-            run_current_price_flow()
+            profiler.run_flow("current_price", run_current_price_flow)
         elif choice == "2":
-            run_calculation_flow()
+            profiler.run_flow("calculation", run_calculation_flow)
         elif choice == "3":
-            run_scalper_flow()
+            profiler.run_flow("scalper", run_scalper_flow)
         elif choice == "4":
-            paper_trader_menu()
+            profiler.run_flow("paper_trader", paper_trader_menu)
         elif choice == "5":
+            profiler.run_flow("scanner", run_scanner_flow)
+        elif choice == "6":
+            profiler.run_flow("spread_monitor", run_spread_monitor_flow)
+        elif choice == "7":
             print("Exiting. Goodbye!")
             sys.exit(0)
         else:
@@ -41,14 +52,14 @@ def paper_trader_menu():
     """
     print("=== PAPER TRADER (BYBIT) ===")
 
-    # Symbol
-    symbol = input("Bybit symbol (default 'BTC/USDT'): ").strip()
+    # Symbol(s)
+    symbol = prompt("Bybit symbol(s), comma-separated (default 'BTC/USDT'): ").strip()
     if not symbol:
         symbol = "BTC/USDT"
 
     # Interval
     try:
-        interval_str = input("Interval in seconds (default=300 for 5m): ").strip()
+        interval_str = prompt("Interval in seconds (default=300 for 5m): ").strip()
         if interval_str:
             interval_sec = int(interval_str)
         else:
@@ -59,7 +70,7 @@ def paper_trader_menu():
 
     # Duration
     try:
-        duration_str = input("Total duration in seconds (default=1800 for 30m): ").strip()
+        duration_str = prompt("Total duration in seconds (default=1800 for 30m): ").strip()
         if duration_str:
             total_duration_sec = int(duration_str)
         else:
@@ -70,7 +81,7 @@ def paper_trader_menu():
 
     # Capital
     try:
-        cap_str = input("Capital (default=1000): ").strip()
+        cap_str = prompt("Capital (default=1000): ").strip()
         if cap_str:
             capital = float(cap_str)
         else:
@@ -79,16 +90,17 @@ def paper_trader_menu():
         capital = 1000.0
         print("Invalid input. Using 1000.")
 
-    # Quick test of the Bybit API
-    test_price = fetch_latest_price(symbol)
+    # Quick test of the Bybit API (first symbol)
+    test_symbol = symbol.split(",")[0].strip()
+    test_price = fetch_latest_price(test_symbol)
     if test_price is None:
-        print(f"**WARNING**: Could not fetch price for {symbol}. Check API or symbol.")
+        print(f"**WARNING**: Could not fetch price for {test_symbol}. Check API or symbol.")
     else:
-        print(f"Quick test: {symbol} price is {test_price:.2f} USDT")
+        print(f"Quick test: {test_symbol} price is {test_price:.2f} USDT")
 
     # Show summary
     print(f"\nStarting PAPER TRADER with:")
-    print(f" Symbol:     {symbol}")
+    print(f" Symbol(s):  {symbol}")
     print(f" Interval:   {interval_sec} sec")
     print(f" Duration:   {total_duration_sec} sec")
     print(f" Capital:    {capital}")
@@ -107,6 +119,30 @@ def paper_trader_menu():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Autobot CLI")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each flow (cProfile + tracemalloc) and print a summary when it ends")
+    parser.add_argument("--profile-dir", default="profiles", help="where profile files are written")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write tick-to-trade latency spans as Chrome trace JSON to FILE on exit")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="compute profit/liquidation for a CSV or JSON-lines file of positions ('-' for stdin) "
+                             "and exit")
+    parser.add_argument("--batch-output", default="-", metavar="PATH", help="batch results file, '-' for stdout")
+    parser.add_argument("--batch-format", choices=("csv", "jsonl"), help="default: from the file extension, else csv")
+    args = parser.parse_args()
+    if args.batch:
+        from modules.batch_calc import run_batch, print_stats
+        print_stats(run_batch(args.batch, args.batch_output, args.batch_format))
+        return
+    setup_logging()
+    if args.profile:
+        profiler.enable(args.profile_dir)
+    latency.install_from_env()
+    if args.trace:
+        latency.export_at_exit(args.trace)
+    replay.install_from_env()
+
     print("Welcome to the Autobot!")
     main_menu()
 
@@ -0,0 +1,253 @@
+# modules/account_stream.py
+
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+import aiohttp
+from modules.logger import get_logger
+
+log = get_logger("account_stream")
+
+PRIVATE_URL = "wss://stream.bybit.com/v5/private"
+DEMO_PRIVATE_URL = "wss://stream-demo.bybit.com/v5/private"
+TOPICS = ("execution", "order", "position", "wallet")
+PING_SEC = 20
+AUTH_EXPIRE_MS = 10000
+RECONNECT_MIN_SEC = 1
+RECONNECT_MAX_SEC = 30
+MAX_ORDERS = 1000  # fills / orders remembered for wait_fill()
+# Final without (further) fills. "Filled" is not among them: Bybit does not order the
+# order and execution topics, so the fills may still be on their way.
+CLOSED_STATUSES = ("Cancelled", "PartiallyFilledCanceled", "Rejected", "Deactivated")
+
+
+class AccountState:
+    """
+    In-memory copy of the account, kept current by private stream pushes:
+    latest wallet snapshot, open positions by symbol, and fills / status
+    of the last MAX_ORDERS orders. Readers never touch the network.
+    """
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.wallet = None
+        self.positions = {}
+        self.orders = OrderedDict()  # orderId -> {"status", "qty", "filled", "notional", "fee"}
+        self.messages = 0
+        self.updated_at = None
+
+    def _order(self, order_id):
+        order = self.orders.get(order_id)
+        if order is None:
+            order = {"status": None, "qty": None, "filled": 0.0, "notional": 0.0, "fee": 0.0}
+            self.orders[order_id] = order
+            if len(self.orders) > MAX_ORDERS:
+                self.orders.popitem(last=False)
+        return order
+
+    def apply(self, message):
+        """
+        Fold one private stream message into the state.
+        """
+        topic = message.get("topic", "")
+        data = message.get("data") or []
+        with self.cond:
+            if topic.startswith("wallet"):
+                for account in data:
+                    self.wallet = account
+            elif topic.startswith("position"):
+                for row in data:
+                    if float(row.get("size") or 0):
+                        self.positions[row["symbol"]] = row
+                    else:
+                        self.positions.pop(row["symbol"], None)
+            elif topic.startswith("execution"):
+                for fill in data:
+                    if fill.get("execType", "Trade") != "Trade":
+                        continue
+                    order = self._order(fill["orderId"])
+                    qty = float(fill["execQty"])
+                    order["filled"] += qty
+                    order["notional"] += qty * float(fill["execPrice"])
+                    order["fee"] += float(fill.get("execFee") or 0)
+            elif topic.startswith("order"):
+                for row in data:
+                    order = self._order(row["orderId"])
+                    order["status"] = row.get("orderStatus")
+                    order["qty"] = float(row.get("qty") or 0)
+            else:
+                return
+            self.messages += 1
+            self.updated_at = time.time()
+            self.cond.notify_all()
+
+    def total_equity(self):
+        with self.cond:
+            return None if self.wallet is None else float(self.wallet["totalEquity"])
+
+    def available_balance(self):
+        with self.cond:
+            return None if self.wallet is None else float(self.wallet.get("totalAvailableBalance") or 0)
+
+    def fill(self, order_id):
+        """
+        (filled qty, average fill price, fees) so far, or None if nothing filled.
+        """
+        with self.cond:
+            order = self.orders.get(order_id)
+            if not order or not order["filled"]:
+                return None
+            return order["filled"], order["notional"] / order["filled"], order["fee"]
+
+    def wait_fill(self, order_id, qty=None, timeout=2.0):
+        """
+        Block until 'order_id' has 'qty' (default: the order's qty) filled,
+        or was closed without filling it (CLOSED_STATUSES), and return
+        fill(order_id); None if nothing filled within 'timeout'.
+        """
+        def complete():
+            order = self.orders.get(order_id)
+            if order is None:
+                return False
+            if order["status"] in CLOSED_STATUSES:
+                return True
+            target = qty if qty is not None else order["qty"]
+            return bool(target) and order["filled"] >= target - 1e-12
+
+        with self.cond:
+            self.cond.wait_for(complete, timeout)
+        return self.fill(order_id)
+
+
+class AccountStream:
+    """
+    Bybit v5 private WebSocket (execution, order, position, wallet) on a
+    background thread with its own event loop. Authenticates the same way
+    pybit does, pings every PING_SEC and reconnects with exponential
+    backoff. 'now_ms' is the clock used to sign the auth message.
+    """
+    def __init__(self, api_key, api_secret, url=PRIVATE_URL, state=None, now_ms=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = url
+        self.state = state or AccountState()
+        self.now_ms = now_ms or (lambda: int(time.time() * 1000))
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.loop = None
+        self.thread = None
+        self.connects = 0
+
+    @property
+    def enabled(self):
+        return bool(self.api_key and self.api_secret)
+
+    def connected(self):
+        return self.ready.is_set()
+
+    def _auth_message(self):
+        expires = self.now_ms() + AUTH_EXPIRE_MS
+        signature = hmac.new(self.api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        return json.dumps({"op": "auth", "args": [self.api_key, expires, signature]})
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(PING_SEC)
+            await ws.send_str(json.dumps({"op": "ping"}))
+
+    async def _session(self, http):
+        async with http.ws_connect(self.url, heartbeat=None) as ws:
+            await ws.send_str(self._auth_message())
+            reply = json.loads((await ws.receive(timeout=10)).data)
+            if not reply.get("success"):
+                raise PermissionError(f"private stream auth failed: {reply.get('ret_msg')}")
+            await ws.send_str(json.dumps({"op": "subscribe", "args": list(TOPICS)}))
+            self.connects += 1
+            self.ready.set()
+            log.info("🔌 Account stream connected (%s)", self.url)
+            pinger = asyncio.ensure_future(self._ping(ws))
+            try:
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    message = json.loads(msg.data)
+                    if "topic" in message:
+                        self.state.apply(message)
+                    elif message.get("op") == "subscribe" and not message.get("success"):
+                        log.error("❌ Account stream subscribe failed: %s", message.get("ret_msg"))
+            finally:
+                self.ready.clear()
+                pinger.cancel()
+
+    async def _run(self):
+        delay = RECONNECT_MIN_SEC
+        async with aiohttp.ClientSession() as http:
+            while not self.stopped.is_set():
+                started = time.monotonic()
+                try:
+                    await self._session(http)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.error("⚠ Account stream error: %s", e)
+                if self.stopped.is_set():
+                    break
+                if time.monotonic() - started > RECONNECT_MAX_SEC:
+                    delay = RECONNECT_MIN_SEC
+                log.warning("🔌 Account stream disconnected, reconnecting in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SEC)
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self._run())
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    def start(self, wait=5.0):
+        """
+        Connect on a daemon thread; waits up to 'wait' seconds for the
+        first successful subscribe. No-op if already running.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            return self
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._serve, name="account-stream", daemon=True)
+        self.thread.start()
+        if wait and not self.ready.wait(wait):
+            log.warning("⚠ Account stream not connected after %ss, falling back to REST", wait)
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+            self.thread.join(5)
+
+
+# If run directly, follow fills from the local fake exchange's private stream
+if __name__ == "__main__":
+    from pybit.unified_trading import HTTP
+    from modules.fake_exchange import FakeExchange
+
+    server = FakeExchange(symbols=("BTCUSDT",), latency=0.01).start()
+    stream = AccountStream("key", "secret", url=server.base_url.replace("http", "ws") + "/v5/private").start()
+    client = HTTP(api_key="key", api_secret="secret")
+    client.endpoint = server.base_url
+
+    start = time.perf_counter()
+    order_id = client.place_order(category="linear", symbol="BTCUSDT", side="Buy", orderType="Market",
+                                  qty="0.01")["result"]["orderId"]
+    qty, price, fee = stream.state.wait_fill(order_id, 0.01)
+    print(f"order {order_id}: filled {qty} @ {price:.2f} (fee {fee:.4f}) "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms after sending")
+    print(f"position: {stream.state.positions['BTCUSDT']['size']} BTCUSDT, equity {stream.state.total_equity():.2f}")
+    stream.stop()
+    server.stop()
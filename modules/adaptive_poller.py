@@ -0,0 +1,132 @@
+# modules/adaptive_poller.py
+
+import math
+import time
+from modules.mexc_api import remaining_budget
+
+# Rough per-second volatility of a liquid USDT pair (~60% annualized),
+# used until we have seen a few price changes of our own.
+DEFAULT_VOL_PER_SEC = 1e-4
+
+
+class AdaptivePoller:
+    """
+    Picks the delay until the next price fetch.
+
+    - Volatility: EWMA of squared log returns, scaled to one second.
+    - Distance: closest watched level (target, liquidation, entry...) as a
+      fraction of price. The expected time to cover that distance is roughly
+      (distance / vol)^2 seconds; we poll 'safety' times that.
+    - Budget: never faster than spreading the requests left in the
+      mexc_api rate window over the time until it resets.
+    """
+    def __init__(self, levels=(), min_interval=0.5, max_interval=20.0, safety=0.1,
+                 halflife=20, budget_fn=remaining_budget):
+        self.levels = list(levels)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.safety = safety
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.budget_fn = budget_fn
+        self.var_per_sec = DEFAULT_VOL_PER_SEC ** 2
+        self.last_price = None
+        self.last_time = None
+
+    def set_levels(self, levels):
+        self.levels = list(levels)
+
+    def observe(self, price, now=None):
+        """
+        Feed a fetched price so the volatility estimate stays current.
+        """
+        if now is None:
+            now = time.monotonic()
+        if self.last_price and price > 0 and now > self.last_time:
+            r = math.log(price / self.last_price)
+            sample = r * r / (now - self.last_time)
+            self.var_per_sec += self.alpha * (sample - self.var_per_sec)
+        self.last_price = price
+        self.last_time = now
+
+    def next_interval(self, price):
+        """
+        Seconds to wait before the next fetch.
+        """
+        if self.levels and price > 0:
+            distance = min(abs(price - level) for level in self.levels) / price
+            expected = distance * distance / max(self.var_per_sec, 1e-18)
+            interval = self.safety * expected
+        else:
+            interval = self.max_interval
+        interval = min(max(interval, self.min_interval), self.max_interval)
+
+        remaining, reset_in = self.budget_fn()
+        budget_floor = reset_in / remaining if remaining > 0 else reset_in
+        return max(interval, budget_floor)
+
+
+def _simulate(next_delay, path, dt, band):
+    """
+    Walk a simulated price path, polling whenever next_delay says so.
+    A 'trade' sits at +/- band around its entry; once a poll sees it
+    crossed we record the detection delay and re-enter at that price.
+    Returns (requests, list of detection delays).
+    """
+    entry = path[0]
+    levels = (entry * (1 + band), entry * (1 - band))
+    crossed_at = None
+    t_next = 0.0
+    requests = 0
+    delays = []
+    for i, p in enumerate(path):
+        t = i * dt
+        if crossed_at is None and (p >= levels[0] or p <= levels[1]):
+            crossed_at = t
+        if t >= t_next:
+            requests += 1
+            if crossed_at is not None:
+                delays.append(t - crossed_at)
+                crossed_at = None
+                levels = (p * (1 + band), p * (1 - band))
+            t_next = t + next_delay(p, t, levels)
+    return requests, delays
+
+
+# If run directly, compare fixed 5s polling against the adaptive poller
+if __name__ == "__main__":
+    import random
+
+    random.seed(7)
+    dt = 0.05
+    seconds = 4 * 3600
+    vol = DEFAULT_VOL_PER_SEC
+    price = 100.0
+    path = []
+    for i in range(int(seconds / dt)):
+        t = i * dt
+        # One volatility spike: 5x normal for 20 minutes in the second hour
+        sigma = vol * (5 if 4800 <= t < 6000 else 1)
+        price *= math.exp(random.gauss(0, sigma * math.sqrt(dt)))
+        path.append(price)
+
+    band = 0.003
+    fixed_requests, fixed_delays = _simulate(lambda p, t, levels: 5.0, path, dt, band)
+
+    poller = AdaptivePoller(budget_fn=lambda: (1000, 60))
+
+    def adaptive_delay(p, t, levels):
+        poller.set_levels(levels)
+        poller.observe(p, t)
+        return poller.next_interval(p)
+
+    adaptive_requests, adaptive_delays = _simulate(adaptive_delay, path, dt, band)
+
+    def summary(name, requests, delays):
+        mean = sum(delays) / len(delays) if delays else 0.0
+        worst = max(delays) if delays else 0.0
+        print(f"{name:<9} requests={requests:6d}  exits={len(delays):3d}  "
+              f"mean reaction={mean:5.2f}s  worst={worst:5.2f}s")
+
+    print(f"Simulated {seconds / 3600:.0f}h, exit band +/-{band * 100:.1f}%")
+    summary("fixed 5s", fixed_requests, fixed_delays)
+    summary("adaptive", adaptive_requests, adaptive_delays)
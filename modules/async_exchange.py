@@ -0,0 +1,225 @@
+# modules/async_exchange.py
+
+import asyncio
+import atexit
+import ssl
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+import aiohttp
+import certifi
+import ccxt.async_support as ccxt_async
+from modules import mexc_api, bybit_api
+from modules.logger import get_logger
+from modules.resilience import ExchangeError, READ, TIMEOUT, call_async
+
+log = get_logger("async_exchange")
+
+POOL_SIZE = 100      # open connections across both venues; more requests wait for a free one
+POOL_PER_HOST = 50
+KEEPALIVE_SEC = 30   # idle connections kept open for reuse this long
+DNS_CACHE_SEC = 300
+CALL_TIMEOUT_SEC = 60  # the sync facade never waits longer than this
+
+
+class AsyncExchanges:
+    """
+    Async ccxt clients for MEXC and Bybit sharing one aiohttp session: a
+    bounded pool of keep-alive connections with DNS answers cached, so a
+    burst of requests reuses warm connections instead of a handshake each.
+
+    The clients live on an event loop of their own on a daemon thread
+    (started on first use). Coroutines can be awaited there via submit();
+    the module-level functions are a blocking facade callable from any
+    thread. API keys, URLs, rate-limit setting and loaded markets are
+    copied from the sync clients in mexc_api / bybit_api at start, so
+    anything that re-points those (load tests, the fake exchange) applies
+    here too.
+    """
+    def __init__(self, pool_size=POOL_SIZE, per_host=POOL_PER_HOST):
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.loop = None
+        self.thread = None
+        self.session = None
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def _client(self, cls, sync):
+        client = cls({"apiKey": sync.apiKey, "secret": sync.secret, "enableRateLimit": sync.enableRateLimit,
+                      "session": self.session})
+        client.urls = sync.urls
+        if sync.markets:
+            client.set_markets(sync.markets)
+        return client
+
+    async def _open(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host,
+                                         keepalive_timeout=KEEPALIVE_SEC, ttl_dns_cache=DNS_CACHE_SEC,
+                                         ssl=ssl.create_default_context(cafile=certifi.where()),
+                                         enable_cleanup_closed=True)
+        self.session = aiohttp.ClientSession(connector=connector)
+        self.clients = {"mexc": self._client(ccxt_async.mexc, mexc_api.exchange),
+                        "bybit": self._client(ccxt_async.bybit, bybit_api.exchange)}
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return self
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name="async-exchange", daemon=True)
+            self.thread.start()
+            asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+        return self
+
+    def submit(self, coro, timeout=None):
+        """
+        Run 'coro' on the client loop and block for its result. After
+        'timeout' seconds (default CALL_TIMEOUT_SEC) the coroutine is
+        cancelled and ExchangeError (kind TIMEOUT) raised, like any other
+        timed-out exchange call.
+        """
+        timeout = CALL_TIMEOUT_SEC if timeout is None else timeout
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise ExchangeError(TIMEOUT, f"async.{coro.__name__}", f"no result within {timeout}s") from None
+
+    async def _close(self):
+        for client in self.clients.values():
+            client.session = None  # ours, not the client's, to close
+            await client.close()
+        await self.session.close()
+
+    def close(self):
+        with self.lock:
+            if self.thread is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(CALL_TIMEOUT_SEC)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(5)
+            self.loop.close()
+            self.thread = self.loop = self.session = None
+            self.clients = {}
+
+    # ---------------- coroutines (run on self.loop) ----------------
+
+    async def _request(self, venue, name, method, *args):
+        client = self.clients[venue]
+
+        async def send():
+            if venue == "mexc":
+                mexc_api.increment_usage()
+            return await getattr(client, method)(*args)
+
+        return await call_async(f"{venue}.{name}", send, policy=READ)
+
+    async def fetch_ticker(self, symbol, venue="mexc"):
+        return await self._request(venue, "ticker", "fetch_ticker", symbol)
+
+    async def fetch_price(self, symbol, venue="mexc"):
+        """
+        Last price of 'symbol' ("BTC/USDT"). Raises ExchangeError.
+        """
+        return (await self.fetch_ticker(symbol, venue))["last"]
+
+    async def fetch_prices(self, symbols, venue="mexc"):
+        """
+        {symbol: last price or None} for many symbols at once, concurrently
+        (in-flight requests are bounded by the connection pool).
+        """
+        results = await asyncio.gather(*(self.fetch_price(s, venue) for s in symbols), return_exceptions=True)
+        prices = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                log.error("Error fetching %s on %s: %s", symbol, venue.upper(), result)
+                result = None
+            prices[symbol] = result
+        return prices
+
+    async def fetch_order_book(self, symbol, limit=None, venue="mexc"):
+        return await self._request(venue, "order_book", "fetch_order_book", symbol, limit)
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", limit=None, venue="mexc"):
+        return await self._request(venue, "ohlcv", "fetch_ohlcv", symbol, timeframe, None, limit)
+
+
+EXCHANGES = AsyncExchanges()
+atexit.register(EXCHANGES.close)
+
+
+# ---------------- sync facade (same contracts as mexc_api / bybit_api) ----------------
+
+def fetch_current_price(symbol, venue="mexc"):
+    """
+    Latest last price for 'symbol' (e.g., "BTC/USDT"), or None on error.
+    """
+    try:
+        return EXCHANGES.submit(EXCHANGES.fetch_price(symbol, venue))
+    except ExchangeError as e:
+        log.error("Error fetching %s on %s: %s", symbol, venue.upper(), e)
+        return None
+
+
+def fetch_current_prices(symbols, venue="mexc"):
+    """
+    {symbol: last price or None}, all symbols fetched concurrently.
+    """
+    symbols = list(symbols)
+    try:
+        return EXCHANGES.submit(EXCHANGES.fetch_prices(symbols, venue))
+    except ExchangeError as e:
+        log.error("Error fetching %d symbols on %s: %s", len(symbols), venue.upper(), e)
+        return dict.fromkeys(symbols)
+
+
+def fetch_order_book(symbol, limit=None, venue="mexc"):
+    """
+    Order book of 'symbol'. Raises ExchangeError (also when it takes too long).
+    """
+    return EXCHANGES.submit(EXCHANGES.fetch_order_book(symbol, limit, venue))
+
+
+def fetch_ohlcv(symbol, timeframe="1m", limit=None, venue="mexc"):
+    """
+    Candles of 'symbol'. Raises ExchangeError (also when it takes too long).
+    """
+    return EXCHANGES.submit(EXCHANGES.fetch_ohlcv(symbol, timeframe, limit, venue))
+
+
+# If run directly: 100 symbols against the local fake exchange (50±10 ms
+# per request): sync one by one, sync on a thread pool, and async.
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from modules.fake_exchange import FakeExchange
+    from modules.load_test import point_clients_at
+    from modules.logger import setup_logging
+
+    setup_logging(log_dir=False, console=False)
+    names = [f"C{i}USDT" for i in range(100)]
+    symbols = [f"{s[:-4]}/USDT" for s in names]
+    server = FakeExchange(symbols=names, latency=0.05, jitter=0.01).start()
+    point_clients_at(server.base_url, names)
+    rounds = 3
+
+    def measure(label, fetch_all):
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            prices = fetch_all()
+            times.append(time.perf_counter() - start)
+            assert sum(p is not None for p in prices) == len(symbols)
+        best = min(times)
+        print(f"{label:<28}{times[0]:>9.3f}{best:>9.3f}{len(symbols) / best:>10.0f}")
+
+    print(f"{len(symbols)} symbols, {rounds} rounds, fake exchange 50±10 ms")
+    print(f"{'path':<28}{'first s':>9}{'best s':>9}{'req/s':>10}")
+    measure("sync, sequential", lambda: [mexc_api.fetch_current_price(s) for s in symbols])
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        measure("sync, 16 threads", lambda: list(pool.map(mexc_api.fetch_current_price, symbols)))
+    measure("async, one loop", lambda: list(fetch_current_prices(symbols).values()))
+    EXCHANGES.close()
+    server.stop()
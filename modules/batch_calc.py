@@ -0,0 +1,365 @@
+# modules/batch_calc.py
+
+import csv
+import io
+import json
+import sys
+import time
+from itertools import islice, repeat
+import numpy as np
+from modules.calculations import calc_profit_array, calc_liquidation_array
+from modules.logger import get_logger
+from modules.resilience import ExchangeError, READ, call
+
+log = get_logger("batch_calc")
+
+CHUNK_ROWS = 100_000
+INPUT_COLUMNS = ("symbol", "position", "entry", "exit", "leverage", "capital")
+OUTPUT_COLUMNS = INPUT_COLUMNS + ("profit", "liquidation", "error")
+
+
+def _floats(values):
+    """
+    Strings/numbers -> float64 array; blanks and junk become NaN.
+    """
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return np.array([v if v not in ("", None) else "nan" for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(values))
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def pair_keys(symbols):
+    """
+    'SOL', 'sol/usdt', 'SOLUSDT' -> 'SOLUSDT' (vectorized).
+    """
+    from modules.spread_monitor import normalize_symbols
+    keys = normalize_symbols(symbols)
+    missing = ~np.char.endswith(keys, "USDT")
+    keys = keys.astype(object)
+    keys[missing] = keys[missing] + "USDT"
+    return keys.astype(str)
+
+
+class PriceBook:
+    """
+    Last prices for every MEXC USDT pair, fetched in one bulk request the
+    first time a row needs one. 'prices' ({'SOLUSDT': 150.0}) skips the fetch.
+    If the fetch fails the book stays empty, so rows that need a price get
+    "no price for symbol" and the rest of the batch goes on.
+    """
+    def __init__(self, prices=None):
+        self.prices = prices
+        self.fetches = 0
+
+    def lookup(self, symbols):
+        if self.prices is None:
+            from modules.spread_monitor import fetch_mexc_book
+            self.fetches += 1
+            try:
+                names, _, _, last = call("mexc.tickers", fetch_mexc_book, policy=READ)
+            except ExchangeError as e:
+                log.error("Error fetching MEXC prices, rows without an entry price are skipped: %s", e)
+                self.prices = {}
+            else:
+                self.prices = dict(zip(names.tolist(), last.tolist()))
+        keys, inverse = np.unique(pair_keys(symbols), return_inverse=True)
+        found = np.array([self.prices.get(k, np.nan) for k in keys.tolist()], dtype=np.float64)
+        return found[inverse]
+
+
+# ---------------- readers: yield {column: list} per chunk ----------------
+
+def _columns(lines, width):
+    """
+    Chunk of CSV lines -> one tuple/list per column. Unquoted chunks where
+    every line has exactly 'width' fields (the usual export) are split in
+    one pass over the joined text and sliced into columns, with no per-row
+    lists; anything else goes through csv (short rows padded, extra fields
+    dropped).
+    """
+    text = "".join(lines)
+    if '"' not in text and set(map(str.count, lines, repeat(","))) == {width - 1}:
+        if "\r" in text:
+            text = text.replace("\r", "")
+        flat = text.replace("\n", ",").split(",")
+        if text.endswith("\n"):
+            flat.pop()
+        if len(flat) == len(lines) * width:
+            return [flat[i::width] for i in range(width)]
+    rows = [r for r in csv.reader(lines) if r]
+    if rows and min(map(len, rows)) < width:
+        rows = [(r + [""] * width)[:width] for r in rows]
+    return list(zip(*rows)) or [() for _ in range(width)]
+
+
+def read_csv_chunks(stream, chunk_rows=CHUNK_ROWS):
+    header = [h.strip().lower() for h in next(csv.reader([stream.readline()]), [])]
+    while True:
+        lines = list(islice(stream, chunk_rows))
+        if not lines:
+            return
+        yield dict(zip(header, _columns(lines, len(header))))
+
+
+def _decode_lines(lines):
+    """
+    JSON lines -> (row dicts, error per row); a line that is not a JSON
+    object becomes an empty row with an error.
+    """
+    rows, errors = [], []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            error = "" if isinstance(row, dict) else "not a JSON object"
+        except ValueError:
+            error = "invalid JSON"
+        rows.append(row if not error else {})
+        errors.append(error)
+    return rows, errors
+
+
+def read_jsonl_chunks(stream, chunk_rows=CHUNK_ROWS):
+    while True:
+        lines = list(islice(stream, chunk_rows))
+        if not lines:
+            return
+        # One decoder call per chunk instead of one per line, unless a line is malformed
+        try:
+            rows = json.loads("[" + ",".join(line for line in lines if line.strip()) + "]")
+            errors = None if all(isinstance(r, dict) for r in rows) else _decode_lines(lines)[1]
+        except ValueError:
+            rows, errors = _decode_lines(lines)
+        if errors is not None:
+            rows = [r if not e else {} for r, e in zip(rows, errors)]
+        chunk = {name: [r.get(name) for r in rows] for name in INPUT_COLUMNS}
+        if errors is not None:
+            chunk["error"] = errors
+        yield chunk
+
+
+# ---------------- writers ----------------
+
+def _fmt(values, blank=""):
+    """
+    Float array -> list of strings ('%.10g', 'blank' for NaN).
+    """
+    out = list(map("%.10g".__mod__, values.tolist()))
+    for i in np.flatnonzero(~np.isfinite(values)).tolist():
+        out[i] = blank
+    return out
+
+
+def _json_column(values):
+    """
+    List of JSON-able values -> list of their encodings, via one dumps call
+    for the whole column (per value only if a string holds the separator).
+    """
+    parts = json.dumps(values)[1:-1].split(", ") if values else []
+    return parts if len(parts) == len(values) else list(map(json.dumps, values))
+
+
+def _filled_entries(result, encode):
+    entry = list(result["raw_entry"])
+    filled = result["filled"]
+    for i, value in zip(filled.tolist(), encode(result["entry"][filled])):
+        entry[i] = value
+    return entry
+
+
+def write_csv(stream, result, header):
+    # exit / leverage / capital and given entries are echoed exactly as they came in
+    entry = _filled_entries(result, _fmt)
+    rows = zip(result["symbol"], result["position"], entry, result["raw_exit"], result["raw_leverage"],
+               result["raw_capital"], _fmt(result["profit"]), _fmt(result["liquidation"]), result["error"])
+    echoed = "".join(result["symbol"]) + "".join(result["raw_exit"]) + "".join(result["raw_leverage"]) \
+        + "".join(result["raw_capital"]) + "".join(entry)
+    if any(c in echoed for c in ',"\r\n'):
+        writer = csv.writer(stream, lineterminator="\n")
+        if header:
+            writer.writerow(OUTPUT_COLUMNS)
+        writer.writerows(rows)
+        return
+    if header:
+        stream.write(",".join(OUTPUT_COLUMNS) + "\n")
+    stream.writelines(",".join(row) + "\n" for row in rows)
+
+
+def write_jsonl(stream, result, header):
+    def numbers(values):
+        out = values.tolist()
+        for i in np.flatnonzero(~np.isfinite(values)).tolist():
+            out[i] = None
+        return out
+
+    columns = [_json_column(result["symbol"]), _json_column(result["position"]),
+               _json_column(_filled_entries(result, numbers)),
+               *(_json_column(result[c]) for c in ("raw_exit", "raw_leverage", "raw_capital")),
+               _json_column(numbers(result["profit"])), _json_column(numbers(result["liquidation"])),
+               _json_column([e or None for e in result["error"]])]
+    stream.writelines(
+        f'{{"symbol": {sym}, "position": {pos}, "entry": {e}, "exit": {x}, "leverage": {lv}, "capital": {c}, '
+        f'"profit": {p}, "liquidation": {lq}, "error": {err}}}\n'
+        for sym, pos, e, x, lv, c, p, lq, err in zip(*columns)
+    )
+
+
+# ---------------- compute ----------------
+
+def compute_chunk(chunk, book):
+    """
+    Profit and liquidation for one chunk of rows, all as array ops.
+    Missing entry prices come from 'book'. An optional chunk["error"]
+    marks rows the reader could not parse.
+    """
+    n = len(chunk.get("symbol") or ())
+    unreadable = chunk.get("error")
+    symbols = [s or "" for s in chunk.get("symbol") or ()]
+    raw_positions = chunk.get("position") or [""] * n
+    names = {p: str(p or "").strip().upper() for p in set(raw_positions)}
+    codes = {p: 1 if name == "LONG" else 0 if name == "SHORT" else -1 for p, name in names.items()}
+    side = np.fromiter(map(codes.__getitem__, raw_positions), dtype=np.int8, count=n)
+    raw_entry = chunk.get("entry") or [""] * n
+    raw_exit = chunk.get("exit") or [""] * n
+    raw_leverage = chunk.get("leverage") or [""] * n
+    raw_capital = chunk.get("capital") or [""] * n
+    entry, exit_price = _floats(raw_entry), _floats(raw_exit)
+    leverage, capital = _floats(raw_leverage), _floats(raw_capital)
+
+    # Only blank entries are priced from the book; unparsable ones are errors
+    missing = np.isnan(entry)
+    filled = np.array([i for i in np.flatnonzero(missing).tolist()
+                       if raw_entry[i] in ("", None) and not (unreadable and unreadable[i])], dtype=np.intp)
+    missing[:] = False
+    missing[filled] = True
+    if len(filled):
+        entry[filled] = book.lookup([symbols[i] for i in filled.tolist()])
+
+    is_long = side == 1
+    bad_side = side < 0
+    bad_entry = ~(entry > 0)
+    bad_numbers = ~(np.isfinite(exit_price) & np.isfinite(capital) & (leverage > 0))
+    bad = bad_side | bad_entry | bad_numbers
+    if unreadable:
+        bad |= np.array([bool(e) for e in unreadable])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit = np.where(bad, np.nan, calc_profit_array(entry, exit_price, leverage, capital, is_long))
+        liquidation = np.where(bad, np.nan, calc_liquidation_array(entry, leverage, is_long))
+
+    error = [""] * n
+    if bad.any():
+        for i in np.flatnonzero(bad).tolist():
+            error[i] = (unreadable[i] if unreadable and unreadable[i] else
+                        "position must be LONG or SHORT" if bad_side[i] else
+                        ("no price for symbol" if missing[i] else "invalid entry") if bad_entry[i] else
+                        "invalid exit/leverage/capital")
+
+    result = {"symbol": symbols, "position": list(map(names.__getitem__, raw_positions)), "entry": entry,
+              "filled": filled, "profit": profit, "liquidation": liquidation, "error": error,
+              "raw_entry": raw_entry, "raw_exit": raw_exit, "raw_leverage": raw_leverage, "raw_capital": raw_capital}
+    return result, len(filled), int(bad.sum())
+
+
+def run_batch(source="-", output="-", fmt=None, chunk_rows=CHUNK_ROWS, prices=None):
+    """
+    Stream positions from 'source' (CSV or JSON lines; path or '-' for
+    stdin) to 'output' in the same format, CHUNK_ROWS at a time. Columns:
+    symbol, position (LONG/SHORT), entry (blank = current MEXC price),
+    exit, leverage, capital. Returns a stats dict.
+    """
+    if fmt is None:
+        fmt = "jsonl" if str(source).endswith((".jsonl", ".ndjson")) else "csv"
+    read = read_jsonl_chunks if fmt == "jsonl" else read_csv_chunks
+    write = write_jsonl if fmt == "jsonl" else write_csv
+
+    src = sys.stdin if source == "-" else open(source, newline="")
+    dst = sys.stdout if output == "-" else open(output, "w", newline="")
+    dst = io.TextIOWrapper(dst.buffer, newline="", write_through=False) if dst is sys.stdout else dst
+    book = PriceBook(prices)
+    stats = {"rows": 0, "entries_filled": 0, "errors": 0, "price_fetches": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        for i, chunk in enumerate(read(src, chunk_rows)):
+            result, filled, errors = compute_chunk(chunk, book)
+            write(dst, result, header=(i == 0))
+            stats["rows"] += len(result["symbol"])
+            stats["entries_filled"] += filled
+            stats["errors"] += errors
+    finally:
+        dst.flush()
+        if src is not sys.stdin:
+            src.close()
+        if output != "-":
+            dst.close()
+        else:
+            dst.detach()
+    stats["price_fetches"] = book.fetches
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def print_stats(stats):
+    print(f"[batch] {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows'] / max(stats['seconds'], 1e-9):,.0f} rows/s), "
+          f"{stats['entries_filled']:,} entry prices filled with {stats['price_fetches']} request(s), "
+          f"{stats['errors']:,} invalid rows", file=sys.stderr)
+
+
+# If run directly: python -m modules.batch_calc positions.csv [-o out.csv]
+# or --bench N to time N synthetic rows (no network; blank entries priced from a fixed book)
+if __name__ == "__main__":
+    import argparse
+    import os
+    import shutil
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Batch profit / liquidation calculator")
+    parser.add_argument("source", nargs="?", default="-", help="CSV or JSON-lines file, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension, else csv")
+    parser.add_argument("--bench", type=int, metavar="N", help="generate and process N synthetic rows")
+    args = parser.parse_args()
+
+    if not args.bench:
+        print_stats(run_batch(args.source, args.output, args.format))
+        sys.exit(0)
+
+    rng = np.random.default_rng(0)
+    coins = [f"C{i}" for i in range(500)]
+    book = {f"{c}USDT": float(p) for c, p in zip(coins, rng.lognormal(2, 2, len(coins)))}
+    tmp = tempfile.mkdtemp()
+    for fmt in ("csv", "jsonl"):
+        path = os.path.join(tmp, f"in.{fmt}")
+        n = args.bench
+        sym = rng.choice(coins, n)
+        entry = np.array([book[s + "USDT"] for s in sym]) * rng.uniform(0.95, 1.05, n)
+        blank = rng.random(n) < 0.2
+        side = np.where(rng.random(n) < 0.5, "LONG", "SHORT")
+        exit_price = entry * rng.uniform(0.9, 1.1, n)
+        lev = rng.integers(1, 50, n)
+        cap = rng.integers(10, 5000, n)
+        with open(path, "w") as f:
+            if fmt == "csv":
+                f.write("symbol,position,entry,exit,leverage,capital\n")
+                f.writelines(f"{s},{p},{'' if b else f'{e:.6g}'},{x:.6g},{lv},{c}\n"
+                             for s, p, e, b, x, lv, c in zip(sym, side, entry, blank, exit_price, lev, cap))
+            else:
+                f.writelines(json.dumps({"symbol": s, "position": p, "entry": None if b else round(e, 6),
+                                         "exit": round(x, 6), "leverage": int(lv), "capital": int(c)}) + "\n"
+                             for s, p, e, b, x, lv, c in zip(sym, side, entry, blank, exit_price, lev, cap))
+        stats = run_batch(path, os.path.join(tmp, f"out.{fmt}"), fmt, prices=book)
+        print(f"{fmt}: ", end="", file=sys.stderr)
+        print_stats(stats)
+    shutil.rmtree(tmp)
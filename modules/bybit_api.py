@@ -3,8 +3,11 @@
 import os
 import ccxt
 from dotenv import load_dotenv
+from modules.logger import get_logger
+from modules.resilience import ExchangeError, call
 
 load_dotenv()
+log = get_logger("bybit")
 
 BYBIT_API_KEY = os.getenv("BYBIT_API_KEY", "")
 BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET", "")
@@ -21,8 +24,19 @@ def fetch_latest_price(symbol: str) -> float:
     Returns None if any error occurs.
     """
     try:
-        ticker = exchange.fetch_ticker(symbol)
+        ticker = call("bybit.ticker", exchange.fetch_ticker, symbol)
         return ticker['last']  # ccxt typically uses 'last' for last traded price
-    except Exception as e:
-        print(f"Error fetching Bybit price for {symbol}: {e}")
+    except ExchangeError as e:
+        log.error("Error fetching Bybit price for %s: %s", symbol, e)
+        return None
+
+def fetch_funding_rate(symbol: str) -> float:
+    """
+    Current funding rate of the perpetual 'symbol' (e.g., "BTC/USDT:USDT")
+    as a fraction per settlement. Returns None if any error occurs.
+    """
+    try:
+        return call("bybit.funding", exchange.fetch_funding_rate, symbol)["fundingRate"]
+    except ExchangeError as e:
+        log.error("Error fetching Bybit funding rate for %s: %s", symbol, e)
         return None
@@ -1,5 +1,10 @@
 # modules/calculations.py
 
+import time
+import numpy as np
+from modules.accrual import TAKER_FEE, DEFAULT_FUNDING_RATE, trading_fees, funding_times, direction
+from modules.bybit_api import fetch_funding_rate
+from modules.logger import prompt
 from modules.mexc_api import fetch_current_price
 
 def calc_profit(entry_price, exit_price, leverage, capital, position_type):
@@ -16,6 +21,38 @@ def calc_liquidation(entry_price, leverage, position_type):
     else:
         return entry_price * (1 + 1/leverage)
 
+def calc_costs(entry_price, exit_price, leverage, capital, position_type, funding_rate=0.0, settlements=0,
+               entry_fee=TAKER_FEE, exit_fee=TAKER_FEE):
+    """
+    (trading fees, funding paid) in USDT for the calc_profit position:
+    notional capital * leverage, opened and closed at the given fee rates,
+    held across 'settlements' funding settlements at 'funding_rate'.
+    """
+    notional = capital * leverage
+    fees = trading_fees(entry_price, exit_price, notional / entry_price, entry_fee, exit_fee)
+    funding = direction(position_type) * notional * funding_rate * settlements
+    return fees, funding
+
+def calc_net_profit(entry_price, exit_price, leverage, capital, position_type, funding_rate=0.0, settlements=0,
+                    entry_fee=TAKER_FEE, exit_fee=TAKER_FEE):
+    fees, funding = calc_costs(entry_price, exit_price, leverage, capital, position_type, funding_rate,
+                               settlements, entry_fee, exit_fee)
+    return calc_profit(entry_price, exit_price, leverage, capital, position_type) - fees - funding
+
+def calc_profit_array(entry_price, exit_price, leverage, capital, is_long):
+    """
+    calc_profit over NumPy arrays; is_long is a boolean array.
+    """
+    sign = np.where(is_long, 1.0, -1.0)
+    return capital * leverage * sign * (exit_price - entry_price) / entry_price
+
+def calc_liquidation_array(entry_price, leverage, is_long):
+    """
+    calc_liquidation over NumPy arrays; is_long is a boolean array.
+    """
+    sign = np.where(is_long, 1.0, -1.0)
+    return entry_price * (1 - sign / leverage)
+
 def run_calculation_flow():
     """
     1) Show BTC price
@@ -33,7 +70,7 @@ def run_calculation_flow():
         print("WARNING: Failed to fetch BTC price.")
 
     # Ask coin
-    coin = input("Coin ticker (e.g. SOL) or 'menu': ").strip().upper()
+    coin = prompt("Coin ticker (e.g. SOL) or 'menu': ").strip().upper()
     if coin.lower() == "menu":
         print("Returning to main menu.\n")
         return
@@ -47,10 +84,10 @@ def run_calculation_flow():
     else:
         print(f"{symbol_pair}: {coin_price:.3f} USDT")
 
-    override = input("Press ENTER to accept or 'override' to change entry: ").strip().lower()
+    override = prompt("Press ENTER to accept or 'override' to change entry: ").strip().lower()
     if override == "override":
         while True:
-            val = input("Custom entry price or 'menu': ").strip()
+            val = prompt("Custom entry price or 'menu': ").strip()
             if val.lower() == "menu":
                 print("Returning to main menu.\n")
                 return
@@ -64,7 +101,7 @@ def run_calculation_flow():
 
     # Now gather the rest
     while True:
-        pos = input("Position (LONG/SHORT) or 'menu': ").strip().upper()
+        pos = prompt("Position (LONG/SHORT) or 'menu': ").strip().upper()
         if pos.lower() == "menu":
             print("Returning.\n")
             return
@@ -73,7 +110,7 @@ def run_calculation_flow():
         print("Invalid. Must be LONG or SHORT.")
 
     while True:
-        val = input("Exit price or 'menu': ").strip()
+        val = prompt("Exit price or 'menu': ").strip()
         if val.lower() == "menu":
             print("Returning.\n")
             return
@@ -84,7 +121,7 @@ def run_calculation_flow():
             print("Invalid numeric input.")
 
     while True:
-        val = input("Leverage or 'menu': ").strip()
+        val = prompt("Leverage or 'menu': ").strip()
         if val.lower() == "menu":
             print("Returning.\n")
             return
@@ -95,7 +132,7 @@ def run_calculation_flow():
             print("Invalid numeric input.")
 
     while True:
-        val = input("Capital (USDT) or 'menu': ").strip()
+        val = prompt("Capital (USDT) or 'menu': ").strip()
         if val.lower() == "menu":
             print("Returning.\n")
             return
@@ -105,13 +142,65 @@ def run_calculation_flow():
         except ValueError:
             print("Invalid numeric input.")
 
+    while True:
+        val = prompt("Holding time in hours (default=0) or 'menu': ").strip()
+        if val.lower() == "menu":
+            print("Returning.\n")
+            return
+        try:
+            hours = float(val) if val else 0.0
+            break
+        except ValueError:
+            print("Invalid numeric input.")
+
+    # Funding: the live Bybit perpetual rate, over the settlements the holding time crosses
+    settlements = len(funding_times(time.time(), time.time() + hours * 3600))
+    funding_rate = 0.0
+    if settlements:
+        funding_rate = fetch_funding_rate(f"{coin}/USDT:USDT")
+        if funding_rate is None:
+            print(f"Failed to fetch the funding rate. Using {DEFAULT_FUNDING_RATE * 100:.4f}%.")
+            funding_rate = DEFAULT_FUNDING_RATE
+
     # Compute
     profit = calc_profit(coin_price, exit_price, leverage, capital, pos)
+    fees, funding = calc_costs(coin_price, exit_price, leverage, capital, pos, funding_rate, settlements)
     liq = calc_liquidation(coin_price, leverage, pos)
 
     print("\n--- RESULTS ---")
     print(f"Position={pos}, Entry={coin_price:.3f}, Exit={exit_price:.3f}, Leverage={leverage}, Capital={capital}")
     print(f"Potential Profit: {profit:.2f} USDT")
+    print(f"Taker Fees (open + close): {fees:.2f} USDT")
+    print(f"Funding ({settlements} x {funding_rate * 100:.4f}%): {funding:+.2f} USDT")
+    print(f"Net Profit: {profit - fees - funding:.2f} USDT")
     print(f"Approx Liquidation: {liq:.3f} USDT\n")
 
-    input("Press ENTER to return to main menu.\n")
+    if prompt("Estimate liquidation risk with Monte Carlo? (yes/no): ").strip().lower() == "yes":
+        run_risk_estimate(coin_price, exit_price, pos, leverage, capital)
+
+    prompt("Press ENTER to return to main menu.\n")
+
+
+def run_risk_estimate(entry_price, exit_price, position_type, leverage, capital):
+    """
+    Ask for per-step volatility and holding period, then show the Monte Carlo
+    liquidation / target-first probabilities for the chosen leverage and a
+    few common alternatives.
+    """
+    from modules.monte_carlo import estimate_liquidation_risk, print_risk_report
+
+    try:
+        val = prompt("Volatility per step in % (default=0.1): ").strip()
+        sigma = float(val) / 100 if val else 0.001
+        val = prompt("Holding period in steps (default=1000): ").strip()
+        steps = int(val) if val else 1000
+    except ValueError:
+        print("Invalid numeric input.")
+        return
+
+    leverages = sorted({leverage, 5.0, 10.0, 20.0, 50.0})
+    print("Simulating 100000 paths...")
+    results = estimate_liquidation_risk(entry_price, exit_price, position_type, leverages, capital,
+                                        sigma=sigma, steps=steps)
+    print_risk_report(results)
+    print()
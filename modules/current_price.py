@@ -1,12 +1,17 @@
 # modules/current_price.py
 
+from modules import replay
 from modules.mexc_api import fetch_current_price
+from modules.adaptive_poller import AdaptivePoller
+from modules.logger import prompt
+from modules.price_history import HISTORY, format_stats
 
 def run_current_price_flow():
     """
     1) Show BTC price
     2) Ask user for coin -> fetch price -> optional override
-    3) Repeatedly show updated coin price each time user presses ENTER
+    3) Repeatedly show updated coin price each time user presses ENTER,
+       or 'auto' to keep refreshing (adaptive interval) until Ctrl+C
     4) 'menu' returns to main menu
     """
     print("\n=== CURRENT PRICE FLOW ===")
@@ -19,7 +24,7 @@ def run_current_price_flow():
         print("WARNING: Failed to fetch BTC price.")
 
     # 2. Ask coin
-    coin = input("Which coin are you trading? (e.g. SOL) or 'menu' to go back: ").strip().upper()
+    coin = prompt("Which coin are you trading? (e.g. SOL) or 'menu' to go back: ").strip().upper()
     if coin.lower() == "menu":
         print("Returning to main menu.\n")
         return
@@ -31,12 +36,13 @@ def run_current_price_flow():
         print(f"Failed to fetch {symbol_pair}. Using 0.0 as fallback.")
         coin_price = 0.0
     else:
+        HISTORY.append(symbol_pair, coin_price)
         print(f"{symbol_pair} current price: {coin_price:.3f} USDT")
 
-    override = input("Press ENTER to accept or type 'override' to change entry price: ").strip().lower()
+    override = prompt("Press ENTER to accept or type 'override' to change entry price: ").strip().lower()
     if override == "override":
         while True:
-            val = input("Enter custom entry price or 'menu': ").strip()
+            val = prompt("Enter custom entry price or 'menu': ").strip()
             if val.lower() == "menu":
                 print("Returning to main menu.\n")
                 return
@@ -50,17 +56,46 @@ def run_current_price_flow():
 
     # 4. Repeatedly show updated coin price
     while True:
-        user = input("[ENTER to refresh | 'menu' to return]: ").strip().lower()
+        user = prompt("[ENTER to refresh | 'auto' to watch | 'menu' to return]: ").strip().lower()
         if user == "menu":
             print("Returning to main menu.\n")
             break
+        if user == "auto":
+            watch_price(symbol_pair, coin_price)
+            continue
         if user != "":
-            print("Invalid input (ENTER or 'menu').")
+            print("Invalid input (ENTER, 'auto' or 'menu').")
             continue
 
         # Fetch again
         price = fetch_current_price(symbol_pair)
         if price is not None:
-            print(f"{symbol_pair} = {price:.3f} USDT (entry={coin_price:.3f})")
+            history = HISTORY.get(symbol_pair)
+            history.append(price)
+            print(f"{symbol_pair} = {price:.3f} USDT (entry={coin_price:.3f}) | {format_stats(history)}")
         else:
             print(f"Failed to fetch {symbol_pair}.")
+
+
+def watch_price(symbol_pair, entry_price):
+    """
+    Keep refreshing 'symbol_pair' until Ctrl+C. The refresh interval shrinks
+    as price nears the entry price or volatility picks up.
+    """
+    print("Watching... (Ctrl+C to stop)")
+    poller = AdaptivePoller(levels=[entry_price])
+    try:
+        while True:
+            price = fetch_current_price(symbol_pair)
+            if price is None:
+                print(f"Failed to fetch {symbol_pair}.")
+                replay.sleep(poller.max_interval)
+                continue
+            history = HISTORY.get(symbol_pair)
+            history.append(price)
+            poller.observe(price)
+            delay = poller.next_interval(price)
+            print(f"{symbol_pair} = {price:.3f} USDT (entry={entry_price:.3f}, next in {delay:.1f}s) | {format_stats(history)}")
+            replay.sleep(delay)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
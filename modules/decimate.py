@@ -0,0 +1,193 @@
+# modules/decimate.py
+
+import math
+import numpy as np
+
+
+def minmax_decimate(x, y, buckets):
+    """
+    Split (x, y) into 'buckets' equal runs and keep each run's min and max
+    sample in time order. At most 2 * buckets points; spikes survive.
+    """
+    n = len(y)
+    if n <= 2 * buckets:
+        return x, y
+    size = n // buckets
+    usable = size * buckets
+    runs = y[:usable].reshape(buckets, size)
+    base = np.arange(buckets) * size
+    i_min = base + runs.argmin(axis=1)
+    i_max = base + runs.argmax(axis=1)
+    idx = np.sort(np.stack([i_min, i_max], axis=1), axis=1).ravel()
+    if usable < n:
+        tail = usable + np.array([y[usable:].argmin(), y[usable:].argmax()])
+        idx = np.concatenate([idx, np.sort(tail)])
+    return x[idx], y[idx]
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: keep the 'n_out' points that best
+    preserve the visual shape. Loops over buckets, vectorized within each.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx = x[nxt_lo:nxt_hi].mean()
+        cy = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+class MinMaxDecimator:
+    """
+    Incremental min/max decimation of a PriceHistory for live charts.
+
+    Buckets are aligned to absolute sample numbers (history.total), so a
+    completed bucket never changes: each update only decimates the samples
+    that arrived since last time plus the still-open tail bucket, and drops
+    buckets that fell out of the ring. The bucket size is a power of two
+    chosen so the output stays near 'target_points'; it only changes (and
+    the cache is rebuilt) when the history doubles in length.
+    """
+    def __init__(self, target_points=800):
+        self.target_points = target_points
+        self.bucket_size = 1
+        self.next_start = 0  # absolute index of the first sample not in a cached bucket
+        self.starts = np.empty(0, dtype=np.int64)
+        self.xs = np.empty(0)
+        self.ys = np.empty(0)
+
+    def reset(self):
+        self.bucket_size = 1
+        self.next_start = 0
+        self.starts = np.empty(0, dtype=np.int64)
+        self.xs = np.empty(0)
+        self.ys = np.empty(0)
+
+    def update(self, history):
+        """
+        Decimated (x, y) arrays for the whole history, oldest first. The
+        history may be appended to meanwhile from another thread.
+        """
+        ts, px, total = history.snapshot()
+        n = len(px)
+        if n == 0:
+            return ts, px
+        first = total - n
+
+        wanted = max(1, 2 ** math.ceil(math.log2(max(1.0, 2 * n / self.target_points))))
+        if wanted != self.bucket_size:
+            self.bucket_size = wanted
+            self.next_start = 0
+            self.starts = self.starts[:0]
+            self.xs = self.xs[:0]
+            self.ys = self.ys[:0]
+        size = self.bucket_size
+
+        # Forget buckets that are (even partly) no longer in the ring
+        keep = self.starts >= first
+        if not keep.all():
+            self.starts = self.starts[keep]
+            self.xs = self.xs[np.repeat(keep, 2)]
+            self.ys = self.ys[np.repeat(keep, 2)]
+
+        # Decimate newly completed buckets
+        start = max(self.next_start, -(-first // size) * size)
+        done = (total // size) * size
+        if done > start:
+            lo, hi = start - first, done - first
+            count = (hi - lo) // size
+            runs = px[lo:hi].reshape(count, size)
+            base = lo + np.arange(count) * size
+            idx = np.sort(np.stack([base + runs.argmin(axis=1), base + runs.argmax(axis=1)], axis=1), axis=1).ravel()
+            self.starts = np.concatenate([self.starts, start + np.arange(count, dtype=np.int64) * size])
+            self.xs = np.concatenate([self.xs, ts[idx]])
+            self.ys = np.concatenate([self.ys, px[idx]])
+        self.next_start = max(done, start)
+
+        # Open tail bucket (and any head samples before the first aligned bucket)
+        head_end = max(0, min(-(-first // size) * size, total) - first)
+        parts_x, parts_y = [], []
+        if head_end:
+            hx, hy = minmax_decimate(ts[:head_end], px[:head_end], 1)
+            parts_x.append(hx)
+            parts_y.append(hy)
+        parts_x.append(self.xs)
+        parts_y.append(self.ys)
+        tail_lo = max(done - first, head_end)
+        if tail_lo < n:
+            tx, ty = minmax_decimate(ts[tail_lo:], px[tail_lo:], 1)
+            parts_x.append(tx)
+            parts_y.append(ty)
+        return np.concatenate(parts_x), np.concatenate(parts_y)
+
+
+def to_canvas_coords(x, y, width, height, pad=4):
+    """
+    Flat [x0, y0, x1, y1, ...] pixel list for Canvas.coords(), y flipped.
+    """
+    x0, x1 = x[0], x[-1]
+    y0, y1 = y.min(), y.max()
+    sx = (width - 2 * pad) / (x1 - x0) if x1 > x0 else 0.0
+    sy = (height - 2 * pad) / (y1 - y0) if y1 > y0 else 0.0
+    flat = np.empty(2 * len(x))
+    flat[0::2] = pad + (x - x0) * sx
+    flat[1::2] = height - pad - (y - y0) * sy
+    return flat.tolist()
+
+
+# If run directly, benchmark per-frame redraw work vs history length:
+# naive (every sample -> canvas) against incremental min/max decimation.
+if __name__ == "__main__":
+    import time
+    from modules.price_history import PriceHistory
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        canvas = tk.Canvas(root, width=800, height=200)
+        canvas.pack()
+        line = canvas.create_line(0, 0, 0, 0)
+    except Exception:
+        canvas = None
+        print("(no display: timing coordinate work only, not Tk drawing)")
+
+    def frame(coords):
+        if canvas is not None:
+            canvas.coords(line, *coords)
+            root.update_idletasks()
+
+    rng = np.random.default_rng(3)
+    width, height, frames = 800, 200, 20
+    print(f"{'samples':>10}{'naive ms/frame':>16}{'decimated ms/frame':>20}{'points drawn':>14}")
+    for n in (1_000, 10_000, 100_000, 1_000_000):
+        history = PriceHistory(capacity=n)
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 1e-4, n + frames)))
+        for i in range(n):
+            history.append(prices[i], ts=float(i))
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            ts, px = history.window()
+            frame(to_canvas_coords(ts, px, width, height))
+        naive = (time.perf_counter() - start) / frames * 1000
+
+        decimator = MinMaxDecimator(target_points=width)
+        decimator.update(history)
+        start = time.perf_counter()
+        for i in range(frames):
+            history.append(prices[n + i], ts=float(n + i))
+            x, y = decimator.update(history)
+            frame(to_canvas_coords(x, y, width, height))
+        decimated = (time.perf_counter() - start) / frames * 1000
+        print(f"{n:>10}{naive:>16.2f}{decimated:>20.2f}{len(x):>14}")
@@ -0,0 +1,362 @@
+# modules/fake_exchange.py
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from aiohttp import web, WSMsgType
+
+DEFAULT_SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT")
+
+
+class FakeExchange:
+    """
+    Localhost stand-in for the exchange endpoints this bot uses:
+
+      MEXC spot   GET  /api/v3/ticker/24hr            (one symbol or all)
+      Bybit v5    GET  /v5/market/tickers, /v5/market/instruments-info,
+                       /v5/market/time, /v5/account/wallet-balance
+                  POST /v5/position/set-leverage, /v5/order/create, /v5/order/create-batch
+      WebSocket   GET  /ws   Bybit-style {"op": "subscribe", "args": ["tickers.BTCUSDT", "publicTrade.BTCUSDT"]}
+                  GET  /v5/private   auth (any key) + execution/order/position/wallet pushes for every fill
+      Stats       GET  /stats
+
+    Every symbol follows a random walk stepped 'tick_rate' times a second;
+    each step is pushed to subscribed WebSocket clients. REST answers are
+    delayed by gauss(latency, jitter) seconds and a fraction 'error_rate'
+    of them fail (alternating HTTP 500 and 429). The exchange clock runs
+    'skew' seconds ahead of the local one. Market orders fill at once at
+    the current price and move a simple per-symbol position and balance.
+    """
+    def __init__(self, symbols=DEFAULT_SYMBOLS, host="127.0.0.1", port=0, tick_rate=10.0,
+                 latency=0.0, jitter=0.0, error_rate=0.0, volatility=1e-4, seed=None, skew=0.0):
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.volatility = volatility
+        self.skew = skew
+        self.rng = random.Random(seed)
+        self.prices = {s: self.rng.uniform(0.1, 50000) for s in symbols}
+        self.stats = {"requests": 0, "errors_injected": 0, "ws_clients": 0, "ws_messages": 0, "ticks": 0, "orders": 0}
+        self.loop = None
+        self.runner = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.clients = {}  # ws -> set of topics
+        self.private_clients = {}  # ws -> set of topics
+        self.balance = 10000.0
+        self.positions = {}  # symbol -> signed size
+        self.fee_rate = 0.00055
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self):
+        return f"ws://{self.host}:{self.port}/ws"
+
+    # ---------------- market ----------------
+
+    async def market(self):
+        dt = 1.0 / self.tick_rate
+        scale = self.volatility * math.sqrt(dt)
+        next_tick = time.monotonic()
+        while True:
+            now_ms = int((time.time() + self.skew) * 1000)
+            for symbol in self.prices:
+                self.prices[symbol] *= math.exp(self.rng.gauss(0, scale))
+            self.stats["ticks"] += 1
+            for ws, topics in list(self.clients.items()):
+                for topic in topics:
+                    kind, _, symbol = topic.partition(".")
+                    price = self.prices.get(symbol)
+                    if price is None:
+                        continue
+                    if kind == "tickers":
+                        data = {"symbol": symbol, "lastPrice": f"{price:.8g}"}
+                    else:
+                        data = [{"T": now_ms, "s": symbol, "p": f"{price:.8g}", "v": "1", "S": "Buy"}]
+                    try:
+                        await ws.send_str(json.dumps({"topic": topic, "ts": now_ms, "type": "snapshot", "data": data}))
+                        self.stats["ws_messages"] += 1
+                    except ConnectionError:
+                        self.clients.pop(ws, None)
+                        break
+            next_tick += dt
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+
+    # ---------------- REST ----------------
+
+    @web.middleware
+    async def inject(self, request, handler):
+        if request.path in ("/ws", "/v5/private", "/stats"):
+            return await handler(request)
+        self.stats["requests"] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats["errors_injected"] += 1
+            status = 429 if self.stats["errors_injected"] % 2 else 500
+            return web.json_response({"code": status, "msg": "injected error"}, status=status)
+        return await handler(request)
+
+    def bybit(self, result):
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": result, "retExtInfo": {},
+                                  "time": int((time.time() + self.skew) * 1000)})
+
+    def bybit_error(self, msg):
+        return web.json_response({"retCode": 10001, "retMsg": msg, "result": {}, "retExtInfo": {},
+                                  "time": int((time.time() + self.skew) * 1000)})
+
+    async def mexc_ticker(self, request):
+        def entry(symbol, price):
+            return {"symbol": symbol, "lastPrice": f"{price:.8g}", "bidPrice": f"{price * 0.9999:.8g}",
+                    "askPrice": f"{price * 1.0001:.8g}", "openPrice": f"{price:.8g}", "highPrice": f"{price:.8g}",
+                    "lowPrice": f"{price:.8g}", "volume": "1000", "quoteVolume": f"{price * 1000:.8g}",
+                    "priceChange": "0", "priceChangePercent": "0", "closeTime": int(time.time() * 1000)}
+
+        symbol = request.query.get("symbol")
+        if symbol is None:
+            return web.json_response([entry(s, p) for s, p in self.prices.items()])
+        if symbol not in self.prices:
+            return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+        return web.json_response(entry(symbol, self.prices[symbol]))
+
+    async def bybit_tickers(self, request):
+        symbol = request.query.get("symbol")
+        symbols = [symbol] if symbol else list(self.prices)
+        if symbol and symbol not in self.prices:
+            return self.bybit_error("symbol invalid")
+        rows = [{"symbol": s, "lastPrice": f"{self.prices[s]:.8g}", "bid1Price": f"{self.prices[s] * 0.9999:.8g}",
+                 "ask1Price": f"{self.prices[s] * 1.0001:.8g}", "fundingRate": "0.0001"} for s in symbols]
+        return self.bybit({"category": "linear", "list": rows})
+
+    async def bybit_funding_history(self, request):
+        # 0.01% at every 8-hour settlement in [startTime, endTime], newest first
+        symbol = request.query.get("symbol")
+        if symbol not in self.prices:
+            return self.bybit_error("symbol invalid")
+        interval = 8 * 3600 * 1000
+        end = int(request.query.get("endTime", time.time() * 1000))
+        start = int(request.query.get("startTime", end - 200 * interval))
+        rows = [{"symbol": symbol, "fundingRate": "0.0001", "fundingRateTimestamp": str(t)}
+                for t in range(end // interval * interval, start - 1, -interval)][:200]
+        return self.bybit({"category": "linear", "list": rows})
+
+    async def bybit_instruments(self, request):
+        symbol = request.query.get("symbol")
+        symbols = [symbol] if symbol else list(self.prices)
+        rows = [{"symbol": s, "lotSizeFilter": {"minOrderQty": "0.001", "qtyStep": "0.001"},
+                 "leverageFilter": {"maxLeverage": "50"}} for s in symbols]
+        return self.bybit({"category": "linear", "list": rows})
+
+    async def bybit_time(self, request):
+        now = time.time() + self.skew
+        return self.bybit({"timeSecond": str(int(now)), "timeNano": str(int(now * 1e9))})
+
+    def wallet(self):
+        return {"accountType": "UNIFIED", "totalEquity": f"{self.balance:.4f}",
+                "totalAvailableBalance": f"{self.balance:.4f}",
+                "coin": [{"coin": "USDT", "walletBalance": f"{self.balance:.4f}"}]}
+
+    async def bybit_wallet(self, request):
+        return self.bybit({"list": [self.wallet()]})
+
+    async def bybit_set_leverage(self, request):
+        return self.bybit({})
+
+    def fill(self, order):
+        """
+        Fill a market order now; returns its orderId and queues the private pushes.
+        """
+        self.stats["orders"] += 1
+        order_id = f"fake-{self.stats['orders']}"
+        symbol, side, qty = order["symbol"], order["side"], float(order["qty"])
+        price = self.prices[symbol]
+        fee = price * qty * self.fee_rate
+        self.balance -= fee
+        size = self.positions.get(symbol, 0.0) + (qty if side == "Buy" else -qty)
+        self.positions[symbol] = size
+        now_ms = int((time.time() + self.skew) * 1000)
+        if self.private_clients:
+            messages = [
+                ("order", [{"orderId": order_id, "symbol": symbol, "side": side, "orderType": "Market",
+                            "orderStatus": "Filled", "qty": order["qty"], "cumExecQty": order["qty"],
+                            "avgPrice": f"{price:.8g}", "updatedTime": str(now_ms)}]),
+                ("execution", [{"category": "linear", "symbol": symbol, "orderId": order_id, "side": side,
+                                "execType": "Trade", "execPrice": f"{price:.8g}", "execQty": order["qty"],
+                                "execFee": f"{fee:.8f}", "execTime": str(now_ms), "leavesQty": "0"}]),
+                ("position", [{"category": "linear", "symbol": symbol, "side": "Buy" if size > 0 else "Sell" if size < 0 else "",
+                               "size": f"{abs(size):.8g}", "markPrice": f"{price:.8g}"}]),
+                ("wallet", [self.wallet()]),
+            ]
+            asyncio.ensure_future(self.push_private(messages, now_ms))
+        return order_id
+
+    async def push_private(self, messages, now_ms):
+        for ws, topics in list(self.private_clients.items()):
+            for topic, data in messages:
+                if topic not in topics:
+                    continue
+                try:
+                    await ws.send_str(json.dumps({"id": f"{topic}-{now_ms}", "topic": topic,
+                                                  "creationTime": now_ms, "data": data}))
+                    self.stats["ws_messages"] += 1
+                except ConnectionError:
+                    self.private_clients.pop(ws, None)
+                    break
+
+    async def bybit_order(self, request):
+        body = await request.json()
+        if body.get("symbol") not in self.prices:
+            return self.bybit_error("symbol invalid")
+        return self.bybit({"orderId": self.fill(body), "orderLinkId": ""})
+
+    async def bybit_batch_order(self, request):
+        body = await request.json()
+        results, codes = [], []
+        for order in body.get("request", []):
+            if order.get("symbol") in self.prices:
+                results.append({"symbol": order["symbol"], "orderId": self.fill(order), "orderLinkId": ""})
+                codes.append({"code": 0, "msg": "OK"})
+            else:
+                results.append({"symbol": order.get("symbol"), "orderId": "", "orderLinkId": ""})
+                codes.append({"code": 10001, "msg": "symbol invalid"})
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": {"list": results},
+                                  "retExtInfo": {"list": codes}, "time": int((time.time() + self.skew) * 1000)})
+
+    async def stats_handler(self, request):
+        return web.json_response({**self.stats, "ws_clients": len(self.clients) + len(self.private_clients)})
+
+    # ---------------- WebSocket ----------------
+
+    async def ws_handler(self, request):
+        ws = web.WebSocketResponse(heartbeat=20)
+        await ws.prepare(request)
+        self.clients[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(msg.data)
+                if req.get("op") == "subscribe":
+                    self.clients[ws].update(req.get("args", []))
+                    await ws.send_str(json.dumps({"success": True, "op": "subscribe", "req_id": req.get("req_id")}))
+                elif req.get("op") == "ping":
+                    await ws.send_str(json.dumps({"success": True, "op": "pong"}))
+        finally:
+            self.clients.pop(ws, None)
+        return ws
+
+    async def private_handler(self, request):
+        ws = web.WebSocketResponse(heartbeat=20)
+        await ws.prepare(request)
+        authed = False
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(msg.data)
+                if req.get("op") == "auth":
+                    authed = len(req.get("args", [])) == 3
+                    await ws.send_str(json.dumps({"success": authed, "ret_msg": "" if authed else "invalid auth",
+                                                  "op": "auth", "conn_id": str(id(ws))}))
+                elif req.get("op") == "subscribe":
+                    if authed:
+                        self.private_clients.setdefault(ws, set()).update(req.get("args", []))
+                    await ws.send_str(json.dumps({"success": authed, "ret_msg": "" if authed else "not authed",
+                                                  "op": "subscribe", "req_id": req.get("req_id")}))
+                elif req.get("op") == "ping":
+                    await ws.send_str(json.dumps({"success": True, "op": "pong"}))
+        finally:
+            self.private_clients.pop(ws, None)
+        return ws
+
+    # ---------------- lifecycle ----------------
+
+    def app(self):
+        app = web.Application(middlewares=[self.inject])
+        app.router.add_get("/api/v3/ticker/24hr", self.mexc_ticker)
+        app.router.add_get("/v5/market/tickers", self.bybit_tickers)
+        app.router.add_get("/v5/market/instruments-info", self.bybit_instruments)
+        app.router.add_get("/v5/market/funding/history", self.bybit_funding_history)
+        app.router.add_get("/v5/market/time", self.bybit_time)
+        app.router.add_get("/v5/account/wallet-balance", self.bybit_wallet)
+        app.router.add_post("/v5/position/set-leverage", self.bybit_set_leverage)
+        app.router.add_post("/v5/order/create", self.bybit_order)
+        app.router.add_post("/v5/order/create-batch", self.bybit_batch_order)
+        app.router.add_get("/stats", self.stats_handler)
+        app.router.add_get("/ws", self.ws_handler)
+        app.router.add_get("/v5/private", self.private_handler)
+        return app
+
+    async def _start(self):
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.market_task = asyncio.ensure_future(self.market())
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._start())
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.runner.cleanup())
+        self.loop.close()
+
+    def start(self):
+        """
+        Serve on a background thread. Returns once the port is bound.
+        """
+        self.thread = threading.Thread(target=self._serve, name="fake-exchange", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def stop(self):
+        if self.loop is not None:
+            self.market_task.cancel()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(5)
+
+
+def serve(conn=None, **config):
+    """
+    Run a FakeExchange until killed. Sends the bound port over 'conn'
+    (a multiprocessing Pipe end) so a parent process can connect.
+    """
+    exchange = FakeExchange(**config).start()
+    if conn is not None:
+        conn.send(exchange.port)
+    else:
+        print(f"Fake exchange on {exchange.base_url} (ws: {exchange.ws_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        exchange.stop()
+
+
+# If run directly, serve until Ctrl+C
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local fake MEXC/Bybit exchange")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tick-rate", type=float, default=10.0, help="price steps (and WS pushes) per second")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean REST latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="REST latency std dev in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of REST calls that fail")
+    parser.add_argument("--skew", type=float, default=0.0, help="seconds the exchange clock runs ahead")
+    args = parser.parse_args()
+    serve(port=args.port, tick_rate=args.tick_rate, latency=args.latency, jitter=args.jitter,
+          error_rate=args.error_rate, skew=args.skew)
@@ -0,0 +1,270 @@
+# modules/latency.py
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import count
+
+# On by default (a mark costs ~2 µs, next to milliseconds of network). AUTOBOT_TRACE=0 turns it
+# off; AUTOBOT_TRACE=<file.json> also writes a Chrome trace on exit.
+ENABLED = True
+SPAN_BUFFER = 50_000  # most recent spans kept for export; histograms keep everything
+HISTOGRAM_BUCKETS = 512
+
+clock_ns = time.perf_counter_ns  # monotonic, ns
+
+
+def _bucket(ns):
+    """
+    Log-linear bucket: exact below 16 ns, then 8 buckets per power of two
+    (each ~12% wide), so any duration up to hours fits in 512 counters.
+    """
+    if ns < 16:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - 4  # ns >> shift is in [8, 16)
+    return 8 * shift + (ns >> shift)
+
+
+def _bucket_range(k):
+    """
+    [low, high) ns covered by bucket k.
+    """
+    if k < 16:
+        return k, k + 1
+    shift = k // 8 - 1
+    low = (k % 8 + 8) << shift
+    return low, low + (1 << shift)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.counts[_bucket(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        """
+        Duration (ns) at quantile q in [0, 1], to bucket resolution.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for k, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                low, high = _bucket_range(k)
+                return min((low + high) / 2, self.max)
+        return self.max
+
+    def summary(self):
+        """
+        count, mean / p50 / p90 / p99 / max in milliseconds.
+        """
+        if not self.count:
+            return {"count": 0}
+        return {"count": self.count, "mean_ms": self.total / self.count / 1e6,
+                "p50_ms": self.percentile(0.5) / 1e6, "p90_ms": self.percentile(0.9) / 1e6,
+                "p99_ms": self.percentile(0.99) / 1e6, "max_ms": self.max / 1e6}
+
+
+class Trace:
+    """
+    One path from a tick to its outcome, e.g.
+        trace = TRACER.begin("place_trade", "fetch", symbol="BTCUSDT")
+        ...; trace.mark("tick"); ...; trace.mark("send"); ...; trace.end("ack")
+    Each mark closes the stage since the previous one ("tick->send" etc.);
+    end() also records the whole trace ("total"). A trace that is never
+    ended (an early return) keeps the stages it got through.
+    """
+    __slots__ = ("tracer", "id", "name", "args", "tid", "start", "last", "stage")
+
+    def __init__(self, tracer, trace_id, name, stage, args):
+        self.tracer = tracer
+        self.id = trace_id
+        self.name = name
+        self.args = args
+        self.tid = threading.get_ident()
+        self.stage = stage
+        self.start = self.last = clock_ns()
+
+    def mark(self, stage):
+        now = clock_ns()
+        self.tracer._record(self, f"{self.stage}->{stage}", self.last, now)
+        self.stage = stage
+        self.last = now
+
+    def end(self, stage=None):
+        if stage is not None:
+            self.mark(stage)
+        self.tracer._record(self, "total", self.start, self.last)
+
+
+class _NoTrace:
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def end(self, stage=None):
+        pass
+
+
+NO_TRACE = _NoTrace()
+
+
+class Tracer:
+    """
+    Per-stage latency histograms ("<trace>: <from>-><to>") plus a ring of
+    the last SPAN_BUFFER spans for Chrome trace export. Thread-safe; all
+    timestamps come from the monotonic clock.
+    """
+    def __init__(self, buffer=SPAN_BUFFER):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.spans = deque(maxlen=buffer)  # (trace id, trace name, stage, start ns, end ns, tid, args)
+        self.ids = count(1)
+        self.origin = clock_ns()
+
+    def begin(self, name, stage="tick", **args):
+        """
+        Start a trace at 'stage' (now). Returns NO_TRACE when tracing is off.
+        """
+        if not ENABLED:
+            return NO_TRACE
+        return Trace(self, next(self.ids), name, stage, args)
+
+    def _record(self, trace, stage, start, end):
+        key = f"{trace.name}: {stage}"
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.record(end - start)
+            self.spans.append((trace.id, trace.name, stage, start, end, trace.tid, trace.args))
+
+    def summary(self, prefix=None):
+        """
+        {"<trace>: <stage>": histogram summary}, optionally only traces named 'prefix'.
+        """
+        with self.lock:
+            return {key: h.summary() for key, h in sorted(self.histograms.items())
+                    if prefix is None or key.startswith(prefix + ":")}
+
+    def format_summary(self, prefix=None):
+        rows = self.summary(prefix)
+        if not rows:
+            return "no latency samples"
+        width = max(len(key) for key in rows)
+        lines = [f"{'stage':<{width}}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for key, s in rows.items():
+            lines.append(f"{key:<{width}}{s['count']:>8}{s['p50_ms']:>10.3f}{s['p90_ms']:>10.3f}"
+                         f"{s['p99_ms']:>10.3f}{s['max_ms']:>10.3f}")
+        return "\n".join(lines)
+
+    def chrome_events(self):
+        """
+        Buffered spans as Chrome trace events (complete "X" events, µs).
+        A trace's "total" span encloses its stages on the same thread row.
+        """
+        with self.lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        return [{"name": trace_name if stage == "total" else stage, "cat": trace_name, "ph": "X",
+                 "ts": (start - self.origin) / 1e3, "dur": (end - start) / 1e3, "pid": pid, "tid": tid,
+                 "args": {**args, "trace": trace_id}}
+                for trace_id, trace_name, stage, start, end, tid, args in spans]
+
+    def export_chrome(self, path):
+        """
+        Write the buffered spans as Chrome trace-event JSON (chrome://tracing,
+        ui.perfetto.dev). Returns the number of events written.
+        """
+        events = self.chrome_events()
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.spans.clear()
+
+
+TRACER = Tracer()
+
+
+def export_at_exit(path):
+    """
+    Write TRACER's Chrome trace to 'path' when the process exits.
+    """
+    def export():
+        events = TRACER.export_chrome(path)
+        print(f"[latency] {events} spans -> {path}")
+
+    atexit.register(export)
+
+
+def install_from_env():
+    """
+    AUTOBOT_TRACE=0 disables tracing; AUTOBOT_TRACE=<file> exports on exit.
+    """
+    global ENABLED
+    value = os.getenv("AUTOBOT_TRACE", "")
+    if value == "0":
+        ENABLED = False
+    elif value not in ("", "1"):
+        export_at_exit(value)
+
+
+# If run directly: measure the cost of a mark, then trace paper trades and a
+# scalper session against the local fake exchange and export the result.
+if __name__ == "__main__":
+    import sys
+    from modules.logger import setup_logging
+
+    setup_logging(log_dir=False, console=False)
+    n = 200_000
+    tracer = Tracer()
+    start = time.perf_counter()
+    for _ in range(n):
+        trace = tracer.begin("bench", "tick")
+        trace.mark("decision")
+        trace.end("send")
+    elapsed = time.perf_counter() - start
+    print(f"overhead: {elapsed / (n * 3) * 1e6:.2f} µs per mark ({n:,} traces of 3 spans)")
+
+    # Run as a script this file is __main__; the instrumented modules use modules.latency
+    from modules import latency, paper_trader, load_test
+    from modules.fake_exchange import FakeExchange
+    from modules.scalper import ScalperEngine
+
+    symbols = ("BTCUSDT", "ETHUSDT")
+    server = FakeExchange(symbols=symbols, latency=0.02, jitter=0.005, tick_rate=50).start()
+    load_test.point_clients_at(server.base_url, symbols)
+    for _ in range(10):
+        position = paper_trader.place_trade("BTCUSDT", "Buy", 5, 1000)
+        if position:
+            paper_trader.close_trade(position)
+    engine = ScalperEngine("ETH/USDT", "LONG", 100, 10, 0.5)
+    engine.start()
+    time.sleep(3)
+    engine.stop(timeout=2)
+    server.stop()
+
+    print(latency.TRACER.format_summary())
+    path = sys.argv[1] if len(sys.argv) > 1 else "latency_trace.json"
+    print(f"{latency.TRACER.export_chrome(path)} events -> {path} (open in chrome://tracing or ui.perfetto.dev)")
@@ -0,0 +1,339 @@
+# modules/load_test.py
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import urllib.request
+
+import aiohttp
+
+from modules import fake_exchange
+from modules.logger import setup_logging
+
+SCENARIOS = ("price", "scalper", "paper", "ws")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+class Meter:
+    """
+    Wall time and CPU time (this process only; the fake exchange runs in
+    its own process) around one scenario.
+    """
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+
+    @property
+    def cpu_pct(self):
+        return 100 * self.cpu / self.wall if self.wall else 0.0
+
+
+def start_server(**config):
+    """
+    Start a FakeExchange in a child process. Returns (process, base_url).
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=fake_exchange.serve, kwargs={"conn": child, **config}, daemon=True)
+    process.start()
+    port = parent.recv()
+    return process, f"http://127.0.0.1:{port}"
+
+
+def server_stats(base_url):
+    with urllib.request.urlopen(base_url + "/stats", timeout=5) as response:
+        return json.loads(response.read())
+
+
+def point_clients_at(base_url, symbols):
+    """
+    Aim the real client objects at the fake exchange: the ccxt MEXC client
+    (markets preloaded so no exchangeInfo call, client-side throttle off)
+    and the pybit session and private account stream used by the paper
+    trader.
+    """
+    from modules import mexc_api, paper_trader
+
+    exchange = mexc_api.exchange
+    exchange.urls["api"]["spot"]["public"] = base_url
+    exchange.enableRateLimit = False
+    exchange.set_markets([
+        {"id": s, "symbol": f"{s[:-4]}/USDT", "base": s[:-4], "quote": "USDT", "baseId": s[:-4], "quoteId": "USDT",
+         "type": "spot", "spot": True, "swap": False, "future": False, "option": False, "contract": False,
+         "active": True, "linear": None, "inverse": None, "precision": {}, "limits": {}}
+        for s in symbols
+    ])
+
+    # paper_trader installs an interactive SIGINT handler on import; a load test wants plain Ctrl+C
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    paper_trader.session.endpoint = base_url
+    paper_trader.account.url = base_url.replace("http", "ws") + "/v5/private"
+    paper_trader.account.api_key = paper_trader.account.api_key or "load-test"
+    paper_trader.account.api_secret = paper_trader.account.api_secret or "load-test"
+
+
+def reset_request_budget():
+    """
+    Start a fresh MEXC request window. mexc_api counts requests in module
+    globals shared by every scenario, so without this the price scenario
+    uses up the 1000/60s budget and the AdaptivePoller's budget floor then
+    throttles the scalper scenario to a tick every few seconds.
+    """
+    from modules import mexc_api
+
+    mexc_api.REQUEST_COUNT = 0
+    mexc_api.LAST_RESET_TIME = time.time()
+
+
+def run_price(symbols, duration, workers):
+    """
+    'workers' threads calling fetch_current_price back to back.
+    """
+    from modules.mexc_api import fetch_current_price
+
+    latencies = []
+    errors = [0]
+    stop = threading.Event()
+
+    def worker(i):
+        n = 0
+        while not stop.is_set():
+            symbol = f"{symbols[(i + n) % len(symbols)][:-4]}/USDT"
+            start = time.perf_counter()
+            price = fetch_current_price(symbol)
+            latencies.append(time.perf_counter() - start)
+            if price is None:
+                errors[0] += 1
+            n += 1
+
+    with Meter() as meter:
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(workers)]
+        for t in threads:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in threads:
+            t.join()
+    return {
+        "requests": len(latencies), "errors": errors[0], "req_per_sec": len(latencies) / meter.wall,
+        "p50_ms": percentile(latencies, 50) * 1000, "p99_ms": percentile(latencies, 99) * 1000,
+        "cpu_pct": meter.cpu_pct,
+    }
+
+
+def run_scalper(symbols, duration, fps=10, queue_size=32, target=0.0005):
+    """
+    One ScalperEngine per symbol on background threads (as the GUI runs
+    them) with a consumer draining every queue at 'fps'. Engines that hit
+    their target are restarted so the load stays constant.
+
+    Tick throughput is set by each engine's AdaptivePoller (distance to
+    the exit levels, volatility, and the MEXC request budget the engines
+    share), not by the fake exchange's --tick-rate.
+    """
+    from modules.scalper import ScalperEngine
+
+    def new_engine(symbol):
+        engine = ScalperEngine(f"{symbol[:-4]}/USDT", "LONG", 100, 5, target, queue_size=queue_size)
+        engine.start()
+        return engine
+
+    engines = {s: new_engine(s) for s in symbols}
+    finished = []
+    states = errors = max_depth = 0
+
+    with Meter() as meter:
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            for symbol, engine in list(engines.items()):
+                max_depth = max(max_depth, engine.states.qsize())
+                while True:
+                    try:
+                        state = engine.states.get_nowait()
+                    except queue.Empty:
+                        break
+                    states += 1
+                    errors += state["status"] == "error"
+                if not engine.is_running():
+                    finished.append(engine)
+                    engines[symbol] = new_engine(symbol)
+            time.sleep(1 / fps)
+        for engine in engines.values():
+            engine.stop()
+
+    everything = finished + list(engines.values())
+    ticks = sum(e.ticks for e in everything)
+    return {
+        "engines": len(symbols), "ticks": ticks, "ticks_per_sec": ticks / meter.wall, "exits": len(finished),
+        "states_rendered": states, "error_states": errors, "dropped": sum(e.dropped for e in everything),
+        "max_queue_depth": max_depth, "cpu_pct": meter.cpu_pct,
+    }
+
+
+def run_paper(symbols, duration, interval):
+    """
+    The multi-symbol PaperTrader against the fake Bybit endpoints.
+    """
+    from modules import paper_trader
+
+    with Meter() as meter:
+        engine = paper_trader.PaperTrader(leverage=3, capital=100, interval_sec=interval)
+        engine.run(symbols, duration)
+    return {
+        "symbols": len(symbols), "round_trips": len(engine.trade_history),
+        "api_calls": paper_trader.limiter.total, "open_after_stop": len(engine.positions),
+        "cpu_pct": meter.cpu_pct, "wall_s": meter.wall,
+        "clock_offset_ms": paper_trader.clock.offset * 1000, "recv_window_ms": paper_trader.session.recv_window,
+        "account_messages": paper_trader.account.state.messages,
+    }
+
+
+def run_ws(ws_url, symbols, duration, queue_size=1024, work_us=0):
+    """
+    Subscribe to tickers for every symbol and feed each tick through the
+    scalper's hot path (trigger index + price history) on a consumer
+    thread behind a bounded queue. 'work_us' adds simulated per-tick work.
+    """
+    from modules.trigger_index import TriggerIndex, add_position_triggers
+    from modules.price_history import PriceHistoryBook
+
+    ticks = queue.Queue(maxsize=queue_size)
+    counts = {"received": 0, "processed": 0, "dropped": 0, "max_depth": 0}
+    lags = []
+    stop = threading.Event()
+
+    def consumer():
+        index = TriggerIndex()
+        book = PriceHistoryBook(capacity=4096)
+        seeded = set()
+        while not stop.is_set() or not ticks.empty():
+            try:
+                ts, symbol, price = ticks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if symbol not in seeded:
+                add_position_triggers(index, symbol, "LONG", price, 5, target_fraction=0.01)
+                seeded.add(symbol)
+            index.update(symbol, price)
+            book.append(symbol, price, ts)
+            if work_us:
+                end = time.perf_counter() + work_us / 1e6
+                while time.perf_counter() < end:
+                    pass
+            lags.append(time.time() - ts)
+            counts["processed"] += 1
+
+    async def receive():
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(ws_url) as ws:
+                await ws.send_str(json.dumps({"op": "subscribe", "args": [f"tickers.{s}" for s in symbols]}))
+                deadline = time.monotonic() + duration
+                while time.monotonic() < deadline:
+                    try:
+                        msg = await ws.receive(timeout=max(0.01, deadline - time.monotonic()))
+                    except asyncio.TimeoutError:
+                        break
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    payload = json.loads(msg.data)
+                    if "topic" not in payload:
+                        continue
+                    counts["received"] += 1
+                    item = (payload["ts"] / 1000, payload["data"]["symbol"], float(payload["data"]["lastPrice"]))
+                    try:
+                        ticks.put_nowait(item)
+                    except queue.Full:
+                        counts["dropped"] += 1
+                    counts["max_depth"] = max(counts["max_depth"], ticks.qsize())
+
+    with Meter() as meter:
+        worker = threading.Thread(target=consumer, daemon=True)
+        worker.start()
+        asyncio.run(receive())
+        stop.set()
+        worker.join()
+    return {
+        **counts, "msgs_per_sec": counts["received"] / meter.wall,
+        "lag_p50_ms": percentile(lags, 50) * 1000, "lag_p99_ms": percentile(lags, 99) * 1000,
+        "cpu_pct": meter.cpu_pct,
+    }
+
+
+def print_report(name, result):
+    print(f"\n--- {name} ---")
+    for key, value in result.items():
+        print(f"  {key:<18} {value:,.2f}" if isinstance(value, float) else f"  {key:<18} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the bot against a local fake exchange")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--symbols", type=int, default=20, help="number of synthetic symbols")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--tick-rate", type=float, default=10.0,
+                        help="fake market steps per second (scalper polling is paced by its AdaptivePoller)")
+    parser.add_argument("--latency", type=float, default=0.005, help="mean REST latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.002, help="REST latency std dev (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of REST calls that fail")
+    parser.add_argument("--skew", type=float, default=0.0, help="seconds the fake exchange clock runs ahead")
+    parser.add_argument("--workers", type=int, default=8, help="threads for the price scenario")
+    parser.add_argument("--paper-interval", type=float, default=0.5, help="paper trader hold/pause seconds")
+    parser.add_argument("--ws-queue", type=int, default=1024, help="bounded tick queue size for the ws scenario")
+    parser.add_argument("--ws-work-us", type=float, default=0.0, help="simulated per-tick work in the ws consumer")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    process, base_url = start_server(symbols=symbols, tick_rate=args.tick_rate, latency=args.latency,
+                                     jitter=args.jitter, error_rate=args.error_rate, skew=args.skew)
+    setup_logging(log_dir=False, console=False)
+    point_clients_at(base_url, symbols)
+    print(f"Fake exchange at {base_url}: {len(symbols)} symbols, {args.tick_rate} ticks/s, "
+          f"latency {args.latency * 1000:.1f}±{args.jitter * 1000:.1f} ms, error rate {args.error_rate:.1%}")
+
+    results = {}
+    try:
+        for name in args.scenarios.split(","):
+            name = name.strip()
+            reset_request_budget()
+            if name == "price":
+                results[name] = run_price(symbols, args.duration, args.workers)
+            elif name == "scalper":
+                results[name] = run_scalper(symbols, args.duration)
+            elif name == "paper":
+                results[name] = run_paper(symbols, args.duration, args.paper_interval)
+            elif name == "ws":
+                results[name] = run_ws(base_url.replace("http", "ws") + "/ws", symbols, args.duration,
+                                       args.ws_queue, args.ws_work_us)
+            else:
+                print(f"Unknown scenario {name!r}, skipping.")
+                continue
+            print_report(name, results[name])
+        results["server"] = server_stats(base_url)
+        print_report("server", results["server"])
+    finally:
+        process.terminate()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+# If run directly, run the load test (python -m modules.load_test --help)
+if __name__ == "__main__":
+    main()
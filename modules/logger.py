@@ -0,0 +1,170 @@
+# modules/logger.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+LOG_DIR = os.getenv("AUTOBOT_LOG_DIR", "logs")
+LOG_FILE = "autobot.jsonl"
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+_listener = None
+
+
+class _EnqueueOnlyHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler.prepare() formats the message in the caller's thread.
+    We skip that: the hot path only puts the LogRecord on the queue and the
+    listener thread does all the formatting. Log args should therefore be
+    immutable values (numbers, strings), which is all we ever pass.
+    """
+    def prepare(self, record):
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, logger, msg, plus any
+    structured fields passed as extra={"fields": {...}}.
+    """
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage().strip(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(log_dir=None, console=True, level=logging.INFO, stream=None):
+    """
+    Route every 'autobot.*' logger through a queue to a background listener
+    that writes plain lines to the console and JSON lines to a rotating file.
+    Safe to call more than once; later calls replace the earlier setup.
+    Called by the entry points (main.py, ui.py), never on import.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler(stream or sys.stdout)
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers.append(console_handler)
+    if log_dir is not False:
+        log_dir = log_dir or LOG_DIR
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, LOG_FILE), maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger("autobot")
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_EnqueueOnlyHandler(log_queue))
+    root.setLevel(level)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """
+    Flush whatever is still queued and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def flush_logging():
+    """
+    Block until everything logged so far has been written.
+    """
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def prompt(message):
+    """
+    input() for the interactive flows: queued console lines are written
+    first, so they never land in the middle of the prompt.
+    """
+    flush_logging()
+    return input(message)
+
+
+def get_logger(name):
+    """
+    Logger for 'autobot.<name>'. Importing a module must not create log
+    files or threads, so nothing is set up here; until an entry point calls
+    setup_logging(), warnings and errors go to stderr via the stdlib's
+    last-resort handler.
+    """
+    return logging.getLogger(f"autobot.{name}")
+
+
+# If run directly, compare per-call cost of print vs queued logging
+# when stdout is a slow pipe (reader drains 512 bytes per millisecond,
+# roughly a remote terminal).
+if __name__ == "__main__":
+    import threading
+
+    def slow_pipe():
+        read_fd, write_fd = os.pipe()
+
+        def drain():
+            while os.read(read_fd, 512):
+                time.sleep(0.001)
+
+        reader = threading.Thread(target=drain, daemon=True)
+        reader.start()
+        return os.fdopen(write_fd, "w", buffering=1)
+
+    n = 5000
+    line = "BTC/USDT=%.3f, move=%.2f%% (target=%.2f%%)"
+
+    out = slow_pipe()
+    start = time.perf_counter()
+    for i in range(n):
+        print(line % (100000.0 + i, 0.01 * i, 0.5), file=out)
+    print_cost = (time.perf_counter() - start) / n
+
+    out = slow_pipe()
+    setup_logging(log_dir=False, stream=out)
+    log = get_logger("bench")
+    start = time.perf_counter()
+    for i in range(n):
+        log.info(line, 100000.0 + i, 0.01 * i, 0.5)
+    log_cost = (time.perf_counter() - start) / n
+    drain_start = time.perf_counter()
+    shutdown_logging()
+    drain = time.perf_counter() - drain_start
+
+    print(f"{n} tick lines to a slow pipe:")
+    print(f"  print():          {print_cost * 1e6:8.2f} us/call in the loop")
+    print(f"  queued logger:    {log_cost * 1e6:8.2f} us/call in the loop "
+          f"(background writer drained the rest in {drain:.2f}s)")
@@ -0,0 +1,237 @@
+# modules/market_scanner.py
+
+import time
+import numpy as np
+from modules import replay
+from modules.logger import prompt
+
+# Columns we rank on. 'spread' is better when smaller, the rest when larger.
+RANK_KEYS = ("change", "volume", "spread", "volatility")
+
+
+def _client(venue):
+    """
+    The shared ccxt client for 'venue' ("mexc" or "bybit").
+    """
+    if venue == "mexc":
+        from modules.mexc_api import exchange
+    elif venue == "bybit":
+        from modules.bybit_api import exchange
+    else:
+        raise ValueError(f"Unknown venue: {venue}")
+    return exchange
+
+
+def fetch_usdt_tickers(venue="mexc"):
+    """
+    All spot */USDT tickers from 'venue' in one bulk request.
+    Returns {} on error.
+
+    Spot is asked for explicitly: ccxt's bybit client defaults to linear
+    swaps, keyed "BTC/USDT:USDT". Should a venue answer with those anyway,
+    they are keyed as "BTC/USDT" unless the spot pair is there too.
+    """
+    try:
+        if venue == "mexc":
+            from modules.mexc_api import increment_usage
+            increment_usage()
+        tickers = _client(venue).fetch_tickers(params={"type": "spot"})
+    except Exception as e:
+        print(f"Error fetching tickers on {venue.upper()}: {e}")
+        return {}
+    usdt = {sym: t for sym, t in tickers.items() if sym.endswith("/USDT")}
+    for sym, t in tickers.items():
+        if sym.endswith("/USDT:USDT"):
+            usdt.setdefault(sym[:-len(":USDT")], t)
+    return usdt
+
+
+def _column(tickers, symbols, field):
+    values = [tickers[s].get(field) for s in symbols]
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+class MarketScanner:
+    """
+    Keeps the latest snapshot of a whole ticker universe as NumPy columns
+    plus a short ring of last prices per symbol for realized volatility.
+    Symbols keep their column across refreshes; new listings are appended.
+    """
+    def __init__(self, venue="mexc", history=30):
+        self.venue = venue
+        self.symbols = []
+        self.slot = {}
+        self.history = np.full((history, 0), np.nan)
+        self.head = 0
+        self.last = self.bid = self.ask = self.change = self.volume = np.empty(0)
+        self.spread = self.vol = np.empty(0)
+
+    def refresh(self):
+        """
+        Pull every USDT ticker in one request and load it. Returns the count loaded.
+        """
+        tickers = fetch_usdt_tickers(self.venue)
+        if tickers:
+            self.load(tickers)
+        return len(tickers)
+
+    def load(self, tickers):
+        """
+        Load a {symbol: ccxt ticker} snapshot into the column arrays.
+        """
+        new = [s for s in tickers if s not in self.slot]
+        if new:
+            for s in new:
+                self.slot[s] = len(self.symbols)
+                self.symbols.append(s)
+            pad = np.full((self.history.shape[0], len(new)), np.nan)
+            self.history = np.hstack([self.history, pad])
+
+        n = len(self.symbols)
+        present = [s for s in self.symbols if s in tickers]
+        cols = np.fromiter((self.slot[s] for s in present), dtype=np.intp, count=len(present))
+
+        def scatter(field):
+            out = np.full(n, np.nan)
+            out[cols] = _column(tickers, present, field)
+            return out
+
+        self.last = scatter("last")
+        self.bid = scatter("bid")
+        self.ask = scatter("ask")
+        self.change = scatter("percentage")
+        self.volume = scatter("quoteVolume")
+
+        self.history[self.head] = self.last
+        self.head = (self.head + 1) % self.history.shape[0]
+
+        # Derived columns are computed once per refresh, not per rank() call
+        self.spread = self.spread_bps()
+        self.vol = self.volatility()
+
+    def spread_bps(self):
+        mid = (self.bid + self.ask) / 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (self.ask - self.bid) / mid * 1e4
+
+    def volatility(self):
+        """
+        Std of log returns across the stored snapshots, per symbol (in %).
+        """
+        ordered = np.roll(self.history, -self.head, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(ordered), axis=0)
+        valid = np.isfinite(returns)
+        count = valid.sum(axis=0)
+        returns = np.where(valid, returns, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = returns.sum(axis=0) / count
+            var = np.where(valid, (returns - mean) ** 2, 0.0).sum(axis=0) / count
+        return np.where(count >= 2, np.sqrt(var) * 100, np.nan)
+
+    def columns(self):
+        return {
+            "change": self.change,
+            "volume": self.volume,
+            "spread": self.spread,
+            "volatility": self.vol,
+        }
+
+    def rank(self, by="volume", top=20, min_volume=0.0):
+        """
+        Top 'top' symbols ordered by one of RANK_KEYS.
+        Returns a list of (symbol, last, change%, quote volume, spread bps, volatility%).
+        """
+        if by not in RANK_KEYS:
+            raise ValueError(f"by must be one of {RANK_KEYS}, got {by!r}")
+        cols = self.columns()
+        key = cols[by] if by == "spread" else -cols[by]
+        key = np.where(np.isfinite(key), key, np.inf)
+        key = np.where(self.volume >= min_volume, key, np.inf)
+
+        top = min(top, len(self.symbols))
+        if top == 0:
+            return []
+        picked = np.argpartition(key, top - 1)[:top]
+        picked = picked[np.argsort(key[picked], kind="stable")]
+        picked = picked[np.isfinite(key[picked])]
+        return [
+            (self.symbols[i], self.last[i], self.change[i], self.volume[i],
+             cols["spread"][i], cols["volatility"][i])
+            for i in picked
+        ]
+
+
+def print_ranking(rows, venue, by):
+    print(f"\n--- {venue.upper()} top {len(rows)} by {by} ---")
+    print(f"{'Symbol':<16}{'Last':>14}{'24h %':>9}{'Volume':>16}{'Spread bp':>11}{'Vol %':>8}")
+    for sym, last, change, volume, spread, vol in rows:
+        print(f"{sym:<16}{last:>14.6g}{change:>9.2f}{volume:>16,.0f}{spread:>11.2f}{vol:>8.3f}")
+
+
+def run_scanner_flow():
+    """
+    1) Ask venue(s), ranking key, refresh interval
+    2) Refresh the whole USDT universe every interval and print the top rows
+    3) Ctrl+C returns to main menu
+    """
+    print("\n=== MARKET SCANNER ===")
+
+    venues = ["mexc"]
+    if prompt("Include Bybit too? (yes/no): ").strip().lower() == "yes":
+        venues.append("bybit")
+
+    by = prompt(f"Rank by {'/'.join(RANK_KEYS)} (default volume): ").strip().lower() or "volume"
+    if by not in RANK_KEYS:
+        print("Invalid choice. Using volume.")
+        by = "volume"
+
+    try:
+        interval_str = prompt("Refresh interval in seconds (default=10): ").strip()
+        interval = float(interval_str) if interval_str else 10.0
+    except ValueError:
+        interval = 10.0
+        print("Invalid input. Using 10s.")
+
+    scanners = [MarketScanner(venue) for venue in venues]
+    print("Scanning... (Ctrl+C to stop)")
+    try:
+        while True:
+            for scanner in scanners:
+                start = time.perf_counter()
+                count = scanner.refresh()
+                rows = scanner.rank(by=by, top=15)
+                elapsed = (time.perf_counter() - start) * 1000
+                print_ranking(rows, scanner.venue, by)
+                print(f"({count} pairs, {elapsed:.0f} ms incl. request)")
+            replay.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nScanner stopped. Returning to main menu.\n")
+
+
+# If run directly, benchmark load + rank on a synthetic 2500-pair universe
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n = 2500
+    base = rng.lognormal(0, 3, n)
+    scanner = MarketScanner("mexc")
+    refreshes = 50
+    load_ms = rank_ms = 0.0
+    for r in range(refreshes):
+        last = base * np.exp(rng.normal(0, 0.002, n) * (r + 1) ** 0.5)
+        half_spread = last * rng.uniform(1e-5, 2e-3, n)
+        tickers = {
+            f"C{i}/USDT": {"last": last[i], "bid": last[i] - half_spread[i], "ask": last[i] + half_spread[i],
+                           "percentage": rng.normal(0, 5), "quoteVolume": rng.lognormal(12, 2)}
+            for i in range(n)
+        }
+        t0 = time.perf_counter()
+        scanner.load(tickers)
+        t1 = time.perf_counter()
+        for key in RANK_KEYS:
+            scanner.rank(by=key, top=20)
+        t2 = time.perf_counter()
+        load_ms += (t1 - t0) * 1000
+        rank_ms += (t2 - t1) * 1000
+    print(f"{n} pairs: load {load_ms / refreshes:.2f} ms, rank x{len(RANK_KEYS)} {rank_ms / refreshes:.2f} ms per refresh")
+    print_ranking(scanner.rank(by="volatility", top=5), "synthetic", "volatility")
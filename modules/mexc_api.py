@@ -4,8 +4,11 @@ import os
 import time
 import ccxt
 from dotenv import load_dotenv
+from modules.logger import get_logger
+from modules.resilience import ExchangeError, READ, call
 
 load_dotenv()
+log = get_logger("mexc")
 
 REQUEST_COUNT = 0
 LAST_RESET_TIME = time.time()
@@ -23,7 +26,16 @@ def check_usage():
 
     # Optional: warn if close to limit
     if REQUEST_COUNT >= 0.8 * API_MAX_REQUESTS:
-        print(f"[WARNING] {REQUEST_COUNT}/{API_MAX_REQUESTS} requests used in this window.")
+        log.warning("%d/%d requests used in this window.", REQUEST_COUNT, API_MAX_REQUESTS)
+
+def remaining_budget():
+    """
+    Returns (requests left in the current window, seconds until the window resets).
+    """
+    elapsed = time.time() - LAST_RESET_TIME
+    if elapsed > API_WINDOW_SECONDS:
+        return API_MAX_REQUESTS, API_WINDOW_SECONDS
+    return max(API_MAX_REQUESTS - REQUEST_COUNT, 0), API_WINDOW_SECONDS - elapsed
 
 def increment_usage():
     global REQUEST_COUNT
@@ -39,17 +51,26 @@ exchange = ccxt.mexc({
     "enableRateLimit": True,
 })
 
+def fetch_price(symbol: str) -> float:
+    """
+    Returns the latest last price for 'symbol' (e.g., "BTC/USDT"), retried
+    and circuit-broken per modules.resilience. Raises ExchangeError.
+    """
+    def fetch():
+        increment_usage()
+        return exchange.fetch_ticker(symbol)["last"]
+
+    return call("mexc.ticker", fetch, policy=READ)
+
 def fetch_current_price(symbol: str) -> float:
     """
     Returns the latest last price for 'symbol' (e.g., "BTC/USDT").
     Returns None on error.
     """
     try:
-        increment_usage()
-        ticker = exchange.fetch_ticker(symbol)
-        return ticker["last"]
-    except Exception as e:
-        print(f"Error fetching {symbol} on MEXC: {e}")
+        return fetch_price(symbol)
+    except ExchangeError as e:
+        log.error("Error fetching %s on MEXC: %s", symbol, e)
         return None
 
 # If run directly, test
@@ -1,120 +1,223 @@
 #!/usr/bin/env python3
 import os
+import sys
 import time
 import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from dotenv import load_dotenv
 from pybit.unified_trading import HTTP
+from modules import profiler, replay
+from modules.accrual import DEFAULT_FUNDING_RATE, FundingSchedule, direction, fee, funding_times, net_pnl
+from modules.account_stream import AccountStream, DEMO_PRIVATE_URL
+from modules.latency import TRACER, NO_TRACE
+from modules.logger import get_logger, prompt, setup_logging
+from modules.portfolio_risk import PortfolioRisk
+from modules.rate_limiter import RateLimiter
+from modules.resilience import ExchangeError, BAD_SYMBOL, ORDER, READ, call
+from modules.shutdown import ShutdownCoordinator
+from modules.sizing import step_sizing
+from modules.time_sync import TimeSync, install_pybit, MAX_RECV_WINDOW_MS
+from modules.trade_store import TradeHistory, default_path
 
 # ✅ Load API keys from .env
 load_dotenv()
+log = get_logger("paper_trader")
 BYBIT_API_KEY = os.getenv("BYBIT_API_KEY", "")
 BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET", "")
 
 # ✅ Initialize Bybit Testnet API connection
+# (recv_window starts wide and is narrowed once the clock is synced; pybit
+# only retries recv_window errors itself, rate limits surface to _request)
 session = HTTP(
     demo=True,
     api_key=BYBIT_API_KEY,
     api_secret=BYBIT_API_SECRET,
-    recv_window=10000
+    recv_window=MAX_RECV_WINDOW_MS,
+    retry_codes={10002}
 )
 
-# ✅ Global State
-total_profit = 0
-open_trade = None
-trade_history = []
-running = True
+# ✅ One rate limiter for every symbol sharing this session
+# (Bybit v5 allows ~10 req/s per endpoint per UID; stay at or under that)
+BYBIT_REQUESTS_PER_SEC = 10
+limiter = RateLimiter(rate=BYBIT_REQUESTS_PER_SEC)
+
+
+# ✅ Every REST call: a limiter token per attempt, then the endpoint's
+# circuit breaker and retry policy (modules.resilience). Raises ExchangeError.
+def _request(endpoint, method, policy=READ, trace=NO_TRACE, **params):
+    def send():
+        limiter.acquire()
+        trace.mark("send")
+        return getattr(session, method)(**params)
+
+    return call(endpoint, send, policy=policy)
+
+
+# ✅ Sign requests with exchange time instead of our (possibly skewed) clock
+def fetch_server_time_ms():
+    return int(session.get_server_time()["result"]["timeNano"]) / 1e6
+
+
+def _apply_recv_window(clock):
+    session.recv_window = clock.recv_window()
+
+
+TIME_SYNC_INTERVAL_SEC = 300
+clock = TimeSync(fetch_server_time_ms, interval=TIME_SYNC_INTERVAL_SEC, limiter=limiter, on_sync=_apply_recv_window)
+install_pybit(clock)
+
+# ✅ Private stream keeps balance, positions and fills in memory (needs API keys)
+FILL_WAIT_SEC = 2
+account = AccountStream(BYBIT_API_KEY, BYBIT_API_SECRET, url=DEMO_PRIVATE_URL, now_ms=clock.now_ms)
+
+
+def fill(order_id, quantity, timeout=FILL_WAIT_SEC):
+    """
+    (average execution price, fees paid) of 'order_id' from the account
+    stream, or None if the stream is down or the fill did not arrive
+    within 'timeout'.
+    """
+    if not order_id or not account.connected():
+        return None
+    filled = account.state.wait_fill(order_id, quantity, timeout)
+    return filled[1:] if filled else None
+
+
+# ✅ Instrument info rarely changes; cache it per symbol
+_instruments = {}
+
+# ✅ The engine currently running (the signal handler stops it)
+engine = None
+
+
+# ✅ One open position
+class Position:
+    __slots__ = ("symbol", "side", "entry_price", "leverage", "quantity", "opened_at", "exit_price", "fees",
+                 "funding")
+
+    def __init__(self, symbol, side, entry_price, leverage, quantity):
+        self.symbol = symbol
+        self.side = side
+        self.entry_price = entry_price
+        self.leverage = leverage
+        self.quantity = quantity
+        self.opened_at = time.time()
+        self.exit_price = None
+        self.fees = 0.0     # trading fees paid so far
+        self.funding = 0.0  # funding paid (negative: received), booked on close
+
+    def __repr__(self):
+        return (f"Position({self.symbol} {self.side} qty={self.quantity} "
+                f"entry={self.entry_price} lev={self.leverage})")
+
+
+# ✅ Graceful shutdown: the first Ctrl+C / SIGTERM stops new entries and the
+# engine flattens everything; a second one (or one with no engine running) quits
+FLATTEN_DEADLINE_SEC = 10
 
 
-# ✅ Graceful shutdown
 def signal_handler(sig, frame):
-    global running, open_trade
-    confirm = input("\n⚠️ Are you sure you want to stop the bot? (yes/no): ")
-    if confirm.lower() == "yes":
-        print("\n🔴 Stopping bot...")
-        if open_trade:
-            print("📉 Closing open trade before exit...")
-            close_trade()
-        print(f"💰 Total Profit so far: ${total_profit:.2f}")
-        running = False
-    else:
-        print("✅ Bot continues running...")
+    if engine is None or engine.stopped.is_set():
+        signal.default_int_handler(sig, frame)
+    print(f"\n🔴 Stopping bot: no new entries, flattening {len(engine.positions)} open trade(s)... "
+          f"(press Ctrl+C again to quit immediately)")
+    engine.stop()
 
 
 signal.signal(signal.SIGINT, signal_handler)
+signal.signal(signal.SIGTERM, signal_handler)
+
+
+def normalize_symbol(symbol):
+    """
+    'BTC/USDT' or 'btcusdt' -> 'BTCUSDT' (Bybit linear symbol).
+    """
+    return symbol.replace("/", "").strip().upper()
 
 
 # ✅ Fetch latest market price
 def fetch_latest_price(symbol):
     try:
-        response = session.get_tickers(category="linear", symbol=symbol)
-        return float(response["result"]["list"][0]["lastPrice"])
-    except Exception as e:
-        print(f"⚠ Error fetching price for {symbol}: {e}")
+        rows = _request("bybit.ticker", "get_tickers", category="linear", symbol=symbol)["result"]["list"]
+        if not rows:
+            raise ExchangeError(BAD_SYMBOL, "bybit.ticker", f"no linear ticker for {symbol}")
+        return float(rows[0]["lastPrice"])
+    except (ExchangeError, LookupError, ValueError) as e:
+        log.error("⚠ Error fetching price for %s: %s", symbol, e)
         return None
 
 
-# ✅ Fetch available account balance
+# ✅ Fetch available account balance (from the account stream when it is live)
+# Returns None if it cannot be had; callers decide what to size from.
 def get_available_balance():
+    equity = account.state.total_equity() if account.connected() else None
+    if equity is not None:
+        return equity
     try:
-        response = session.get_wallet_balance(accountType="UNIFIED")
-        balance_info = response["result"]["list"][0]["totalEquity"]
-        return float(balance_info)
-    except Exception as e:
-        print(f"⚠ Error fetching balance: {e}")
-        return 1000  # Safe default value if error occurs
+        response = _request("bybit.wallet", "get_wallet_balance", accountType="UNIFIED")
+        return float(response["result"]["list"][0]["totalEquity"])
+    except (ExchangeError, LookupError, ValueError) as e:
+        log.error("⚠ Error fetching balance: %s", e)
+        return None
+
+
+# ✅ Fetch (and cache) instrument info
+def get_instrument(symbol):
+    instrument = _instruments.get(symbol)
+    if instrument is None:
+        response = _request("bybit.instrument", "get_instruments_info", category="linear", symbol=symbol)
+        instrument = response["result"]["list"][0]
+        _instruments[symbol] = instrument
+    return instrument
 
 
 # ✅ Fetch minimum order size and step size
 def get_minimum_order_size(symbol):
     try:
-        response = session.get_instruments_info(category="linear", symbol=symbol)
-        instrument = response["result"]["list"][0]
+        instrument = get_instrument(symbol)
         min_qty = float(instrument["lotSizeFilter"]["minOrderQty"])
         qty_step = float(instrument["lotSizeFilter"]["qtyStep"])
         return min_qty, qty_step
     except Exception as e:
-        print(f"⚠ Error fetching minimum order size for {symbol}: {e}")
+        log.error("⚠ Error fetching minimum order size for %s: %s", symbol, e)
         return 0.001, 0.001  # Safe default values
 
 
 # ✅ Fetch max leverage for symbol
 def get_max_leverage(symbol):
     try:
-        response = session.get_instruments_info(category="linear", symbol=symbol)
-        max_leverage = float(response["result"]["list"][0]["leverageFilter"]["maxLeverage"])
+        max_leverage = float(get_instrument(symbol)["leverageFilter"]["maxLeverage"])
         return max_leverage
     except Exception as e:
-        print(f"⚠ Error fetching max leverage for {symbol}: {e}")
+        log.error("⚠ Error fetching max leverage for %s: %s", symbol, e)
         return 20  # Safe default
 
 
 # ✅ Suggest leverage and capital based on balance
-def suggest_leverage_and_capital(symbol):
-    global trade_history
+def suggest_leverage_and_capital(symbol, trade_history=None, base_capital=500):
     max_leverage = get_max_leverage(symbol)
     available_balance = get_available_balance()
+    if available_balance is None:
+        print(f"⚠️ Could not fetch the account balance; sizing from the ${base_capital} base capital.")
+        available_balance = base_capital
 
-    leverage = min(3, max_leverage)  # ✅ Default to 3x or max allowed
-    capital = min(500, available_balance)  # Don't exceed available balance
-
-    # Adjust based on trade history
-    if trade_history:
-        last_trade = trade_history[-1]
-        if last_trade['pnl'] > 0:
-            leverage = min(last_trade['leverage'] + 1, max_leverage)
-            capital = min(capital + 50, available_balance)
-        else:
-            leverage = max(last_trade['leverage'] - 1, 1)
-            capital = max(100, min(capital - 50, available_balance))
+    # ✅ Default to 3x (or max allowed) and the base capital, capped by the balance;
+    # step up after a win, down after a loss (python -m modules.sizing simulates this)
+    last_trade = trade_history[-1] if trade_history else {"pnl": float("nan"), "leverage": 0}
+    leverage, capital = step_sizing(last_trade["pnl"], last_trade["leverage"], base_capital, max_leverage,
+                                    available_balance)
+    leverage, capital = leverage.item(), capital.item()
 
     print(f"💰 Available Balance: ${available_balance:.2f}")
     print(f"🔍 Suggested Leverage: {leverage}x (Max: {max_leverage}x), Suggested Position Size: ${capital}")
 
-    modify = input("🔸 Do you want to modify these values? (yes/no): ").strip().lower()
+    modify = prompt("🔸 Do you want to modify these values? (yes/no): ").strip().lower()
     if modify == "yes":
-        leverage = float(input(f"🔸 Enter leverage (Max {max_leverage}x): "))
+        leverage = float(prompt(f"🔸 Enter leverage (Max {max_leverage}x): "))
         leverage = min(max(leverage, 1), max_leverage)
-        capital = float(input(f"🔸 Enter total position size in $ (Max ${available_balance:.2f}): "))
+        capital = float(prompt(f"🔸 Enter total position size in $ (Max ${available_balance:.2f}): "))
         capital = min(max(capital, 100), available_balance)
 
     print(f"✅ Final Decision: {leverage}x leverage, total position size: ${capital}")
@@ -124,26 +227,31 @@ def suggest_leverage_and_capital(symbol):
 # ✅ Set leverage for symbol
 def set_leverage(symbol, leverage):
     try:
-        session.set_leverage(
+        _request(
+            "bybit.leverage", "set_leverage",
             symbol=symbol,
             buyLeverage=str(leverage),
             sellLeverage=str(leverage),
             category="linear"
         )
-        print(f"✅ Leverage set to {leverage}x for {symbol}")
+        log.info("✅ Leverage set to %sx for %s", leverage, symbol)
     except Exception as e:
-        print(f"❌ Failed to set leverage: {e}")
+        log.error("❌ Failed to set leverage: %s", e)
 
 
-# ✅ Place a trade
+# ✅ Place a trade, returns a Position (or None)
+# Traced as fetch -> tick (price in) -> leverage -> decision (qty) -> send
+# (rate-limit token) -> ack (order accepted) -> fill
 def place_trade(symbol, side, leverage, capital):
-    global open_trade
+    trace = TRACER.begin("place_trade", "fetch", symbol=symbol)
     price = fetch_latest_price(symbol)
+    trace.mark("tick")
     if not price:
-        print("❌ Cannot fetch latest price. Skipping trade.")
+        log.error("❌ Cannot fetch latest price. Skipping trade.")
         return None
 
     set_leverage(symbol, leverage)  # ✅ Always set leverage as desired
+    trace.mark("leverage")
 
     min_qty, qty_step = get_minimum_order_size(symbol)
     quantity = round(capital / price, 3)  # ✅ Capital is total position size
@@ -154,59 +262,309 @@ def place_trade(symbol, side, leverage, capital):
     elif quantity % qty_step != 0:
         quantity = round(quantity - (quantity % qty_step), 3)
 
-    print(f"📈 Placing {side} trade on {symbol} at ${price:.2f}, qty={quantity}, total position size=${capital}, leverage={leverage}x")
+    log.info("📈 Placing %s trade on %s at $%.2f, qty=%s, total position size=$%s, leverage=%sx",
+             side, symbol, price, quantity, capital, leverage)
+    trace.mark("decision")
 
     try:
-        session.place_order(
+        response = _request(
+            "bybit.order", "place_order", policy=ORDER, trace=trace,
             category="linear",
             symbol=symbol,
             side=side,
             orderType="Market",
             qty=quantity
         )
-        open_trade = {"symbol": symbol, "side": side, "entry_price": price, "leverage": leverage, "quantity": quantity}
-        return open_trade
+        trace.mark("ack")
+        filled = fill(response["result"].get("orderId"), quantity)
+        trace.end("fill")
+        position = Position(symbol, side, filled[0] if filled else price, leverage, quantity)
+        position.fees = filled[1] if filled else fee(price, quantity)
+        return position
     except Exception as e:
-        print(f"❌ Trade failed: {e}")
+        log.error("❌ Trade failed: %s", e)
         return None
 
 
-# ✅ Close the open trade
-def close_trade():
-    global open_trade, trade_history, total_profit
-    if not open_trade:
-        return
-
-    exit_price = fetch_latest_price(open_trade["symbol"])
-    if not exit_price:
-        print("❌ Cannot fetch exit price. Holding position.")
-        return
+# ✅ PnL of a position closed at exit_price, before fees and funding. The
+# quantity already is the leveraged size (capital / price), so leverage does
+# not enter again; a short gains when the price falls.
+def position_pnl(position, exit_price):
+    return direction(position.side) * (exit_price - position.entry_price) * position.quantity
 
-    pnl = (exit_price - open_trade["entry_price"]) * open_trade["quantity"] * open_trade["leverage"]
-    total_profit += pnl
-    trade_history.append({"symbol": open_trade["symbol"], "pnl": pnl, "leverage": open_trade["leverage"]})
 
-    side = "Sell" if open_trade["side"] == "Buy" else "Buy"
-    session.place_order(category="linear", symbol=open_trade["symbol"], side=side, orderType="Market", qty=open_trade["quantity"])
-    print(f"💰 Closed trade at ${exit_price:.2f}, PnL: ${pnl:.2f}")
-    open_trade = None
+# ✅ Funding settled for 'symbol' in (start, end]: (timestamps in s, rates), or None
+def funding_history(symbol, start, end):
+    try:
+        response = _request("bybit.funding", "get_funding_rate_history", category="linear", symbol=symbol,
+                            startTime=int(start * 1000), endTime=int(end * 1000), limit=200)
+    except ExchangeError as e:
+        log.warning("⚠ Funding history unavailable for %s: %s", symbol, e)
+        return None
+    rows = response["result"]["list"]
+    times = np.array([int(row["fundingRateTimestamp"]) / 1000 for row in rows])
+    rates = np.array([float(row["fundingRate"]) for row in rows])
+    held = (times > start) & (times <= end)
+    return times[held], rates[held]
+
+
+# ✅ Book the closing fees and the funding of closed positions, all at once;
+# returns their net PnLs. 'exit_fees' entries of None are estimated at the
+# taker rate. Symbols held across a settlement get Bybit's settled rates
+# (DEFAULT_FUNDING_RATE when those cannot be fetched).
+def accrue_costs(positions, exit_prices, exit_fees, closed_at=None):
+    closed_at = time.time() if closed_at is None else closed_at
+    entry = np.array([p.entry_price for p in positions], dtype=np.float64)
+    exit_ = np.array(exit_prices, dtype=np.float64)
+    quantity = np.array([p.quantity for p in positions], dtype=np.float64)
+    opened = np.array([p.opened_at for p in positions], dtype=np.float64)
+    sides = direction([p.side for p in positions])
+    estimated = fee(exit_, quantity)
+    fees = np.array([p.fees for p in positions]) + np.array(
+        [estimated[i] if f is None else f for i, f in enumerate(exit_fees)], dtype=np.float64)
+
+    history = {}
+    for symbol in {p.symbol for p in positions}:
+        start = opened[[p.symbol == symbol for p in positions]].min()
+        if not len(funding_times(start, closed_at)):
+            continue
+        history[symbol] = funding_history(symbol, start, closed_at)
+        if history[symbol] is None:
+            times = funding_times(start, closed_at)
+            history[symbol] = (times, np.full(len(times), DEFAULT_FUNDING_RATE))
+    funding = np.zeros(len(positions))
+    if history:
+        schedule = FundingSchedule.from_history(history)
+        held = np.array([p.symbol in schedule.sid for p in positions])
+        funding[held] = schedule.accrue(schedule.index([p.symbol for p in positions if p.symbol in schedule.sid]),
+                                        sides[held], quantity[held], opened[held], closed_at, entry[held])
+
+    gross = sides * (exit_ - entry) * quantity  # position_pnl over arrays
+    for i, position in enumerate(positions):
+        position.exit_price = exit_[i]
+        position.fees = fees[i]
+        position.funding = funding[i]
+    return net_pnl(gross, fees, funding)
+
+
+# ✅ Close a position, returns its PnL net of fees and funding (or None if it is still open)
+# With the account stream live, PnL uses the actual fill price and fee; otherwise the
+# last traded price is fetched first, as an estimate.
+# Traced from the close decision: [-> tick] -> send -> ack -> fill
+def close_trade(position):
+    trace = TRACER.begin("close_trade", "decision", symbol=position.symbol)
+    streaming = account.connected()
+    if not streaming:
+        exit_price = fetch_latest_price(position.symbol)
+        trace.mark("tick")
+        if not exit_price:
+            log.error("❌ Cannot fetch exit price. Holding position.")
+            return None
+
+    side = "Sell" if position.side == "Buy" else "Buy"
+    response = _request("bybit.order", "place_order", policy=ORDER, trace=trace, category="linear",
+                        symbol=position.symbol, side=side, orderType="Market", qty=position.quantity)
+    trace.mark("ack")
+    exit_fee = None
+    if streaming:
+        filled = fill(response["result"].get("orderId"), position.quantity)
+        if filled:
+            exit_price, exit_fee = filled
+        else:
+            log.warning("⚠ No fill for %s within %ss, using last price", position.symbol, FILL_WAIT_SEC)
+            exit_price = fetch_latest_price(position.symbol) or position.entry_price
+    trace.end("fill")
+
+    pnl = float(accrue_costs([position], [exit_price], [exit_fee])[0])
+    log.info("💰 Closed trade at $%.2f, PnL: $%.2f (fees $%.2f, funding $%+.2f)", exit_price, pnl,
+             position.fees, position.funding,
+             extra={"fields": {"symbol": position.symbol, "exit_price": exit_price, "pnl": pnl,
+                               "fees": position.fees, "funding": position.funding}})
+    return pnl
+
+
+# ✅ Runs one strategy thread per symbol under the shared session + limiter
+# Closed trades go to a TradeHistory, written to 'trades_path' (if given) in row groups
+class PaperTrader:
+    def __init__(self, leverage, capital, interval_sec=60, trades_path=None):
+        self.leverage = leverage
+        self.capital = capital
+        self.interval_sec = interval_sec
+        self.positions = {}
+        self.trade_history = TradeHistory(trades_path)
+        self.total_profit = 0.0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        # Cross-margin view of the open positions (marked at their entry prices)
+        self.risk = PortfolioRisk(wallet_balance=0)
+        self.risk_ids = {}
+
+    def _track(self, position):
+        self.risk_ids[position.symbol] = self.risk.add(position.symbol, position.side, position.quantity,
+                                                       position.entry_price)
+        liq = self.risk.liquidation_prices().get(position.symbol)
+        summary = self.risk.summary()
+        log.info("📊 Portfolio: %d open, equity $%.2f, maintenance $%.2f (%.1f%%), %s liquidation at %s",
+                 summary["positions"], summary["equity"], summary["maintenance_margin"],
+                 summary["margin_ratio"] * 100, position.symbol, f"${liq:.4f}" if liq else "none",
+                 extra={"fields": {**summary, "symbol": position.symbol, "liquidation_price": liq}})
+
+    def _untrack(self, symbol, pnl):
+        pid = self.risk_ids.pop(symbol, None)
+        if pid is not None:
+            self.risk.remove(pid)
+            self.risk.set_wallet(self.risk.wallet + pnl)
+
+    def open(self, symbol, side, leverage):
+        if self.stopped.is_set():
+            return None
+        position = place_trade(symbol, side, leverage, self.capital)
+        if position:
+            with self.lock:
+                self.positions[symbol] = position
+                self._track(position)
+        return position
+
+    def close(self, symbol):
+        # Pop first so a concurrent close (signal handler vs worker) only runs once
+        with self.lock:
+            position = self.positions.pop(symbol, None)
+        if position is None:
+            return None
+        try:
+            pnl = close_trade(position)
+        except Exception as e:
+            log.error("❌ Failed to close %s: %s", symbol, e)
+            pnl = None
+        with self.lock:
+            if pnl is None:
+                self.positions[symbol] = position
+                return None
+            self.total_profit += pnl
+            self.trade_history.append(symbol, position.side, position.entry_price, position.exit_price,
+                                      position.quantity, position.leverage, pnl, position.fees, position.funding)
+            self._untrack(symbol, pnl)
+        return pnl
+
+    def run_symbol(self, symbol):
+        leverage = min(self.leverage, get_max_leverage(symbol))
+        while not self.stopped.is_set():
+            if self.open(symbol, "Buy", leverage):
+                log.info("⏳ Holding %s... Checking for exit conditions...", symbol)
+                replay.wait(self.stopped, self.interval_sec)
+                if self.stopped.is_set():
+                    break  # flatten() closes it together with everything else
+                self.close(symbol)
+            replay.wait(self.stopped, self.interval_sec)
+
+    def _run_symbol_safely(self, symbol):
+        try:
+            self.run_symbol(symbol)
+        except Exception as e:
+            log.error("❌ Strategy for %s stopped: %s", symbol, e)
+            self.close(symbol)
+
+    def run(self, symbols, total_duration_sec=None):
+        if not symbols:
+            raise ValueError("no symbols to trade")
+        clock.start()
+        if account.enabled and replay.MODE != "replay":
+            account.start()
+        balance = get_available_balance()
+        if balance is None:
+            log.warning("⚠ Balance unavailable; portfolio risk uses the $%s position size as wallet", self.capital)
+        self.risk.set_wallet(self.capital if balance is None else balance)
+        with ThreadPoolExecutor(max_workers=len(symbols), thread_name_prefix="trader") as pool:
+            for symbol in symbols:
+                pool.submit(self._run_symbol_safely, symbol)
+            replay.wait(self.stopped, total_duration_sec)
+            self.stop()
+            self.flatten()
+        # Entries that were still in flight when we stopped
+        if self.positions:
+            self.flatten()
+
+    def stop(self):
+        self.stopped.set()
+
+    def flatten(self, deadline_sec=FLATTEN_DEADLINE_SEC):
+        """
+        Close every open position at once (batched, parallel, bounded by
+        'deadline_sec'). Positions that could not be confirmed closed stay
+        in self.positions. Returns the ShutdownCoordinator report.
+        """
+        deadline = time.monotonic() + deadline_sec
+        with self.lock:
+            positions = list(self.positions.values())
+            self.positions.clear()
+        report = ShutdownCoordinator(session, limiter).flatten(positions, deadline_sec)
+
+        closed = set(report["closed"])
+        flattened, exit_prices, exit_fees = [], [], []
+        for position in positions:
+            if position.symbol not in closed:
+                with self.lock:
+                    self.positions[position.symbol] = position
+                continue
+            # All fills arrive in parallel: wait for them until the flatten deadline, not per position
+            wait = min(FILL_WAIT_SEC, max(0.0, deadline - time.monotonic()))
+            filled = fill(report["order_ids"].get(position.symbol), position.quantity, wait)
+            exit_price, exit_fee = filled if filled else (None, None)
+            exit_price = (exit_price or report["exit_prices"].get(position.symbol)
+                          or fetch_latest_price(position.symbol))
+            if not exit_price:
+                log.warning("⚠ No exit price for %s, booking it at the entry price", position.symbol)
+                exit_price = position.entry_price
+            flattened.append(position)
+            exit_prices.append(exit_price)
+            exit_fees.append(exit_fee)
+        if not flattened:
+            return report
+
+        pnls = accrue_costs(flattened, exit_prices, exit_fees)
+        for position, pnl in zip(flattened, pnls.tolist()):
+            with self.lock:
+                self.total_profit += pnl
+                self.trade_history.append(position.symbol, position.side, position.entry_price, position.exit_price,
+                                          position.quantity, position.leverage, pnl, position.fees, position.funding)
+                self._untrack(position.symbol, pnl)
+        return report
 
 
 # ✅ Main bot logic
-def run_paper_trader(symbol):
-    global running
-    leverage, capital = suggest_leverage_and_capital(symbol)
-
-    while running:
-        trade = place_trade(symbol, "Buy", leverage, capital)
-        if trade:
-            print("⏳ Holding trade... Checking for exit conditions...")
-            time.sleep(60)
-            close_trade()
-        time.sleep(60)
-
+def run_paper_trader(symbol, interval_sec=60, total_duration_sec=None, capital=None):
+    """
+    Trade one or more symbols ('BTCUSDT', 'ETH/USDT', or a comma-separated
+    list / Python list) concurrently until total_duration_sec elapses or
+    the bot is stopped. Returns the PaperTrader engine (None if no symbol was given).
+    """
+    global engine
+    if isinstance(symbol, str):
+        symbol = symbol.split(",")
+    symbols = [normalize_symbol(s) for s in symbol if s.strip()]
+    if not symbols:
+        log.error("❌ No symbol given. Nothing to trade.")
+        return None
 
-# ✅ Start bot
+    leverage, capital = suggest_leverage_and_capital(symbols[0], base_capital=capital or 500)
+    engine = PaperTrader(leverage, capital, interval_sec, trades_path=default_path())
+    try:
+        engine.run(symbols, total_duration_sec)
+    finally:
+        engine.trade_history.close()
+    print(f"💰 Total Profit so far: ${engine.total_profit:.2f}")
+    if engine.positions:
+        print(f"⚠️ {len(engine.positions)} position(s) may still be open: {', '.join(engine.positions)}")
+    log.info("🕒 Clock: %s", clock.metrics())
+    log.info("⏱ Latency:\n%s", TRACER.format_summary("place_trade") + "\n" + TRACER.format_summary("close_trade"),
+             extra={"fields": {"latency": {**TRACER.summary("place_trade"), **TRACER.summary("close_trade")}}})
+    return engine
+
+
+# ✅ Start bot (AUTOBOT_PROFILE=1 to profile, AUTOBOT_RECORD/AUTOBOT_REPLAY=<file> to record/replay)
 if __name__ == "__main__":
-    symbol = input("\n🔸 Enter the symbol to trade (e.g., ETHUSDT, SOLUSDT): ").upper().strip()
-    run_paper_trader(symbol)
\ No newline at end of file
+    setup_logging()
+    profiler.enable_from_env()
+    replay.install_from_env(extra=[(sys.modules[__name__], "session", "bybit_http")])
+    symbols = prompt("\n🔸 Enter the symbol(s) to trade (e.g., ETHUSDT, SOLUSDT): ").upper().strip()
+    profiler.run_flow("paper_trader", run_paper_trader, symbols)
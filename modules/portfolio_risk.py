@@ -0,0 +1,338 @@
+# modules/portfolio_risk.py
+
+import numpy as np
+
+# (position value floor in USDT, maintenance margin rate), modeled on Bybit's
+# BTCUSDT risk-limit tiers. Real tiers differ per symbol; pass your own.
+DEFAULT_TIERS = (
+    (0, 0.005),
+    (2_000_000, 0.01),
+    (4_000_000, 0.015),
+    (6_000_000, 0.02),
+    (8_000_000, 0.025),
+    (10_000_000, 0.03),
+)
+REBUILD_EVERY = 100_000  # incremental updates between exact re-sums (float drift)
+REFINE_STEPS = 3         # tier re-evaluations when solving for liquidation prices
+
+
+def _direction(side):
+    return 1.0 if side.upper() in ("LONG", "BUY") else -1.0
+
+
+def tier_table(tiers):
+    """
+    (floors, rates, deductions) arrays. The deduction makes maintenance
+    margin value * rate - deduction continuous across tier boundaries.
+    """
+    floors = np.array([t[0] for t in tiers], dtype=np.float64)
+    rates = np.array([t[1] for t in tiers], dtype=np.float64)
+    deductions = np.concatenate([[0.0], np.cumsum(floors[1:] * np.diff(rates))])
+    return floors, rates, deductions
+
+
+class PortfolioRisk:
+    """
+    Cross-margin risk for every open position, held in parallel arrays.
+
+    Per position: direction d (+1 long / -1 short), quantity q, entry e.
+    At mark p its unrealized PnL is d*q*(p - e) and its maintenance margin
+    q*p*rate - deduction for the tier its value q*p falls in. Account
+    equity = wallet + sum(uPnL); the account is liquidated when equity <=
+    total maintenance margin.
+
+    Both are linear in p within a symbol, so per symbol we keep
+      DQ = sum d*q, DQE = sum d*q*e, QR = sum q*rate, D = sum deduction
+    and a tick is O(1): U = p*DQ - DQE, M = p*QR - D, and the account
+    totals move by the difference. Only when p leaves the band in which
+    every position of the symbol stays in its tier are that symbol's tiers
+    re-evaluated (O(positions in the symbol)).
+
+    Liquidation prices are solved on demand for all symbols at once: the
+    price of symbol s (others fixed) where equity == maintenance is
+        p* = (U_s - M_s - X + DQE_s - D_s) / (DQ_s - QR_s)
+    with X = equity - maintenance now, re-solved with the tiers at p*.
+    """
+    def __init__(self, wallet_balance, tiers=DEFAULT_TIERS, capacity=64):
+        self.wallet = float(wallet_balance)
+        self.floors, self.rates, self.deductions = tier_table(tiers)
+        self.ceilings = np.append(self.floors[1:], np.inf)
+        self.n = 0
+        self._alloc(capacity)
+        self.ids = {}        # position id -> slot
+        self.slot_ids = []   # slot -> position id
+        self.next_id = 0
+        self.symbols = []    # symbol index -> name
+        self.sid = {}        # name -> symbol index
+        self.members = []    # symbol index -> slot array
+        self.updates = 0
+        for name in ("mark", "U", "M", "QR", "D", "DQ", "DQE", "lo", "hi"):
+            setattr(self, name, np.empty(0))
+        self.total_upnl = 0.0
+        self.total_mm = 0.0
+
+    # ---------------- storage ----------------
+
+    def _alloc(self, capacity):
+        old = getattr(self, "dq", None)
+        for name in ("dq", "q", "e", "sym", "rate", "ded"):
+            new = np.zeros(capacity, dtype=np.intp if name == "sym" else np.float64)
+            if old is not None:
+                new[:self.n] = getattr(self, name)[:self.n]
+            setattr(self, name, new)
+
+    def _symbol(self, symbol):
+        i = self.sid.get(symbol)
+        if i is None:
+            i = len(self.symbols)
+            self.sid[symbol] = i
+            self.symbols.append(symbol)
+            self.members.append(np.empty(0, dtype=np.intp))
+            for name in ("U", "M", "QR", "D", "DQ", "DQE"):
+                setattr(self, name, np.append(getattr(self, name), 0.0))
+            self.mark = np.append(self.mark, np.nan)
+            self.lo = np.append(self.lo, np.inf)   # empty band: first tick re-tiers
+            self.hi = np.append(self.hi, -np.inf)
+        return i
+
+    def _tiers(self, values):
+        k = np.searchsorted(self.floors, values, side="right") - 1
+        return k, self.rates[k], self.deductions[k]
+
+    def _retier(self, s, price):
+        """
+        Tiers of symbol s's positions at 'price', their sums and the price
+        band in which they stay valid.
+        """
+        idx = self.members[s]
+        if not len(idx):
+            self.QR[s] = self.D[s] = 0.0
+            self.lo[s], self.hi[s] = 0.0, np.inf
+            return
+        q = self.q[idx]
+        k, rate, ded = self._tiers(q * price)
+        self.rate[idx], self.ded[idx] = rate, ded
+        self.QR[s] = (q * rate).sum()
+        self.D[s] = ded.sum()
+        self.lo[s] = (self.floors[k] / q).max()
+        self.hi[s] = (self.ceilings[k] / q).min()
+
+    def add(self, symbol, side, quantity, entry_price, mark_price=None):
+        """
+        Add a position ('LONG'/'SHORT' or 'Buy'/'Sell'). Returns its id.
+        """
+        if self.n == len(self.dq):
+            self._alloc(2 * len(self.dq))
+        s = self._symbol(symbol)
+        i = self.n
+        self.n += 1
+        dq = _direction(side) * quantity
+        self.dq[i], self.q[i], self.e[i], self.sym[i] = dq, quantity, entry_price, s
+        self.DQ[s] += dq
+        self.DQE[s] += dq * entry_price
+        self.members[s] = np.append(self.members[s], i)
+
+        pid = self.next_id
+        self.next_id += 1
+        self.ids[pid] = i
+        self.slot_ids.append(pid)
+        if mark_price is None:
+            mark_price = self.mark[s] if np.isfinite(self.mark[s]) else entry_price
+        self.lo[s], self.hi[s] = np.inf, -np.inf  # membership changed: re-tier on this tick
+        self.update_price(symbol, mark_price)
+        return pid
+
+    def remove(self, pid):
+        """
+        Drop a position (closed). Its realized PnL is not booked into the
+        wallet; call set_wallet() with the new balance if it should be.
+        """
+        i = self.ids.pop(pid)
+        s = self.sym[i]
+        self.DQ[s] -= self.dq[i]
+        self.DQE[s] -= self.dq[i] * self.e[i]
+        self.members[s] = self.members[s][self.members[s] != i]
+
+        last = self.n - 1
+        if i != last:
+            # Move the last position into the hole
+            for name in ("dq", "q", "e", "sym", "rate", "ded"):
+                arr = getattr(self, name)
+                arr[i] = arr[last]
+            moved = self.slot_ids[last]
+            self.slot_ids[i] = moved
+            self.ids[moved] = i
+            t = self.sym[i]
+            self.members[t][self.members[t] == last] = i
+        self.slot_ids.pop()
+        self.n = last
+
+        self.lo[s], self.hi[s] = np.inf, -np.inf
+        self.update_price(self.symbols[s], self.mark[s])
+
+    def set_wallet(self, balance):
+        self.wallet = float(balance)
+
+    # ---------------- ticks ----------------
+
+    def update_price(self, symbol, price):
+        """
+        New mark for 'symbol': O(1) unless a position changes tier.
+        """
+        s = self.sid.get(symbol)
+        if s is None:
+            return
+        self.mark[s] = price
+        if not self.lo[s] <= price < self.hi[s]:
+            self._retier(s, price)
+        u = price * self.DQ[s] - self.DQE[s]
+        m = price * self.QR[s] - self.D[s]
+        self.total_upnl += u - self.U[s]
+        self.total_mm += m - self.M[s]
+        self.U[s] = u
+        self.M[s] = m
+        self.updates += 1
+        if self.updates % REBUILD_EVERY == 0:
+            self.rebuild()
+
+    def update_prices(self, prices):
+        for symbol, price in prices.items():
+            self.update_price(symbol, price)
+
+    def rebuild(self):
+        """
+        Recompute every sum from the position arrays (clears float drift).
+        """
+        n, count = self.n, len(self.symbols)
+        sym = self.sym[:n]
+        self.DQ = np.bincount(sym, self.dq[:n], minlength=count)
+        self.DQE = np.bincount(sym, self.dq[:n] * self.e[:n], minlength=count)
+        self.QR = np.bincount(sym, self.q[:n] * self.rate[:n], minlength=count)
+        self.D = np.bincount(sym, self.ded[:n], minlength=count)
+        active = np.isfinite(self.mark)
+        self.U = np.where(active, self.mark * self.DQ - self.DQE, 0.0)
+        self.M = np.where(active, self.mark * self.QR - self.D, 0.0)
+        self.total_upnl = float(self.U.sum())
+        self.total_mm = float(self.M.sum())
+
+    # ---------------- risk ----------------
+
+    @property
+    def equity(self):
+        return self.wallet + self.total_upnl
+
+    @property
+    def maintenance_margin(self):
+        return self.total_mm
+
+    @property
+    def margin_ratio(self):
+        """
+        Maintenance margin / equity; the account is liquidated at 1.0.
+        """
+        equity = self.equity
+        return self.total_mm / equity if equity > 0 else np.inf
+
+    def liquidation_prices(self):
+        """
+        {symbol: price at which the account is liquidated if only that
+        symbol moves} (None where no positive price does it).
+        """
+        if not self.n:
+            return {}
+        n, count = self.n, len(self.symbols)
+        excess = self.equity - self.total_mm
+        base = self.U - self.M - excess + self.DQE
+        qr, ded = self.QR.copy(), self.D.copy()
+        sym, q = self.sym[:n], self.q[:n]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for _ in range(REFINE_STEPS):
+                liq = (base - ded) / (self.DQ - qr)
+                # Re-evaluate each position's tier at its symbol's liquidation price
+                at = np.where(np.isfinite(liq) & (liq > 0), liq, self.mark)[sym]
+                _, rate, d = self._tiers(q * at)
+                new_qr = np.bincount(sym, q * rate, minlength=count)
+                new_ded = np.bincount(sym, d, minlength=count)
+                if np.allclose(new_qr, qr) and np.allclose(new_ded, ded):
+                    break
+                qr, ded = new_qr, new_ded
+            liq = (base - ded) / (self.DQ - qr)
+        return {name: (float(p) if np.isfinite(p) and p > 0 else None)
+                for name, p, members in zip(self.symbols, liq, self.members) if len(members)}
+
+    def position_liquidation_price(self, pid):
+        return self.liquidation_prices().get(self.symbols[self.sym[self.ids[pid]]])
+
+    def account_liquidation_move(self):
+        """
+        Fractional move m of every mark at once (p -> p * (1 + m)) that
+        liquidates the account, at current tiers; None if no such move.
+        """
+        marks = np.nan_to_num(self.mark)
+        denom = float((marks * (self.DQ - self.QR)).sum())
+        if denom == 0:
+            return None
+        m = (self.total_mm - self.equity) / denom
+        return float(m) if m > -1 else None
+
+    def summary(self):
+        return {
+            "positions": self.n,
+            "equity": float(self.equity),
+            "maintenance_margin": float(self.total_mm),
+            "margin_ratio": float(self.margin_ratio),
+            "account_liq_move": self.account_liquidation_move(),
+        }
+
+
+# If run directly, benchmark ticks on a few hundred positions: incremental
+# update vs recomputing the whole portfolio, plus the liquidation solve.
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(7)
+    n_positions, n_symbols, ticks = 500, 100, 20_000
+    marks = rng.lognormal(3, 2, n_symbols)
+    risk = PortfolioRisk(wallet_balance=1_000_000)
+    for i in range(n_positions):
+        s = i % n_symbols
+        risk.add(f"S{s}USDT", "LONG" if rng.random() < 0.6 else "SHORT",
+                 rng.uniform(1_000, 50_000) / marks[s], marks[s] * rng.uniform(0.98, 1.02), marks[s])
+
+    symbols = rng.integers(0, n_symbols, ticks)
+    moves = np.exp(rng.normal(0, 1e-3, ticks))
+
+    start = time.perf_counter()
+    for s, move in zip(symbols, moves):
+        marks[s] *= move
+        risk.update_price(f"S{s}USDT", marks[s])
+    incremental = (time.perf_counter() - start) / ticks * 1e6
+    incremental_state = (risk.equity, risk.maintenance_margin)
+
+    def full_recompute():
+        n = risk.n
+        p = marks[risk.sym[:n]]
+        q = risk.q[:n]
+        _, rate, ded = risk._tiers(q * p)
+        upnl = risk.dq[:n] * (p - risk.e[:n])
+        return risk.wallet + upnl.sum(), (q * p * rate - ded).sum()
+
+    start = time.perf_counter()
+    for _ in range(2000):
+        full = full_recompute()
+    full_us = (time.perf_counter() - start) / 2000 * 1e6
+
+    start = time.perf_counter()
+    for _ in range(2000):
+        liq = risk.liquidation_prices()
+    liq_us = (time.perf_counter() - start) / 2000 * 1e6
+
+    print(f"{n_positions} positions / {n_symbols} symbols")
+    print(f"  incremental tick:       {incremental:8.1f} us")
+    print(f"  full recompute (numpy): {full_us:8.1f} us")
+    print(f"  liquidation solve, all: {liq_us:8.1f} us")
+    print(f"  drift vs full recompute after {ticks} ticks: equity {incremental_state[0] - full[0]:+.2e}, "
+          f"mm {incremental_state[1] - full[1]:+.2e}")
+    print({k: round(v, 4) if isinstance(v, float) else v for k, v in risk.summary().items()})
+    s0 = risk.symbols[0]
+    print(f"  {s0}: mark {risk.mark[0]:.4f}, account liquidates at {liq[s0]}")
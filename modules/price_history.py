@@ -0,0 +1,142 @@
+# modules/price_history.py
+
+import threading
+import time
+import numpy as np
+
+DEFAULT_CAPACITY = 16384
+
+
+class PriceHistory:
+    """
+    Fixed-capacity ring of (timestamp, price) for one symbol.
+
+    Each sample is written twice, at i and i + capacity, into arrays of
+    2 * capacity. The newest n samples are then always contiguous, so
+    window() returns plain slices (views, no copy) and append() is O(1).
+    Memory is 32 * capacity bytes no matter how long the session runs.
+
+    One thread appends (a scalper worker, say) while another reads: the
+    views from window() can be overwritten under the reader, so a reader
+    on another thread takes snapshot(), which copies under the lock.
+    """
+    __slots__ = ("capacity", "ts", "px", "head", "size", "total", "lock")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.ts = np.zeros(2 * capacity)
+        self.px = np.zeros(2 * capacity)
+        self.head = 0  # next write position in [0, capacity)
+        self.size = 0
+        self.total = 0  # samples ever appended; the oldest kept one is number total - size
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def append(self, price, ts=None):
+        if ts is None:
+            ts = time.time()
+        with self.lock:
+            i = self.head
+            self.ts[i] = self.ts[i + self.capacity] = ts
+            self.px[i] = self.px[i + self.capacity] = price
+            self.head = i + 1 if i + 1 < self.capacity else 0
+            if self.size < self.capacity:
+                self.size += 1
+            self.total += 1
+
+    def window(self, n=None):
+        """
+        Views of the newest n (default: all) timestamps and prices, oldest first.
+        """
+        n = self.size if n is None else min(n, self.size)
+        end = self.head + self.capacity
+        return self.ts[end - n:end], self.px[end - n:end]
+
+    def snapshot(self, n=None):
+        """
+        Copies of the newest n (default: all) timestamps and prices, and
+        'total' at that moment, all taken together; safe while another
+        thread appends.
+        """
+        with self.lock:
+            ts, px = self.window(n)
+            return ts.copy(), px.copy(), self.total
+
+    def since(self, seconds, now=None):
+        """
+        Views of the samples from the last 'seconds' seconds.
+        """
+        ts, px = self.window()
+        if now is None:
+            now = time.time()
+        start = np.searchsorted(ts, now - seconds, side="left")
+        return ts[start:], px[start:]
+
+    def last(self):
+        if not self.size:
+            return None
+        return self.px[self.head + self.capacity - 1]
+
+    def stats(self, n=None):
+        """
+        (min, max, return since the first sample of the window) or None if empty.
+        """
+        with self.lock:
+            _, px = self.window(n)
+            if not len(px):
+                return None
+            return px.min(), px.max(), px[-1] / px[0] - 1 if px[0] else 0.0
+
+
+class PriceHistoryBook:
+    """
+    One PriceHistory per symbol, all with the same capacity.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.histories = {}
+
+    def get(self, symbol):
+        history = self.histories.get(symbol)
+        if history is None:
+            history = PriceHistory(self.capacity)
+            self.histories[symbol] = history
+        return history
+
+    def append(self, symbol, price, ts=None):
+        self.get(symbol).append(price, ts)
+
+
+# Shared by the CLI flows and the UI during one session
+HISTORY = PriceHistoryBook()
+
+
+def format_stats(history, n=None):
+    stats = history.stats(n)
+    if stats is None:
+        return "no history"
+    low, high, ret = stats
+    return f"min={low:.3f} max={high:.3f} ret={ret * 100:+.2f}% over {min(n or len(history), len(history))} ticks"
+
+
+# If run directly, show append / window cost stays flat as the session grows
+if __name__ == "__main__":
+    history = PriceHistory(capacity=100_000)
+    price = 100.0
+    n = 1_000_000
+    start = time.perf_counter()
+    for i in range(n):
+        history.append(price + (i % 100) * 0.01, ts=float(i))
+    elapsed = time.perf_counter() - start
+    print(f"{n} appends: {elapsed / n * 1e9:.0f} ns/append, "
+          f"memory {history.ts.nbytes + history.px.nbytes} bytes")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        history.stats(1000)
+    elapsed = time.perf_counter() - start
+    print(f"stats over 1000 ticks: {elapsed / 10_000 * 1e6:.1f} us/call")
+    ts, px = history.window(5)
+    print(f"window(5) is a view: {px.base is history.px} -> {px}")
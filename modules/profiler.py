@@ -0,0 +1,98 @@
+# modules/profiler.py
+
+import cProfile
+import os
+import pstats
+import time
+import tracemalloc
+
+# Off unless an entry point turns it on (--profile or AUTOBOT_PROFILE=1).
+# When off, run_flow() just calls the flow and nothing else is imported/started.
+ENABLED = False
+PROFILE_DIR = "profiles"
+TOP_N = 15
+
+_current = None  # (flow name, cProfile.Profile, start time)
+
+
+def enable(profile_dir=None, top_n=None):
+    global ENABLED, PROFILE_DIR, TOP_N
+    ENABLED = True
+    if profile_dir:
+        PROFILE_DIR = profile_dir
+    if top_n:
+        TOP_N = top_n
+
+
+def enable_from_env():
+    """
+    Turn profiling on if AUTOBOT_PROFILE is set (any value but '' or '0').
+    AUTOBOT_PROFILE_DIR overrides the output directory.
+    """
+    if os.getenv("AUTOBOT_PROFILE", "") not in ("", "0"):
+        enable(os.getenv("AUTOBOT_PROFILE_DIR"))
+    return ENABLED
+
+
+def start(name):
+    """
+    Start profiling flow 'name'. Finishes any other flow still being
+    profiled; a no-op if 'name' is already the current flow.
+    """
+    global _current
+    if not ENABLED:
+        return
+    if _current is not None:
+        if _current[0] == name:
+            return
+        stop()
+    tracemalloc.start()
+    prof = cProfile.Profile()
+    _current = (name, prof, time.time())
+    prof.enable()
+
+
+def stop():
+    """
+    Stop the current flow, write <flow>_<timestamp>.prof / .tracemalloc
+    files and print the top-N hot functions and allocation sites.
+    """
+    global _current
+    if _current is None:
+        return
+    name, prof, started = _current
+    prof.disable()
+    _current = None
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(started))
+    base = os.path.join(PROFILE_DIR, f"{name}_{stamp}")
+    prof.dump_stats(base + ".prof")
+    snapshot.dump(base + ".tracemalloc")
+
+    print(f"\n=== PROFILE: {name} ({time.time() - started:.1f}s) -> {base}.prof ===")
+    pstats.Stats(prof).sort_stats("cumulative").print_stats(TOP_N)
+
+    print(f"=== TOP {TOP_N} ALLOCATIONS: {name} -> {base}.tracemalloc ===")
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    for stat in snapshot.statistics("lineno")[:TOP_N]:
+        print(f"  {stat}")
+    print()
+
+
+def run_flow(name, fn, *args, **kwargs):
+    """
+    Call fn(*args, **kwargs), profiled as flow 'name' when profiling is on.
+    """
+    if not ENABLED:
+        return fn(*args, **kwargs)
+    start(name)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        stop()
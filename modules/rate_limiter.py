@@ -0,0 +1,54 @@
+# modules/rate_limiter.py
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread talking to one venue.
+    acquire() blocks until a request may be sent; 'rate' is requests per
+    second and 'burst' how many may go out back to back.
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.total = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """
+        Take a token if one is available right now. Never blocks.
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.total += 1
+                return True
+            return False
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.total += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def available(self):
+        """
+        Tokens available right now (may be fractional).
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.tokens
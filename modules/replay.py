@@ -0,0 +1,227 @@
+# modules/replay.py
+
+import atexit
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+FLUSH_EVERY = 50
+
+# "record" / "replay" once install() has run, so live-only features can step aside
+MODE = None
+
+# Pace of the flows' waits (see sleep / wait): 1 live and while recording,
+# the replay speed once replay is installed (0 = no waiting at all)
+SPEED = 1.0
+
+_MISSING = object()
+
+
+def scaled(seconds):
+    """
+    Wall-clock seconds for 'seconds' of session time at the current SPEED.
+    """
+    if seconds is None:
+        return None
+    return seconds / SPEED if SPEED > 0 else 0.0
+
+
+def sleep(seconds):
+    """
+    time.sleep() for the flows' polling waits, so a replay runs the whole
+    session at its speed, not just the recorded latency.
+    """
+    time.sleep(scaled(seconds))
+
+
+def wait(event, seconds):
+    """
+    event.wait(seconds), scaled like sleep(). Returns the event's flag.
+    """
+    return event.wait(scaled(seconds))
+
+
+class ReplayMissError(LookupError):
+    """The replayed session has no (more) responses for this call."""
+
+
+class ReplayedError(Exception):
+    """An exception the live client raised while recording, raised again on replay."""
+
+
+def _call_key(client, method, args, kwargs):
+    return f"{client}.{method}:" + json.dumps([args, kwargs], sort_keys=True, default=str)
+
+
+class Recorder:
+    """
+    Appends one JSON line per client call to a gzip file:
+    {"ts", "dur", "client", "method", "args", "kwargs", "result" | "error"}.
+    Opening in append mode adds a new gzip member, so a file can be
+    recorded into across several sessions and still read as one stream.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, "at", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.pending = 0
+        atexit.register(self.close)
+
+    def write(self, entry):
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(line)
+            self.pending += 1
+            if self.pending >= FLUSH_EVERY:
+                self.file.flush()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class RecordingClient:
+    """
+    Wraps a ccxt exchange or pybit HTTP session; every method call is
+    passed through to the live client and recorded.
+    """
+    def __init__(self, client, name, recorder):
+        self._client = client
+        self._name = name
+        self._recorder = recorder
+
+    def __getattr__(self, attr):
+        value = getattr(self._client, attr)
+        if not callable(value):
+            return value
+
+        def recorded(*args, **kwargs):
+            entry = {"ts": time.time(), "client": self._name, "method": attr,
+                     "args": list(args), "kwargs": kwargs}
+            start = time.perf_counter()
+            try:
+                result = value(*args, **kwargs)
+            except Exception as e:
+                entry["dur"] = time.perf_counter() - start
+                entry["error"] = f"{type(e).__name__}: {e}"
+                self._recorder.write(entry)
+                raise
+            entry["dur"] = time.perf_counter() - start
+            entry["result"] = result
+            self._recorder.write(entry)
+            return result
+
+        return recorded
+
+
+def load_recording(path):
+    """
+    {call key: deque of recorded entries} in recorded order.
+    """
+    calls = defaultdict(deque)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            calls[_call_key(entry["client"], entry["method"], entry["args"], entry["kwargs"])].append(entry)
+    return calls
+
+
+class ReplayClient:
+    """
+    Stands in for a live client. Each call is answered with the next
+    recorded response for the same client/method/arguments, after the
+    recorded latency divided by 'speed' (speed <= 0 answers instantly).
+    Plain (non-callable) attributes come unchanged from 'client', the live
+    client being replaced, when there is one.
+    """
+    def __init__(self, calls, name, speed=1.0, client=None):
+        self._calls = calls
+        self._name = name
+        self._speed = speed
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        value = getattr(self._client, attr, _MISSING)
+        if value is not _MISSING and not callable(value):
+            return value
+
+        def replayed(*args, **kwargs):
+            # Round-trip through JSON so the key matches what was recorded
+            args, kwargs = json.loads(json.dumps([list(args), kwargs], default=str))
+            key = _call_key(self._name, attr, args, kwargs)
+            with self._lock:
+                queue = self._calls.get(key)
+                if not queue:
+                    raise ReplayMissError(f"No recorded response left for {self._name}.{attr}{tuple(args)} {kwargs}")
+                entry = queue.popleft()
+            if self._speed > 0:
+                time.sleep(entry.get("dur", 0.0) / self._speed)
+            if "error" in entry:
+                raise ReplayedError(entry["error"])
+            return entry["result"]
+
+        return replayed
+
+
+def _targets(extra=()):
+    """
+    (module, attribute, client name) for every live exchange client we swap.
+    paper_trader is only patched if it is already imported (importing it
+    installs a SIGINT handler); pass it in 'extra' when it runs as __main__.
+    """
+    from modules import mexc_api, bybit_api
+    targets = [(mexc_api, "exchange", "mexc"), (bybit_api, "exchange", "bybit")]
+    paper_trader = sys.modules.get("modules.paper_trader")
+    if paper_trader is not None:
+        targets.append((paper_trader, "session", "bybit_http"))
+    return targets + list(extra)
+
+
+def install(mode, path, speed=1.0, extra=()):
+    """
+    mode="record": wrap the live clients and record into 'path'.
+    mode="replay": replace them with clients answering from 'path'.
+    """
+    global MODE, SPEED
+    if mode == "record":
+        recorder = Recorder(path)
+        for module, attr, name in _targets(extra):
+            setattr(module, attr, RecordingClient(getattr(module, attr), name, recorder))
+        print(f"[replay] Recording exchange traffic to {path}")
+    elif mode == "replay":
+        calls = load_recording(path)
+        for module, attr, name in _targets(extra):
+            setattr(module, attr, ReplayClient(calls, name, speed, getattr(module, attr)))
+        SPEED = speed
+        print(f"[replay] Replaying {sum(len(q) for q in calls.values())} recorded calls from {path} (speed={speed})")
+    else:
+        raise ValueError(f"mode must be 'record' or 'replay', got {mode!r}")
+    MODE = mode
+
+
+def install_from_env(extra=()):
+    """
+    AUTOBOT_RECORD=<file> records, AUTOBOT_REPLAY=<file> replays
+    (AUTOBOT_REPLAY_SPEED: 1 = recorded pace, 10 = 10x faster, 0 = instant;
+    applies to recorded latency and to the flows' waits alike).
+    """
+    record = os.getenv("AUTOBOT_RECORD")
+    replay = os.getenv("AUTOBOT_REPLAY")
+    if replay:
+        install("replay", replay, float(os.getenv("AUTOBOT_REPLAY_SPEED", "1")), extra)
+    elif record:
+        install("record", record, extra=extra)
@@ -0,0 +1,351 @@
+# modules/resilience.py
+
+import asyncio
+import random
+import threading
+import time
+import ccxt
+import requests
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+from modules.logger import get_logger
+
+log = get_logger("resilience")
+
+# Error kinds
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+NETWORK = "network"          # connection errors, 5xx, venue unavailable / in maintenance
+AUTH = "auth"
+BAD_SYMBOL = "bad_symbol"
+BAD_REQUEST = "bad_request"
+EXCHANGE = "exchange"        # any other rejection (insufficient funds, ...)
+CIRCUIT_OPEN = "circuit_open"
+
+# Kinds that say nothing about our request, only about the venue: these are
+# retried and count against the endpoint's circuit breaker. The rest would
+# fail the same way again and prove the venue is answering.
+TRANSIENT = frozenset((RATE_LIMIT, TIMEOUT, NETWORK))
+
+# Bybit v5 retCodes
+BYBIT_RATE_LIMIT_CODES = {10006, 10018}
+BYBIT_AUTH_CODES = {10003, 10004, 10005, 10007, 10009, 10010, 33004}
+BYBIT_SERVER_CODES = {10000, 10016}
+
+
+class ExchangeError(Exception):
+    """
+    A failed exchange call after retries, classified by 'kind'.
+    'retry_after' (seconds) is a hint for callers that loop: the venue's
+    rate-limit reset, or when the open circuit will let a probe through.
+    """
+    def __init__(self, kind, endpoint, message, retry_after=None):
+        super().__init__(f"{endpoint}: {kind}: {message}")
+        self.kind = kind
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+    @property
+    def transient(self):
+        return self.kind in TRANSIENT or self.kind == CIRCUIT_OPEN
+
+
+class CircuitOpenError(ExchangeError):
+    def __init__(self, endpoint, retry_after):
+        super().__init__(CIRCUIT_OPEN, endpoint, f"failing fast, next probe in {retry_after:.1f}s", retry_after)
+
+
+def _bybit_reset_in(headers):
+    try:
+        return max(0.0, int(headers["X-Bapi-Limit-Reset-Timestamp"]) / 1000 - time.time())
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def classify(exc):
+    """
+    Exception from ccxt / pybit / requests -> (kind, retry_after or None).
+    """
+    if isinstance(exc, ExchangeError):
+        return exc.kind, exc.retry_after
+    # ccxt: most specific classes first (RateLimitExceeded < DDoSProtection < NetworkError)
+    if isinstance(exc, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)):
+        return RATE_LIMIT, None
+    if isinstance(exc, ccxt.RequestTimeout):
+        return TIMEOUT, None
+    if isinstance(exc, ccxt.NetworkError):
+        return NETWORK, None
+    if isinstance(exc, ccxt.AuthenticationError):
+        return AUTH, None
+    if isinstance(exc, ccxt.BadSymbol):
+        return BAD_SYMBOL, None
+    if isinstance(exc, ccxt.BadRequest):
+        return BAD_REQUEST, None
+    if isinstance(exc, ccxt.BaseError):
+        return EXCHANGE, None
+    # pybit: retCode errors and HTTP-level failures
+    if isinstance(exc, InvalidRequestError):
+        code = exc.status_code
+        if code in BYBIT_RATE_LIMIT_CODES:
+            return RATE_LIMIT, _bybit_reset_in(exc.resp_headers)
+        if code in BYBIT_AUTH_CODES:
+            return AUTH, None
+        if code in BYBIT_SERVER_CODES:
+            return NETWORK, None
+        if "symbol" in str(exc.message).lower():
+            return BAD_SYMBOL, None
+        return BAD_REQUEST if code == 10001 else EXCHANGE, None
+    if isinstance(exc, FailedRequestError):
+        code = exc.status_code
+        if code in (403, 429):  # Bybit answers an IP rate-limit breach with 403
+            return RATE_LIMIT, _bybit_reset_in(exc.resp_headers)
+        if code in (401,):
+            return AUTH, None
+        return NETWORK, None  # 5xx, undecodable body, pybit's own retries exhausted
+    if isinstance(exc, (requests.Timeout, TimeoutError)):
+        return TIMEOUT, None
+    if isinstance(exc, (requests.ConnectionError, ConnectionError)):
+        return NETWORK, None
+    if isinstance(exc, PermissionError):  # pybit: private endpoint without keys
+        return AUTH, None
+    return EXCHANGE, None
+
+
+class RetryPolicy:
+    """
+    Up to 'attempts' tries, retrying only kinds in 'retry_on', with full
+    jitter: the n-th wait is uniform in [0, min(max_delay, base_delay * 2^n)),
+    or the venue's rate-limit reset if that is later. Gives up rather than
+    wait past 'deadline' seconds from the first try.
+    """
+    def __init__(self, attempts=3, base_delay=0.2, max_delay=2.0, deadline=5.0, retry_on=TRANSIENT):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = frozenset(retry_on)
+
+    def delay(self, attempt, retry_after=None):
+        wait = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(wait, retry_after or 0.0)
+
+
+# Reads are idempotent: retry anything transient. An order is only resent
+# when the venue rejected it for rate limit (so it was never placed); after a
+# timeout it may have gone through, so it is not retried blindly.
+READ = RetryPolicy()
+ORDER = RetryPolicy(retry_on=(RATE_LIMIT,))
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint breaker. Closed: calls go through; 'failure_threshold'
+    transient failures in a row open it. Open: calls fail at once with
+    CircuitOpenError until 'reset_timeout' has passed, then it is half-open
+    and lets one probe through. A successful probe closes it; a failed one
+    opens it again with the timeout doubled (up to 'max_reset_timeout').
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=5.0, max_reset_timeout=60.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.opened_at = 0.0
+        self.probing = False
+        self.stats = {"calls": 0, "errors": 0, "rejected": 0, "opened": 0}
+
+    def retry_in(self):
+        """
+        Seconds until an open circuit lets a probe through (0 if not open).
+        """
+        with self.lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError if the call must not go out.
+        """
+        with self.lock:
+            if self.state == self.OPEN:
+                wait = self.opened_at + self.reset_timeout - self.clock()
+                if wait > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, wait)
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.HALF_OPEN:
+                if self.probing:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, self.base_reset_timeout)
+                self.probing = True
+            self.stats["calls"] += 1
+
+    def on_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                log.info("✅ Circuit %s closed again", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self.probing = False
+
+    def on_abort(self):
+        """
+        The call was interrupted (cancelled, Ctrl+C) before the venue could
+        answer: says nothing either way, but a half-open circuit must let
+        the next call probe instead of waiting for this one forever.
+        """
+        with self.lock:
+            self.probing = False
+
+    def on_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.stats["errors"] += 1
+            if self.state == self.HALF_OPEN:
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            elif self.failures < self.failure_threshold:
+                return
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self.probing = False
+            self.stats["opened"] += 1
+            log.warning("⚡ Circuit %s open after %d failure(s); failing fast for %.1fs",
+                        self.name, self.failures, self.reset_timeout,
+                        extra={"fields": {"endpoint": self.name, "failures": self.failures,
+                                          "reset_timeout": self.reset_timeout}})
+
+    def metrics(self):
+        with self.lock:
+            return {"state": self.state, "failures": self.failures, "reset_timeout": self.reset_timeout,
+                    **self.stats}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(endpoint):
+    """
+    The shared CircuitBreaker for 'endpoint' (e.g. "bybit.ticker").
+    """
+    found = _breakers.get(endpoint)
+    if found is None:
+        with _breakers_lock:
+            found = _breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+    return found
+
+
+def breaker_metrics():
+    return {name: b.metrics() for name, b in sorted(_breakers.items())}
+
+
+def _after_failure(circuit, endpoint, error, attempt, policy, start):
+    """
+    Book a failed try on the breaker. Returns how long to wait before the
+    next one, or raises the ExchangeError to give up with.
+    """
+    kind, retry_after = classify(error)
+    if kind in TRANSIENT:
+        circuit.on_failure()
+    else:
+        circuit.on_success()  # the venue answered; the request itself was bad
+    if kind not in policy.retry_on or attempt >= policy.attempts:
+        raise ExchangeError(kind, endpoint, error, retry_after or circuit.retry_in() or None) from error
+    wait = policy.delay(attempt, retry_after)
+    if circuit.retry_in() or time.monotonic() - start + wait > policy.deadline:
+        raise ExchangeError(kind, endpoint, error, max(wait, circuit.retry_in())) from error
+    log.warning("↻ %s %s (%s), retry %d/%d in %.2fs", endpoint, kind, error, attempt, policy.attempts - 1, wait)
+    return wait
+
+
+def call(endpoint, fn, *args, policy=READ, sleep=time.sleep, **kwargs):
+    """
+    fn(*args, **kwargs) behind the endpoint's circuit breaker, retried per
+    'policy'. Returns its result or raises ExchangeError (CircuitOpenError
+    without calling fn while the circuit is open).
+    """
+    circuit = breaker(endpoint)
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        circuit.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            sleep(_after_failure(circuit, endpoint, e, attempt, policy, start))
+            continue
+        except BaseException:
+            circuit.on_abort()
+            raise
+        circuit.on_success()
+        return result
+
+
+async def call_async(endpoint, fn, *args, policy=READ, **kwargs):
+    """
+    call() for a coroutine function: same breakers, same policy, waits
+    with asyncio.sleep.
+    """
+    circuit = breaker(endpoint)
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        circuit.before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            await asyncio.sleep(_after_failure(circuit, endpoint, e, attempt, policy, start))
+            continue
+        except BaseException:
+            circuit.on_abort()
+            raise
+        circuit.on_success()
+        return result
+
+
+# If run directly: a venue that goes down for 3 s under a polling loop;
+# count the requests that hang vs. the calls the breaker fails fast.
+if __name__ == "__main__":
+    from modules.logger import setup_logging
+
+    setup_logging(log_dir=False, console=False)
+    outage = (1.0, 4.0)
+    request_sec = 0.5  # a request that hangs until the client timeout
+    _breakers["demo.ticker"] = CircuitBreaker("demo.ticker", failure_threshold=3, reset_timeout=1.0)
+    t0 = time.monotonic()
+    sent = [0]
+
+    def flaky():
+        sent[0] += 1
+        now = time.monotonic() - t0
+        if outage[0] <= now < outage[1]:
+            time.sleep(request_sec)
+            raise requests.Timeout("read timed out")
+        time.sleep(0.01)
+        return 42
+
+    ok = failed = failed_fast = 0
+    while time.monotonic() - t0 < 8:
+        try:
+            call("demo.ticker", flaky, policy=RetryPolicy(attempts=2, base_delay=0.05, max_delay=0.2))
+            ok += 1
+        except CircuitOpenError as e:
+            failed_fast += 1
+            time.sleep(min(e.retry_after, 0.1))
+        except ExchangeError:
+            failed += 1
+    print(f"8 s loop, venue down from {outage[0]:.0f}s to {outage[1]:.0f}s ({request_sec}s timeouts): "
+          f"{ok} ok, {failed} failed after {sent[0] - ok} doomed request(s), {failed_fast} failed fast")
+    print(f"breaker: {breaker_metrics()['demo.ticker']}")
@@ -1,38 +1,225 @@
 # modules/scalper.py
 
 import time
-from modules.mexc_api import fetch_current_price
-from modules.calculations import calc_profit, calc_liquidation
+import queue
+import threading
+from modules import replay
+from modules.mexc_api import fetch_current_price, fetch_price
+from modules.accrual import DEFAULT_FUNDING_RATE, TAKER_FEE, funding_times
+from modules.calculations import calc_profit, calc_costs, calc_liquidation
+from modules.trigger_index import TriggerIndex, add_position_triggers, LIQUIDATION
+from modules.adaptive_poller import AdaptivePoller
+from modules.latency import TRACER
+from modules.logger import get_logger, prompt
+from modules.resilience import ExchangeError
+from modules.price_history import HISTORY, format_stats
+
+log = get_logger("scalper")
+
+# Sleep after a failed fetch (unless the error says when to try again)
+RETRY_SEC = 5
+
+
+class ScalperEngine:
+    """
+    The scalping loop, usable in the foreground (start_scalping) or on a
+    background thread (start/stop, used by the GUI).
+
+    Every tick produces a state dict (price, move, PnL, distance to
+    liquidation, status) that goes to 'on_state' and/or a bounded queue.
+    When the queue is full the oldest state is dropped, so a slow consumer
+    only ever sees the latest ticks. All waits use an Event, so stop()
+    takes effect immediately.
+
+    If entry_price is None, the first fetched price becomes the entry.
+    PnL is reported gross and net of taker fees on both legs ('fee_rate')
+    and funding at 'funding_rate' for each settlement since the first tick.
+    'fetch' returns a price or None, or raises ExchangeError: transient
+    errors wait for the error's retry_after (an open circuit fails fast and
+    says when its probe is due), others (bad symbol, auth) end the loop
+    with status "failed".
+    """
+    def __init__(self, symbol, position_type, capital, leverage, target_fraction, entry_price=None,
+                 on_state=None, queue_size=0, fetch=None, fee_rate=TAKER_FEE, funding_rate=DEFAULT_FUNDING_RATE):
+        self.symbol = symbol
+        self.position_type = position_type.upper()
+        self.capital = capital
+        self.leverage = leverage
+        self.target_fraction = target_fraction
+        self.entry_price = entry_price
+        self.fee_rate = fee_rate
+        self.funding_rate = funding_rate
+        self.opened_at = None
+        self.on_state = on_state
+        self.states = queue.Queue(maxsize=queue_size) if queue_size else None
+        self.fetch = fetch or fetch_price
+        self.stopped = threading.Event()
+        self.thread = None
+        self.history = HISTORY.get(symbol)
+        self.ticks = 0
+        self.dropped = 0
+
+    def emit(self, state):
+        if self.on_state is not None:
+            self.on_state(state)
+        if self.states is not None:
+            while True:
+                try:
+                    self.states.put_nowait(state)
+                    return
+                except queue.Full:
+                    try:
+                        self.states.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def state(self, status, price=None, fraction=None, error=None, retry_in=None):
+        state = {"ts": time.time(), "symbol": self.symbol, "status": status, "price": price,
+                 "entry": self.entry_price, "target": self.target_fraction, "move": fraction,
+                 "pnl": None, "fees": None, "funding": None, "net_pnl": None, "liq": None, "liq_distance": None,
+                 "error": error, "retry_in": retry_in}
+        if price is not None and self.entry_price:
+            liq = calc_liquidation(self.entry_price, self.leverage, self.position_type)
+            settlements = len(funding_times(self.opened_at, state["ts"])) if self.opened_at else 0
+            fees, funding = calc_costs(self.entry_price, price, self.leverage, self.capital, self.position_type,
+                                       self.funding_rate, settlements, self.fee_rate, self.fee_rate)
+            state["pnl"] = calc_profit(self.entry_price, price, self.leverage, self.capital, self.position_type)
+            state["fees"] = fees
+            state["funding"] = funding
+            state["net_pnl"] = state["pnl"] - fees - funding
+            state["liq"] = liq
+            state["liq_distance"] = abs(price - liq) / price
+        return state
+
+    def run(self):
+        """
+        The loop. Ends with a "stopped", "target", "liquidation" or "failed"
+        state; anything unexpected (a bad parameter, a bug) is logged and
+        reported as "failed" too, so a consumer is never left waiting.
+        """
+        try:
+            self._loop()
+        except Exception as e:
+            log.exception("Scalper for %s crashed", self.symbol)
+            self.emit(self.state("failed", error=f"{type(e).__name__}: {e}"))
+        finally:
+            self.stopped.set()
+
+    def _loop(self):
+        triggers = TriggerIndex()
+        poller = None
+
+        while not self.stopped.is_set():
+            # Traced per tick: fetch -> tick (price in) -> decision (triggers checked) -> emit
+            trace = TRACER.begin("scalper", "fetch", symbol=self.symbol)
+            try:
+                current_price = self.fetch(self.symbol)
+            except ExchangeError as e:
+                if not e.transient:
+                    self.emit(self.state("failed", error=str(e)))
+                    return
+                wait = e.retry_after if e.retry_after is not None else RETRY_SEC
+                self.emit(self.state("error", error=str(e), retry_in=wait))
+                replay.wait(self.stopped, wait)
+                continue
+            trace.mark("tick")
+            if self.stopped.is_set():
+                break
+            if current_price is None:
+                self.emit(self.state("error", retry_in=RETRY_SEC))
+                replay.wait(self.stopped, RETRY_SEC)
+                continue
+
+            if poller is None:
+                self.opened_at = time.time()
+                if self.entry_price is None:
+                    self.entry_price = current_price
+                add_position_triggers(triggers, self.symbol, self.position_type, self.entry_price, self.leverage,
+                                      target_fraction=self.target_fraction)
+                poller = AdaptivePoller(levels=[info[5] for info in triggers.triggers.values()])
+
+            if self.position_type == "LONG":
+                fraction = (current_price - self.entry_price) / self.entry_price
+            else:  # SHORT
+                fraction = (self.entry_price - current_price) / self.entry_price
+
+            self.history.append(current_price)
+            self.ticks += 1
+            fired = triggers.update(self.symbol, current_price)
+            trace.mark("decision")
+            if fired:
+                # exit
+                status = "liquidation" if any(kind == LIQUIDATION for _, kind, _, _ in fired) else "target"
+                self.emit(self.state(status, current_price, fraction))
+                trace.end("emit")
+                return
+
+            self.emit(self.state("running", current_price, fraction))
+            trace.end("emit")
+            poller.observe(current_price)
+            replay.wait(self.stopped, poller.next_interval(current_price))
+
+        self.emit(self.state("stopped"))
+
+    def start(self):
+        """
+        Run on a daemon thread. Returns immediately.
+        """
+        self.thread = threading.Thread(target=self.run, name=f"scalper-{self.symbol}", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Signal the loop to end. With a timeout, also wait that long for the thread.
+        """
+        self.stopped.set()
+        if timeout is not None and self.thread is not None:
+            self.thread.join(timeout)
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+
+def _log_state(state):
+    if state["status"] == "error":
+        log.warning("Failed to fetch current price (%s). Retrying in %.1fs.", state["error"] or "no price",
+                    state["retry_in"])
+        return
+    if state["status"] == "failed":
+        log.error("Scalper stopped: %s", state["error"])
+        return
+    if state["price"] is None:
+        return
+    log.info("%s=%.3f, move=%.2f%% (target=%.2f%%)", state["symbol"], state["price"], state["move"] * 100,
+             state["target"] * 100,
+             extra={"fields": {"symbol": state["symbol"], "price": state["price"], "move": state["move"]}})
+    if state["status"] == "liquidation":
+        log.warning("\nLiquidation level crossed! Profit=%.2f USDT (net %.2f after %.2f fees, %+.2f funding), "
+                    "Liquidation=%.3f USDT\n", state["pnl"], state["net_pnl"], state["fees"], state["funding"],
+                    state["liq"])
+    elif state["status"] == "target":
+        log.info("\nTarget reached! Profit=%.2f USDT (net %.2f after %.2f fees, %+.2f funding), "
+                 "Liquidation=%.3f USDT\n", state["pnl"], state["net_pnl"], state["fees"], state["funding"],
+                 state["liq"])
+
 
 def start_scalping(symbol: str, position_type: str, capital: float, leverage: float, target_fraction: float, entry_price: float):
     """
-    A basic example: fetch current price every 5s, compare with 'entry_price'.
+    A basic example: fetch current price, compare with 'entry_price'.
     If price moves >= target_fraction from entry, we exit.
+    Exit levels (target + liquidation) live in a TriggerIndex, so each tick
+    only touches the levels it crossed. The delay between fetches comes from
+    an AdaptivePoller: short near an exit level or in a volatility spike,
+    long when far away, and never beyond the MEXC rate budget.
     """
-    print(f"Scalper started for {symbol}, pos={position_type}, entry={entry_price:.3f}, target={target_fraction:.4f}\n")
-
-    while True:
-        current_price = fetch_current_price(symbol)
-        if current_price is None:
-            print("Failed to fetch current price. Sleeping 5s.")
-            time.sleep(5)
-            continue
-
-        if position_type.upper() == "LONG":
-            fraction = (current_price - entry_price) / entry_price
-        else:  # SHORT
-            fraction = (entry_price - current_price) / entry_price
-
-        print(f"{symbol}={current_price:.3f}, move={fraction*100:.2f}% (target={target_fraction*100:.2f}%)")
-
-        if fraction >= target_fraction:
-            # exit
-            profit = calc_profit(entry_price, current_price, leverage, capital, position_type)
-            liq = calc_liquidation(entry_price, leverage, position_type)
-            print(f"\nTarget reached! Profit={profit:.2f} USDT, Liquidation={liq:.3f} USDT\n")
-            break
+    log.info("Scalper started for %s, pos=%s, entry=%.3f, target=%.4f\n", symbol, position_type, entry_price, target_fraction)
 
-        time.sleep(5)
+    engine = ScalperEngine(symbol, position_type, capital, leverage, target_fraction, entry_price,
+                           on_state=_log_state)
+    engine.run()
+    log.info("Session: %s", format_stats(engine.history, engine.ticks))
+    log.info("Latency:\n%s", TRACER.format_summary("scalper"), extra={"fields": {"latency": TRACER.summary("scalper")}})
 
 def run_scalper_flow():
     """
@@ -51,7 +238,7 @@ def run_scalper_flow():
         print("WARNING: Failed to fetch BTC price.")
 
     # Coin
-    coin = input("Coin ticker (e.g. SOL) or 'menu': ").strip().upper()
+    coin = prompt("Coin ticker (e.g. SOL) or 'menu': ").strip().upper()
     if coin.lower() == "menu":
         print("Returning.\n")
         return
@@ -65,10 +252,10 @@ def run_scalper_flow():
     else:
         print(f"{symbol_pair}: {coin_price:.3f} USDT")
 
-    override = input("Press ENTER to accept or 'override' to change entry: ").strip().lower()
+    override = prompt("Press ENTER to accept or 'override' to change entry: ").strip().lower()
     if override == "override":
         while True:
-            val = input("Custom entry or 'menu': ").strip()
+            val = prompt("Custom entry or 'menu': ").strip()
             if val.lower() == "menu":
                 print("Returning.\n")
                 return
@@ -82,7 +269,7 @@ def run_scalper_flow():
 
     # Ask position
     while True:
-        pos = input("Position (LONG/SHORT) or 'menu': ").strip().upper()
+        pos = prompt("Position (LONG/SHORT) or 'menu': ").strip().upper()
         if pos.lower() == "menu":
             print("Returning.\n")
             return
@@ -92,7 +279,7 @@ def run_scalper_flow():
 
     # Ask capital
     while True:
-        val = input("Capital (USDT) or 'menu': ").strip()
+        val = prompt("Capital (USDT) or 'menu': ").strip()
         if val.lower() == "menu":
             print("Returning.\n")
             return
@@ -104,7 +291,7 @@ def run_scalper_flow():
 
     # Ask leverage
     while True:
-        val = input("Leverage or 'menu': ").strip()
+        val = prompt("Leverage or 'menu': ").strip()
         if val.lower() == "menu":
             print("Returning.\n")
             return
@@ -116,7 +303,7 @@ def run_scalper_flow():
 
     # Ask fraction
     while True:
-        val = input("Target fraction (e.g. 0.001) or 'menu': ").strip()
+        val = prompt("Target fraction (e.g. 0.001) or 'menu': ").strip()
         if val.lower() == "menu":
             print("Returning.\n")
             return
@@ -0,0 +1,370 @@
+# modules/sizing.py
+
+import gzip
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from modules.accrual import TAKER_FEE
+
+# The live policy (suggest_leverage_and_capital)
+START_LEVERAGE = 3
+LEVERAGE_STEP = 1
+CAPITAL_STEP = 50
+MIN_CAPITAL = 100
+
+PERCENTILES = (5, 25, 50, 75, 95)
+CURVE_POINTS = 50    # equity-curve checkpoints kept per path
+CHUNK_PATHS = 2_000  # paths per worker task
+
+
+def step_sizing(last_pnl, last_leverage, base_capital, max_leverage, available, start_leverage=START_LEVERAGE,
+                step=LEVERAGE_STEP, capital_step=CAPITAL_STEP, min_capital=MIN_CAPITAL):
+    """
+    The paper trader's sizing rule, on scalars or arrays: start at
+    'start_leverage' and the base capital (capped by the available
+    balance); after a win raise leverage by 'step' and capital by
+    'capital_step', after a loss lower both (leverage >= 1, capital >=
+    'min_capital'). 'last_pnl' is NaN when there is no previous trade.
+    Returns (leverage, capital).
+    """
+    capital = np.minimum(base_capital, available)
+    first = np.isnan(last_pnl)
+    win = last_pnl > 0
+    leverage = np.where(first, np.minimum(start_leverage, max_leverage),
+                        np.where(win, np.minimum(last_leverage + step, max_leverage),
+                                 np.maximum(last_leverage - step, 1)))
+    capital = np.where(first, capital,
+                       np.where(win, np.minimum(capital + capital_step, available),
+                                np.maximum(min_capital, np.minimum(capital - capital_step, available))))
+    return leverage, capital
+
+
+# ---------------- policies ----------------
+# A policy sizes every simulated path at once: reset(n) before the first
+# trade, size(equity) -> (leverage, capital) arrays, update(traded, pnl,
+# capital, leverage) after each trade ('traded' masks the paths that took it).
+# Capital is the margin; the position's notional is capital * leverage.
+
+class StepPolicy:
+    """
+    suggest_leverage_and_capital, via step_sizing(). The live bot's
+    capital is the total position size (place_trade buys capital / price),
+    so it is handed to the simulator as margin capital / leverage.
+    """
+    def __init__(self, base_capital=500, max_leverage=20):
+        self.name = "step"
+        self.base_capital = base_capital
+        self.max_leverage = max_leverage
+
+    def reset(self, n):
+        self.last_pnl = np.full(n, np.nan)
+        self.last_leverage = np.zeros(n)
+
+    def size(self, equity):
+        leverage, notional = step_sizing(self.last_pnl, self.last_leverage, self.base_capital, self.max_leverage,
+                                         equity)
+        return leverage, notional / leverage
+
+    def update(self, traded, pnl, capital, leverage):
+        self.last_pnl[traded] = pnl[traded]
+        self.last_leverage[traded] = leverage[traded]
+
+
+class FixedFractionPolicy:
+    """
+    A fixed fraction of equity at a fixed leverage.
+    """
+    def __init__(self, fraction=0.1, leverage=START_LEVERAGE):
+        self.name = f"fixed {fraction:g}"
+        self.fraction = fraction
+        self.leverage = leverage
+
+    def reset(self, n):
+        self.n = n
+
+    def size(self, equity):
+        return np.full(self.n, float(self.leverage)), self.fraction * equity
+
+    def update(self, traded, pnl, capital, leverage):
+        pass
+
+
+class KellyPolicy:
+    """
+    Fractional Kelly at a fixed leverage, from each path's own record:
+    with win rate p, mean win W and mean loss L as fractions of the
+    margin, f = p / L - (1 - p) / W, scaled by 'scale' and capped at
+    'max_fraction'. Uses 'fraction' until 'warmup' trades are in; a path
+    whose record then shows no edge (f <= 0) stops trading for good.
+    """
+    def __init__(self, scale=0.5, leverage=START_LEVERAGE, max_fraction=0.25, warmup=20, fraction=0.05):
+        self.name = f"kelly x{scale:g}"
+        self.scale = scale
+        self.leverage = leverage
+        self.max_fraction = max_fraction
+        self.warmup = warmup
+        self.fraction = fraction
+
+    def reset(self, n):
+        self.n = n
+        self.trades = np.zeros(n)
+        self.wins = np.zeros(n)
+        self.win_sum = np.zeros(n)
+        self.loss_sum = np.zeros(n)
+
+    def size(self, equity):
+        p = self.wins / np.maximum(self.trades, 1)
+        mean_win = self.win_sum / np.maximum(self.wins, 1)
+        mean_loss = self.loss_sum / np.maximum(self.trades - self.wins, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kelly = np.where((mean_win > 0) & (mean_loss > 0), p / mean_loss - (1 - p) / mean_win, 0.0)
+        kelly = np.clip(kelly * self.scale, 0.0, self.max_fraction)
+        fraction = np.where(self.trades < self.warmup, self.fraction, kelly)
+        return np.full(self.n, float(self.leverage)), fraction * equity
+
+    def update(self, traded, pnl, capital, leverage):
+        ret = np.where(traded, pnl / np.where(capital > 0, capital, 1.0), 0.0)
+        self.trades += traded
+        won = traded & (ret > 0)
+        self.wins += won
+        self.win_sum += np.where(won, ret, 0.0)
+        self.loss_sum += np.where(traded & ~won, -ret, 0.0)
+
+
+POLICIES = {"step": StepPolicy, "fixed": FixedFractionPolicy, "kelly": KellyPolicy}
+
+
+# ---------------- trade sources ----------------
+# sample(rng, n) -> (return, worst excursion) of n long trades, as fractions of the entry price.
+
+class SyntheticTrades:
+    """
+    Each trade holds a Brownian price move with mean 'mu' and standard
+    deviation 'sigma' over the hold. Its worst excursion is drawn from
+    the exact distribution of a Brownian bridge's minimum given the end
+    point, so liquidation inside the hold is modeled without paths.
+    """
+    def __init__(self, mu=0.0005, sigma=0.005):
+        self.mu = mu
+        self.sigma = sigma
+
+    def sample(self, rng, n):
+        ret = rng.normal(self.mu, self.sigma, n)
+        worst = (ret - np.sqrt(ret * ret - 2 * self.sigma ** 2 * np.log(rng.random(n)))) / 2
+        return ret, worst
+
+
+class ReplayedTrades:
+    """
+    Trades drawn from a recorded price series: each one enters at a random
+    tick and exits 'hold' ticks later, its worst excursion being the
+    lowest price in between.
+    """
+    def __init__(self, prices, hold=60):
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) <= hold:
+            raise ValueError(f"Need more than {hold} prices, got {len(prices)}")
+        windows = np.lib.stride_tricks.sliding_window_view(prices, hold + 1)
+        self.returns = windows[:, -1] / windows[:, 0] - 1
+        self.worst = windows.min(axis=1) / windows[:, 0] - 1
+
+    def sample(self, rng, n):
+        i = rng.integers(0, len(self.returns), n)
+        return self.returns[i], self.worst[i]
+
+
+def load_prices(path, symbol=None):
+    """
+    Last prices, oldest first, from a replay recording (.gz, see
+    modules.replay: fetch_ticker / get_tickers calls) or from a text / CSV
+    file with the price in the last column. A recording of several
+    symbols needs 'symbol'; returns across instruments are meaningless.
+    """
+    if not path.endswith(".gz"):
+        prices = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    prices.append(float(line.rsplit(",", 1)[-1]))
+                except ValueError:
+                    pass  # header / blank
+        return np.array([p for p in prices if p], dtype=np.float64)
+
+    series = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line) if line.strip() else {}
+            result = entry.get("result")
+            if not result:
+                continue
+            if entry["method"] == "fetch_ticker" and entry["args"]:
+                series.setdefault(entry["args"][0], []).append(result["last"])
+            elif entry["method"] == "get_tickers":
+                for row in result["result"]["list"]:
+                    series.setdefault(row["symbol"], []).append(float(row["lastPrice"]))
+    if symbol is None:
+        if len(series) > 1:
+            raise ValueError(f"{path} records {len(series)} symbols ({', '.join(sorted(series))}); pick one")
+        symbol = next(iter(series), None)
+    return np.array([p for p in series.get(symbol, []) if p], dtype=np.float64)
+
+
+# ---------------- simulation ----------------
+
+def simulate_paths(policy, source, paths, trades, seed, equity=1000.0, ruin_equity=MIN_CAPITAL,
+                   fee_rate=TAKER_FEE, max_leverage=125):
+    """
+    Run 'policy' over 'trades' consecutive trades on 'paths' paths at once.
+    Each trade: PnL = capital * leverage * return, or -capital if the worst
+    excursion reaches the liquidation distance 1 / leverage, minus taker
+    fees on both legs of the notional (as calc_net_profit). A path is ruined once its equity drops below
+    'ruin_equity' and stops trading.
+    """
+    rng = np.random.default_rng(seed)
+    policy.reset(paths)
+    equity = np.full(paths, float(equity))
+    peak = equity.copy()
+    drawdown = np.zeros(paths)
+    alive = np.ones(paths, dtype=bool)
+    ruined_at = np.full(paths, -1)
+    checkpoints = set(np.linspace(0, trades - 1, min(CURVE_POINTS, trades)).astype(int).tolist())
+    curve = []
+    leverage_counts = np.zeros(max_leverage + 1, dtype=np.int64)
+    taken = 0
+
+    for t in range(trades):
+        leverage, capital = policy.size(equity)
+        leverage = np.clip(leverage, 1, max_leverage)
+        capital = np.minimum(capital, equity)
+        traded = alive & (capital > 0)
+        ret, worst = source.sample(rng, paths)
+        liquidated = worst <= -1 / leverage
+        pnl = np.where(liquidated, -capital, capital * leverage * ret) - capital * leverage * fee_rate * (2 + ret)
+        pnl = np.where(traded, pnl, 0.0)
+        equity += pnl
+        policy.update(traded, pnl, capital, leverage)
+
+        leverage_counts += np.bincount(leverage[traded].astype(np.intp), minlength=max_leverage + 1)
+        taken += int(traded.sum())
+        np.maximum(peak, equity, out=peak)
+        np.maximum(drawdown, 1 - equity / peak, out=drawdown)
+        ruined = alive & (equity < ruin_equity)
+        ruined_at[ruined] = t
+        alive &= ~ruined
+        if t in checkpoints:
+            curve.append(equity.copy())
+
+    return {"final": equity, "ruined_at": ruined_at, "drawdown": drawdown, "curve": np.stack(curve, axis=1),
+            "checkpoints": np.array(sorted(checkpoints)), "leverage_counts": leverage_counts, "trades_taken": taken}
+
+
+def _run_chunk(job):
+    policy, source, paths, trades, seed, kwargs = job
+    return simulate_paths(policy, source, paths, trades, seed, **kwargs)
+
+
+def run_simulation(policy, source, paths=10_000, trades=1_000, seed=None, workers=None, chunk=CHUNK_PATHS,
+                   **kwargs):
+    """
+    simulate_paths over 'paths' paths split into chunks of 'chunk', run
+    on 'workers' processes (default: one per core; 1 runs inline). Each
+    chunk gets its own seed spawned from 'seed', so results do not depend
+    on the number of workers. Returns the report from summarize().
+    """
+    sizes = [min(chunk, paths - start) for start in range(0, paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(policy, source, n, trades, s, kwargs) for n, s in zip(sizes, seeds)]
+    if workers == 1 or len(jobs) == 1:
+        parts = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+    return summarize(policy.name, parts, kwargs.get("equity", 1000.0))
+
+
+def summarize(name, parts, start_equity):
+    """
+    Merge chunk results into {"policy", "paths", "p_ruin", "median_ruin_trade",
+    "final_percentiles", "drawdown_percentiles", "curve": {"trade", p: equity},
+    "leverage": {leverage: share of trades}, "mean_trades"}.
+    """
+    final = np.concatenate([p["final"] for p in parts])
+    ruined_at = np.concatenate([p["ruined_at"] for p in parts])
+    drawdown = np.concatenate([p["drawdown"] for p in parts])
+    curve = np.concatenate([p["curve"] for p in parts])
+    counts = sum(p["leverage_counts"] for p in parts)
+    ruined = ruined_at >= 0
+    total = counts.sum()
+    return {
+        "policy": name,
+        "paths": len(final),
+        "start_equity": start_equity,
+        "p_ruin": float(ruined.mean()),
+        "median_ruin_trade": float(np.median(ruined_at[ruined])) if ruined.any() else None,
+        "final_percentiles": dict(zip(PERCENTILES, np.percentile(final, PERCENTILES).tolist())),
+        "drawdown_percentiles": dict(zip(PERCENTILES, np.percentile(drawdown, PERCENTILES).tolist())),
+        "curve": {"trade": parts[0]["checkpoints"].tolist(),
+                  **{p: v.tolist() for p, v in zip(PERCENTILES, np.percentile(curve, PERCENTILES, axis=0))}},
+        "leverage": {k: int(n) / total for k, n in enumerate(counts) if n} if total else {},
+        "mean_trades": sum(p["trades_taken"] for p in parts) / len(final),
+    }
+
+
+def print_report(reports):
+    print(f"{'Policy':<14}{'P(ruin)':>9}{'Trades':>9}" + "".join(f"{'eq p' + str(p):>11}" for p in PERCENTILES)
+          + f"{'DD p50':>9}{'DD p95':>9}")
+    for r in reports:
+        print(f"{r['policy']:<14}{r['p_ruin'] * 100:>8.2f}%{r['mean_trades']:>9.0f}"
+              + "".join(f"{v:>11.2f}" for v in r["final_percentiles"].values())
+              + f"{r['drawdown_percentiles'][50] * 100:>8.1f}%{r['drawdown_percentiles'][95] * 100:>8.1f}%")
+    for r in reports:
+        top = sorted(r["leverage"].items(), key=lambda kv: -kv[1])[:6]
+        print(f"{r['policy']:<14}leverage: " + ", ".join(f"{k}x {share * 100:.1f}%" for k, share in top))
+    for r in reports:
+        curve = r["curve"]
+        picks = np.linspace(0, len(curve["trade"]) - 1, min(6, len(curve["trade"]))).astype(int)
+        print(f"{r['policy']:<14}median equity: " + ", ".join(f"#{curve['trade'][i] + 1} {curve[50][i]:.0f}"
+                                                               for i in picks))
+
+
+# If run directly: compare the policies (python -m modules.sizing --help)
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    parser = argparse.ArgumentParser(description="Simulate position-sizing policies offline")
+    parser.add_argument("--policies", default="step,fixed,kelly", help=f"comma-separated subset of {tuple(POLICIES)}")
+    parser.add_argument("--paths", type=int, default=10_000, help="simulated accounts (seeds) per policy")
+    parser.add_argument("--trades", type=int, default=1_000, help="trades per path")
+    parser.add_argument("--equity", type=float, default=1000.0, help="starting equity (USDT)")
+    parser.add_argument("--workers", type=int, help="processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--prices", metavar="FILE", help="replay recording (.gz) or price file; default synthetic")
+    parser.add_argument("--symbol", help="symbol to take from a replay recording")
+    parser.add_argument("--hold", type=int, default=60, help="ticks per trade with --prices")
+    parser.add_argument("--mu", type=float, default=0.0005, help="synthetic mean return per trade")
+    parser.add_argument("--sigma", type=float, default=0.005, help="synthetic return stdev per trade")
+    args = parser.parse_args()
+
+    if args.prices:
+        try:
+            prices = load_prices(args.prices, args.symbol)
+        except ValueError as e:
+            parser.error(f"{e} with --symbol")
+        source = ReplayedTrades(prices, args.hold)
+        print(f"{len(prices)} prices from {args.prices}, {args.hold}-tick trades")
+    else:
+        source = SyntheticTrades(args.mu, args.sigma)
+        print(f"synthetic trades: mean {args.mu * 100:.3f}%, stdev {args.sigma * 100:.3f}% per trade")
+    workers = args.workers or os.cpu_count()
+    reports = []
+    for name in args.policies.split(","):
+        started = time.perf_counter()
+        reports.append(run_simulation(POLICIES[name.strip()](), source, args.paths, args.trades, args.seed,
+                                      workers, equity=args.equity))
+        elapsed = time.perf_counter() - started
+        print(f"{name}: {args.paths:,} paths x {args.trades:,} trades in {elapsed:.2f}s "
+              f"({args.paths * args.trades / elapsed / 1e6:.1f}M trades/s, {workers} workers)")
+    print()
+    print_report(reports)
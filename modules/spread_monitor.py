@@ -0,0 +1,273 @@
+# modules/spread_monitor.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from modules import replay
+from modules.logger import get_logger, prompt
+from modules.rate_limiter import RateLimiter
+
+log = get_logger("spread_monitor")
+
+# Taker fees paid on each leg (MEXC spot, Bybit spot; Bybit linear is 0.055%)
+MEXC_TAKER_FEE = 0.0005
+BYBIT_TAKER_FEE = 0.001
+
+# Bybit public endpoints are limited per IP; keep bulk ticker pulls well under it
+BYBIT_REQUESTS_PER_SEC = 10
+bybit_limiter = RateLimiter(rate=BYBIT_REQUESTS_PER_SEC)
+
+
+def normalize_symbols(symbols):
+    """
+    'BTC/USDT', 'btc_usdt', 'BTC/USDT:USDT' -> 'BTCUSDT' (vectorized over a list).
+    """
+    s = np.char.upper(np.array(symbols, dtype=str))
+    s = np.char.partition(s, ":")[:, 0]
+    for sep in ("/", "_", "-"):
+        s = np.char.replace(s, sep, "")
+    return s
+
+
+def _floats(values):
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Some venues send "" for an empty side of the book
+        return np.array([float(v) if v not in ("", None) else np.nan for v in values])
+
+
+def _book(rows, sym, bid, ask, last):
+    """
+    Raw ticker rows -> (symbols, bid, ask, last) arrays, USDT pairs only.
+    """
+    symbols = normalize_symbols([r[sym] for r in rows]) if rows else np.empty(0, dtype=str)
+    keep = np.char.endswith(symbols, "USDT")
+    columns = [_floats([r.get(key) for r in rows]) if rows else np.empty(0) for key in (bid, ask, last)]
+    return (symbols[keep], *(c[keep] for c in columns))
+
+
+def fetch_mexc_book():
+    """
+    Every MEXC spot ticker in one raw request (no ccxt parsing / market load).
+    """
+    from modules import mexc_api
+    mexc_api.increment_usage()
+    rows = mexc_api.exchange.spotPublicGetTicker24hr()
+    return _book(rows, "symbol", "bidPrice", "askPrice", "lastPrice")
+
+
+def fetch_bybit_book(category="spot"):
+    """
+    Every Bybit ticker of 'category' ("spot" or "linear") in one raw request.
+    """
+    from modules import bybit_api
+    bybit_limiter.acquire()
+    rows = bybit_api.exchange.publicGetV5MarketTickers({"category": category})["result"]["list"]
+    return _book(rows, "symbol", "bid1Price", "ask1Price", "lastPrice")
+
+
+class SpreadMonitor:
+    """
+    MEXC vs Bybit spreads over every pair both venues list.
+
+    Both bulk books are pulled concurrently; the common universe is found
+    with one np.intersect1d and cached until either listing changes, so a
+    refresh is a handful of array ops whatever the pair count. For each
+    pair the two executable directions are
+        buy MEXC ask, sell Bybit bid   and   buy Bybit ask, sell MEXC bid
+    in bps net of both taker fees, plus the raw last-price spread. A pair
+    alerts once when its best net edge crosses 'threshold_bps' and again
+    only after it has dropped back below.
+    """
+    def __init__(self, threshold_bps=10.0, mexc_fee=MEXC_TAKER_FEE, bybit_fee=BYBIT_TAKER_FEE,
+                 bybit_category="spot", fetchers=None):
+        self.threshold_bps = threshold_bps
+        self.cost_bps = (mexc_fee + bybit_fee) * 1e4
+        self.fetchers = fetchers or (fetch_mexc_book, lambda: fetch_bybit_book(bybit_category))
+        self.pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="spread")
+        self.listed = (np.empty(0, dtype=str), np.empty(0, dtype=str))
+        self.symbols = np.empty(0, dtype=str)
+        self.ia = self.ib = np.empty(0, dtype=np.intp)
+        self.alerting = np.zeros(0, dtype=bool)
+        self.mexc_bid = self.mexc_ask = self.bybit_bid = self.bybit_ask = np.empty(0)
+        self.buy_mexc = self.buy_bybit = self.net = self.last_bps = np.empty(0)
+        self.refreshes = 0
+
+    def refresh(self):
+        """
+        Pull both books and recompute. Returns the rows that started alerting.
+        """
+        futures = [self.pool.submit(fetch) for fetch in self.fetchers]
+        mexc, bybit = (f.result() for f in futures)
+        return self.load(mexc, bybit)
+
+    def _align(self, sa, sb):
+        if np.array_equal(sa, self.listed[0]) and np.array_equal(sb, self.listed[1]):
+            return
+        symbols, ia, ib = np.intersect1d(sa, sb, return_indices=True)
+        # Keep alert state for pairs that are still listed
+        self.alerting = np.isin(symbols, self.symbols[self.alerting])
+        self.listed = (sa, sb)
+        self.symbols, self.ia, self.ib = symbols, ia, ib
+
+    def load(self, mexc, bybit):
+        """
+        Load two (symbols, bid, ask, last) books. Returns newly alerting rows.
+        """
+        sa, bid_a, ask_a, last_a = mexc
+        sb, bid_b, ask_b, last_b = bybit
+        self._align(sa, sb)
+        ia, ib = self.ia, self.ib
+        self.mexc_bid, self.mexc_ask = bid_a[ia], ask_a[ia]
+        self.bybit_bid, self.bybit_ask = bid_b[ib], ask_b[ib]
+        la, lb = last_a[ia], last_b[ib]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.buy_mexc = (self.bybit_bid - self.mexc_ask) / self.mexc_ask * 1e4 - self.cost_bps
+            self.buy_bybit = (self.mexc_bid - self.bybit_ask) / self.bybit_ask * 1e4 - self.cost_bps
+            self.last_bps = (lb - la) / ((la + lb) / 2) * 1e4
+        self.net = np.fmax(self.buy_mexc, self.buy_bybit)
+
+        hot = np.nan_to_num(self.net, nan=-np.inf) > self.threshold_bps
+        fresh = np.flatnonzero(hot & ~self.alerting)
+        self.alerting = hot
+        self.refreshes += 1
+
+        alerts = [self.row(i) for i in fresh]
+        for row in alerts:
+            log.warning("🚨 %s: %s, net %.1f bps after fees", row[0], row[1], row[2],
+                        extra={"fields": {"symbol": row[0], "direction": row[1], "net_bps": row[2]}})
+        return alerts
+
+    def row(self, i):
+        """
+        (symbol, direction, net bps, MEXC bid, MEXC ask, Bybit bid, Bybit ask, last-price spread bps)
+        """
+        direction = "buy MEXC / sell Bybit" if self.buy_mexc[i] >= self.buy_bybit[i] else "buy Bybit / sell MEXC"
+        return (str(self.symbols[i]), direction, float(self.net[i]), self.mexc_bid[i], self.mexc_ask[i],
+                self.bybit_bid[i], self.bybit_ask[i], float(self.last_bps[i]))
+
+    def top(self, n=10):
+        """
+        The 'n' pairs with the best net edge, best first.
+        """
+        key = np.nan_to_num(-self.net, nan=np.inf)
+        n = min(n, len(key))
+        if n == 0:
+            return []
+        picked = np.argpartition(key, n - 1)[:n]
+        picked = picked[np.argsort(key[picked], kind="stable")]
+        return [self.row(i) for i in picked if np.isfinite(key[i])]
+
+    def next_interval(self, target):
+        """
+        Seconds until the next refresh: 'target', stretched if MEXC's request
+        window or the Bybit limiter could not sustain it.
+        """
+        from modules.mexc_api import remaining_budget
+        remaining, reset_in = remaining_budget()
+        mexc_floor = reset_in / remaining if remaining > 0 else reset_in
+        return max(target, mexc_floor, 1.0 / bybit_limiter.rate)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+def print_spreads(rows, title):
+    print(f"\n--- {title} ---")
+    print(f"{'Pair':<14}{'Net bp':>8}  {'Direction':<22}{'MEXC bid/ask':>26}{'Bybit bid/ask':>26}{'Last bp':>9}")
+    for sym, direction, net, mb, ma, bb, ba, last in rows:
+        print(f"{sym:<14}{net:>8.1f}  {direction:<22}{mb:>13.6g}/{ma:<12.6g}{bb:>13.6g}/{ba:<12.6g}{last:>9.1f}")
+
+
+def run_spread_monitor_flow():
+    """
+    1) Ask threshold, refresh rate and Bybit market type
+    2) Refresh both venues' full books continuously; alerts print at once,
+       the top table every few seconds
+    3) Ctrl+C returns to main menu
+    """
+    print("\n=== MEXC / BYBIT SPREAD MONITOR ===")
+    try:
+        threshold_str = prompt("Alert threshold in bps net of fees (default=10): ").strip()
+        threshold = float(threshold_str) if threshold_str else 10.0
+    except ValueError:
+        threshold = 10.0
+        print("Invalid input. Using 10 bps.")
+    try:
+        rate_str = prompt("Refreshes per second (default=4): ").strip()
+        target = 1.0 / float(rate_str) if rate_str else 0.25
+    except (ValueError, ZeroDivisionError):
+        target = 0.25
+        print("Invalid input. Using 4/s.")
+    category = "linear" if prompt("Compare against Bybit perps instead of spot? (yes/no): ").strip().lower() == "yes" else "spot"
+    bybit_fee = 0.00055 if category == "linear" else BYBIT_TAKER_FEE
+
+    monitor = SpreadMonitor(threshold, bybit_fee=bybit_fee, bybit_category=category)
+    print("Monitoring... (Ctrl+C to stop)")
+    last_table = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                alerts = monitor.refresh()
+            except Exception as e:
+                print(f"Error refreshing books: {e}")
+                replay.sleep(monitor.next_interval(target) * 4)
+                continue
+            elapsed = time.perf_counter() - start
+            if alerts:
+                print_spreads(alerts, f"ALERT: edge > {threshold:g} bps")
+            if time.monotonic() - last_table >= 5:
+                print_spreads(monitor.top(10), f"top {len(monitor.symbols)} common pairs by net edge")
+                print(f"(refresh {elapsed * 1000:.0f} ms incl. both requests)")
+                last_table = time.monotonic()
+            replay.sleep(max(0.0, monitor.next_interval(target) - elapsed))
+    except KeyboardInterrupt:
+        print("\nSpread monitor stopped. Returning to main menu.\n")
+    finally:
+        monitor.close()
+
+
+# If run directly, time one refresh on synthetic 2500 / 600 pair books
+# (compute only), then end to end against the local fake exchange.
+if __name__ == "__main__":
+    from modules.logger import setup_logging
+
+    setup_logging(log_dir=False, console=False)
+    rng = np.random.default_rng(1)
+
+    def synthetic(names, mid, spread):
+        half = mid * spread / 2
+        return np.array(names), mid - half, mid + half, mid
+
+    names = [f"C{i}USDT" for i in range(2500)]
+    mid = rng.lognormal(0, 3, 2500)
+    monitor = SpreadMonitor(threshold_bps=5)
+    start = time.perf_counter()
+    runs = 200
+    for _ in range(runs):
+        noise = np.exp(rng.normal(0, 5e-4, 600))
+        monitor.load(synthetic(names, mid, 4e-4), synthetic(names[::-1][:600], mid[::-1][:600] * noise, 6e-4))
+    print(f"compute: {(time.perf_counter() - start) / runs * 1000:.3f} ms per refresh "
+          f"({len(monitor.symbols)} common pairs)")
+    print_spreads(monitor.top(3), "synthetic top 3")
+    monitor.close()
+
+    from modules import mexc_api, bybit_api
+    from modules.fake_exchange import FakeExchange
+
+    server = FakeExchange(symbols=[f"C{i}USDT" for i in range(2000)], latency=0.02, jitter=0.005).start()
+    mexc_api.exchange.urls["api"]["spot"]["public"] = server.base_url
+    bybit_api.exchange.urls["api"] = {key: server.base_url for key in bybit_api.exchange.urls["api"]}
+    mexc_api.exchange.enableRateLimit = bybit_api.exchange.enableRateLimit = False
+    monitor = SpreadMonitor()
+    start = time.perf_counter()
+    runs = 20
+    for _ in range(runs):
+        monitor.refresh()
+    print(f"fake exchange, 2000 pairs/venue, 20±5 ms latency: "
+          f"{(time.perf_counter() - start) / runs * 1000:.1f} ms per refresh")
+    monitor.close()
+    server.stop()
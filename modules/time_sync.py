@@ -0,0 +1,175 @@
+# modules/time_sync.py
+
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from modules.logger import get_logger
+
+log = get_logger("time_sync")
+
+# Bybit rejects a signed request unless
+#   server_time - recv_window <= timestamp < server_time + 1000
+MIN_RECV_WINDOW_MS = 1500
+MAX_RECV_WINDOW_MS = 10000
+SAFETY_MS = 500
+
+
+class TimeSync:
+    """
+    Estimates the offset between the local clock and the exchange clock,
+    NTP style: each sample brackets one server-time request with local
+    timestamps and assumes the server read its clock half-way through.
+
+    A sync takes 'samples' readings and keeps only the fastest half by
+    round-trip time (slow round trips are the ones whose midpoint guess is
+    least reliable), then uses the median offset of what is left. Jitter
+    is the RMS change between the last 'keep' accepted offsets.
+
+    fetch_server_ms() must return the exchange time in milliseconds. If a
+    'limiter' is given it is acquired before each sample, outside the timed
+    part. on_sync(clock) is called after every successful sync.
+    """
+    def __init__(self, fetch_server_ms, interval=60.0, samples=8, keep=16, limiter=None, on_sync=None):
+        self.fetch_server_ms = fetch_server_ms
+        self.limiter = limiter
+        self.interval = interval
+        self.samples = samples
+        self.on_sync = on_sync
+        self.offset = 0.0  # seconds to add to time.time() to get exchange time
+        self.rtt = None    # seconds, median of the accepted samples
+        self.offsets = deque(maxlen=keep)
+        self.synced_at = None
+        self.failures = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    # ---------------- clock ----------------
+
+    def now(self):
+        return time.time() + self.offset
+
+    def now_ms(self):
+        return int((time.time() + self.offset) * 1000)
+
+    @property
+    def jitter(self):
+        if len(self.offsets) < 2:
+            return 0.0
+        diffs = [b - a for a, b in zip(self.offsets, list(self.offsets)[1:])]
+        return math.sqrt(sum(d * d for d in diffs) / len(diffs))
+
+    def recv_window(self):
+        """
+        Smallest recv_window (ms) that still covers one request's trip
+        to the exchange plus our remaining clock error.
+        """
+        if self.rtt is None:
+            return MAX_RECV_WINDOW_MS
+        needed = (self.rtt + 4 * self.jitter) * 1000 + SAFETY_MS
+        return int(min(MAX_RECV_WINDOW_MS, max(MIN_RECV_WINDOW_MS, math.ceil(needed))))
+
+    def metrics(self):
+        return {
+            "offset_ms": self.offset * 1000,
+            "jitter_ms": self.jitter * 1000,
+            "rtt_ms": None if self.rtt is None else self.rtt * 1000,
+            "recv_window_ms": self.recv_window(),
+            "syncs": len(self.offsets),
+            "failures": self.failures,
+            "age_sec": None if self.synced_at is None else time.monotonic() - self.synced_at,
+        }
+
+    # ---------------- sampling ----------------
+
+    def sample(self):
+        """
+        One (offset, rtt) reading in seconds.
+        """
+        if self.limiter is not None:
+            self.limiter.acquire()
+        sent = time.time()
+        start = time.perf_counter()
+        server = self.fetch_server_ms() / 1000
+        rtt = time.perf_counter() - start
+        return server - (sent + rtt / 2), rtt
+
+    def sync(self):
+        """
+        Take a burst of samples and update the offset. Returns True on success.
+        """
+        readings = []
+        for _ in range(self.samples):
+            try:
+                readings.append(self.sample())
+            except Exception as e:
+                log.warning("⚠ Server time sample failed: %s", e)
+        if not readings:
+            self.failures += 1
+            return False
+
+        readings.sort(key=lambda r: r[1])
+        fastest = readings[:max(1, len(readings) // 2)]
+        self.offset = statistics.median(r[0] for r in fastest)
+        self.rtt = statistics.median(r[1] for r in fastest)
+        self.offsets.append(self.offset)
+        self.synced_at = time.monotonic()
+        metrics = self.metrics()
+        log.info("🕒 Clock offset %+.1f ms, rtt %.1f ms, jitter %.1f ms, recv_window %d ms",
+                 metrics["offset_ms"], metrics["rtt_ms"], metrics["jitter_ms"], metrics["recv_window_ms"],
+                 extra={"fields": {"time_sync": metrics}})
+        if self.on_sync is not None:
+            self.on_sync(self)
+        return True
+
+    # ---------------- background ----------------
+
+    def _loop(self):
+        while not self.stopped.is_set():
+            self.sync()
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        """
+        Re-sync every 'interval' seconds on a daemon thread (first sync is
+        immediate). No-op if already running.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            return self
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._loop, name="time-sync", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+
+def install_pybit(clock):
+    """
+    Make pybit sign every request (HTTP and WebSocket auth) with the
+    exchange-corrected time from 'clock'.
+    """
+    from pybit import _helpers
+    _helpers.generate_timestamp = clock.now_ms
+
+
+# If run directly, sync against a local fake exchange with a skewed clock
+if __name__ == "__main__":
+    import json
+    import urllib.request
+    from modules.fake_exchange import FakeExchange
+
+    server = FakeExchange(latency=0.02, jitter=0.01, skew=-2.5).start()
+
+    def fetch():
+        with urllib.request.urlopen(server.base_url + "/v5/market/time", timeout=5) as response:
+            return int(json.loads(response.read())["result"]["timeNano"]) / 1e6
+
+    clock = TimeSync(fetch, samples=8)
+    for _ in range(5):
+        clock.sync()
+    print({k: round(v, 2) if isinstance(v, float) else v for k, v in clock.metrics().items()})
+    print(f"true skew -2500.0 ms, estimated {clock.offset * 1000:+.1f} ms")
+    server.stop()
@@ -0,0 +1,353 @@
+# modules/trade_store.py
+
+import json
+import os
+import struct
+import threading
+import time
+import numpy as np
+from modules.logger import LOG_DIR, get_logger
+
+log = get_logger("trade_store")
+
+GROUP_ROWS = 65536  # rows buffered in memory before a row group is written
+MAGIC = b"TRG1"
+_HEADER = struct.Struct("<4sI")  # magic, header length
+
+# Column name -> dtype. 'symbol' holds codes into the row group's own dictionary;
+# 'side' is +1 for Buy, -1 for Sell; 'pnl' is net of 'fees' and 'funding'.
+# Columns missing from a row group (written before they existed) read as NaN.
+COLUMNS = {"ts": np.float64, "symbol": np.int32, "side": np.int8, "entry_price": np.float64,
+           "exit_price": np.float64, "quantity": np.float64, "leverage": np.float64, "pnl": np.float64,
+           "fees": np.float64, "funding": np.float64}
+SIDES = {"Buy": 1, "Sell": -1}
+SIDE_NAMES = {1: "Buy", -1: "Sell"}
+
+
+def default_path():
+    """
+    Where the paper trader keeps its trades: AUTOBOT_TRADES=<file>, or
+    trades.tcol in the log directory. AUTOBOT_TRADES=0 keeps them in memory only.
+    """
+    path = os.getenv("AUTOBOT_TRADES", "")
+    if path == "0":
+        return None
+    return path or os.path.join(LOG_DIR, "trades.tcol")
+
+
+def write_group(f, columns, names):
+    """
+    Append one row group: MAGIC, header length, a JSON header (row count,
+    ts range, symbol dictionary, column offsets) and the raw column bytes.
+    'columns' are equal-length arrays; columns["symbol"] indexes 'names'.
+    """
+    used, codes = np.unique(columns["symbol"], return_inverse=True)
+    data = dict(columns, symbol=codes.astype(COLUMNS["symbol"]))
+    layout = []
+    offset = 0
+    for name, dtype in COLUMNS.items():
+        size = len(data[name]) * np.dtype(dtype).itemsize
+        layout.append([name, offset, size])
+        offset += size
+    header = json.dumps({"rows": len(columns["ts"]), "ts_min": float(columns["ts"].min()),
+                         "ts_max": float(columns["ts"].max()), "symbols": [names[c] for c in used],
+                         "columns": layout}).encode()
+    f.write(_HEADER.pack(MAGIC, len(header)))
+    f.write(header)
+    for name, dtype in COLUMNS.items():
+        f.write(np.ascontiguousarray(data[name], dtype=dtype).tobytes())
+
+
+def read_groups(path, start=0):
+    """
+    (header, offset of its column data) for each complete row group from
+    byte 'start' on. A truncated group at the end (the process died
+    mid-write) is skipped.
+    """
+    groups = []
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        pos = start
+        while pos + _HEADER.size <= size:
+            f.seek(pos)
+            magic, length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                log.warning("Corrupt row group at byte %d of %s, ignoring the rest", pos, path)
+                break
+            header = json.loads(f.read(length))
+            data = pos + _HEADER.size + length
+            end = data + sum(size for _, _, size in header["columns"])
+            if end > size:
+                log.warning("Truncated row group at byte %d of %s", pos, path)
+                break
+            groups.append((header, data))
+            pos = end
+    return groups
+
+
+def data_end(path):
+    """
+    Byte offset just past the last complete row group (0 for a missing file).
+    """
+    if not os.path.exists(path):
+        return 0
+    groups = read_groups(path)
+    if not groups:
+        return 0
+    header, offset = groups[-1]
+    return offset + sum(size for _, _, size in header["columns"])
+
+
+def _empty(columns):
+    return {name: np.empty(0, dtype=object if name == "symbol" else COLUMNS[name]) for name in columns}
+
+
+def _filter(data, symbol_codes, start, end):
+    """
+    Row mask for symbol / [start, end) on a group's columns, or None for all rows.
+    """
+    mask = None
+    if symbol_codes is not None:
+        mask = np.isin(data["symbol"], symbol_codes)
+    if start is not None:
+        mask = data["ts"] >= start if mask is None else mask & (data["ts"] >= start)
+    if end is not None:
+        mask = data["ts"] < end if mask is None else mask & (data["ts"] < end)
+    return mask
+
+
+def _select(columns, data, names, symbols, start, end):
+    """
+    Filtered 'columns' of one group (arrays 'data', dictionary 'names'),
+    with symbols decoded to strings.
+    """
+    codes = None
+    if symbols is not None:
+        codes = [i for i, name in enumerate(names) if name in symbols]
+    mask = _filter(data, codes, start, end)
+    out = {}
+    for name in columns:
+        values = data[name] if mask is None else data[name][mask]
+        if name == "symbol":
+            values = np.array(names, dtype=object)[values]
+        out[name] = values
+    return out
+
+
+def _concat(parts, columns):
+    if not parts:
+        return _empty(columns)
+    return {name: np.concatenate([part[name] for part in parts]) for name in columns}
+
+
+def query(path, symbol=None, start=None, end=None, columns=None):
+    """
+    Trades in 'path' as {column: numpy array}, oldest first.
+
+    symbol: a symbol or a list of them; start / end: [start, end) epoch
+    seconds; columns: which columns to return (default all). Filters are
+    pushed down: row groups whose ts range or symbol dictionary rules
+    them out are never read, and only the columns needed for filtering
+    and output are read from the rest.
+    """
+    columns = list(columns or COLUMNS)
+    symbols = None if symbol is None else {symbol} if isinstance(symbol, str) else set(symbol)
+    needed = set(columns)
+    if symbols is not None:
+        needed.add("symbol")
+    if start is not None or end is not None:
+        needed.add("ts")
+    if not os.path.exists(path):
+        return _empty(columns)
+
+    parts = []
+    with open(path, "rb") as f:
+        for header, offset in read_groups(path):
+            if start is not None and header["ts_max"] < start:
+                continue
+            if end is not None and header["ts_min"] >= end:
+                continue
+            if symbols is not None and symbols.isdisjoint(header["symbols"]):
+                continue
+            data = {name: np.full(header["rows"], np.nan) for name in needed}
+            for name, column_offset, size in header["columns"]:
+                if name in needed:
+                    f.seek(offset + column_offset)
+                    data[name] = np.frombuffer(f.read(size), dtype=COLUMNS[name])
+            parts.append(_select(columns, data, header["symbols"], symbols, start, end))
+    return _concat(parts, columns)
+
+
+class TradeHistory:
+    """
+    Closed trades as columns (numpy arrays of GROUP_ROWS rows) instead of
+    a list of dicts. With a 'path', every full buffer is appended to the
+    file as a row group (and flush() / close() write the partial one),
+    so memory stays at one buffer however long the bot runs and the file
+    can be analysed afterwards with query(). Without a path the buffers
+    just grow.
+
+    The file is appended to across sessions. len() and history[i] (a
+    trade as a dict, negative indices too) cover this session's trades;
+    history.query(...) covers the whole file plus the rows not yet
+    written. Thread-safe.
+    """
+    def __init__(self, path=None, group_rows=GROUP_ROWS):
+        self.path = path
+        self.group_rows = group_rows
+        self.lock = threading.Lock()
+        self.names = []    # symbol dictionary for the buffered rows
+        self.codes = {}
+        self.columns = {name: np.empty(group_rows, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.size = 0      # buffered rows
+        self.flushed = 0   # rows of this session already in the file
+        self.start = 0     # where this session's row groups begin in the file
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.start = data_end(path)
+            if os.path.exists(path) and os.path.getsize(path) > self.start:
+                log.warning("Dropping a truncated row group at the end of %s", path)
+                os.truncate(path, self.start)
+
+    def __len__(self):
+        return self.flushed + self.size
+
+    def append(self, symbol, side, entry_price, exit_price, quantity, leverage, pnl, fees=0.0, funding=0.0,
+               ts=None):
+        with self.lock:
+            if self.size == len(self.columns["ts"]):
+                if self.path:
+                    self._flush()
+                else:
+                    for name, values in self.columns.items():
+                        self.columns[name] = np.concatenate([values, np.empty_like(values)])
+            code = self.codes.get(symbol)
+            if code is None:
+                code = self.codes[symbol] = len(self.names)
+                self.names.append(symbol)
+            i = self.size
+            c = self.columns
+            c["ts"][i] = time.time() if ts is None else ts
+            c["symbol"][i] = code
+            c["side"][i] = SIDES.get(side, side)
+            c["entry_price"][i] = entry_price
+            c["exit_price"][i] = exit_price
+            c["quantity"][i] = quantity
+            c["leverage"][i] = leverage
+            c["pnl"][i] = pnl
+            c["fees"][i] = fees
+            c["funding"][i] = funding
+            self.size = i + 1
+
+    def _flush(self):
+        if not self.size:
+            return
+        with open(self.path, "ab") as f:
+            write_group(f, {name: values[:self.size] for name, values in self.columns.items()}, self.names)
+        self.flushed += self.size
+        self.size = 0
+        self.names = []
+        self.codes = {}
+
+    def flush(self):
+        """
+        Write the buffered rows as a row group (no-op without a path).
+        """
+        if not self.path:
+            return
+        with self.lock:
+            self._flush()
+
+    close = flush
+
+    def __getitem__(self, i):
+        with self.lock:
+            total = self.flushed + self.size
+            if i < 0:
+                i += total
+            if not 0 <= i < total:
+                raise IndexError("trade index out of range")
+            if i >= self.flushed:
+                j = i - self.flushed
+                row = {name: values[j] for name, values in self.columns.items()}
+                row["symbol"] = self.names[row["symbol"]]
+            else:
+                row = self._read_row(i)
+        row["side"] = SIDE_NAMES[int(row["side"])]
+        return {name: value.item() if hasattr(value, "item") else value for name, value in row.items()}
+
+    def _read_row(self, i):
+        for header, offset in read_groups(self.path, self.start):
+            if i < header["rows"]:
+                break
+            i -= header["rows"]
+        row = dict.fromkeys(COLUMNS, np.float64(np.nan))
+        with open(self.path, "rb") as f:
+            for name, column_offset, _ in header["columns"]:
+                itemsize = np.dtype(COLUMNS[name]).itemsize
+                f.seek(offset + column_offset + i * itemsize)
+                row[name] = np.frombuffer(f.read(itemsize), dtype=COLUMNS[name])[0]
+        row["symbol"] = header["symbols"][row["symbol"]]
+        return row
+
+    def query(self, symbol=None, start=None, end=None, columns=None):
+        """
+        query() over the file plus the rows still in memory.
+        """
+        columns = list(columns or COLUMNS)
+        with self.lock:
+            parts = [query(self.path, symbol, start, end, columns)] if self.path else []
+            symbols = None if symbol is None else {symbol} if isinstance(symbol, str) else set(symbol)
+            data = {name: values[:self.size] for name, values in self.columns.items()}
+            parts.append(_select(columns, data, self.names, symbols, start, end))
+        return _concat(parts, columns)
+
+
+# If run directly: write a year of synthetic trades (one a minute over 100
+# symbols) and time full and filtered loads.
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    from modules.logger import setup_logging
+
+    setup_logging(log_dir=False, console=False)
+    rows = 365 * 24 * 60
+    symbols = [f"C{i}USDT" for i in range(100)]
+    rng = np.random.default_rng(1)
+    year_start = 1_700_000_000.0
+    ts = year_start + np.arange(rows) * 60.0
+    symbol = rng.integers(0, len(symbols), rows)
+    side = rng.choice(["Buy", "Sell"], rows)
+    entry = rng.uniform(1, 100, rows)
+    exit_ = entry * rng.normal(1, 0.01, rows)
+    pnl = (exit_ - entry) * 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tmp, "trades.tcol")
+        history = TradeHistory(path)
+        started = time.perf_counter()
+        for i in range(rows):
+            history.append(symbols[symbol[i]], side[i], entry[i], exit_[i], 10.0, 3.0, pnl[i], ts=ts[i])
+        history.close()
+        elapsed = time.perf_counter() - started
+        print(f"{rows:,} trades appended in {elapsed:.2f} s ({elapsed / rows * 1e6:.1f} µs/trade), "
+              f"{os.path.getsize(path) / 1e6:.1f} MB, {len(read_groups(path))} row groups")
+
+        month = 30 * 86400
+        cases = [("full year, all columns", {}),
+                 ("full year, pnl only", {"columns": ["pnl"]}),
+                 ("one symbol", {"symbol": "C7USDT"}),
+                 ("one month", {"start": year_start + 6 * month, "end": year_start + 7 * month}),
+                 ("one symbol, one month", {"symbol": "C7USDT", "start": year_start + 6 * month,
+                                            "end": year_start + 7 * month})]
+        for label, kwargs in cases:
+            times = []
+            for _ in range(5):
+                started = time.perf_counter()
+                result = query(path, **kwargs)
+                times.append(time.perf_counter() - started)
+            n = len(next(iter(result.values())))
+            print(f"{label:<26}{n:>10,} rows {min(times) * 1e3:>8.1f} ms")
+        assert history[-1]["symbol"] == symbols[symbol[-1]] and len(history) == rows
@@ -0,0 +1,173 @@
+# modules/trigger_index.py
+
+import bisect
+import itertools
+from modules.calculations import calc_liquidation
+
+# Trigger kinds
+TAKE_PROFIT = "TAKE_PROFIT"
+STOP = "STOP"
+LIQUIDATION = "LIQUIDATION"
+
+# A trigger "above" fires once price >= level, "below" once price <= level.
+ABOVE = "ABOVE"
+BELOW = "BELOW"
+
+
+class TriggerIndex:
+    """
+    Resting price triggers per symbol, kept in sorted lists so a new price
+    only touches the triggers it crossed (bisect + slice = O(log n + k)).
+
+    Both books are stored so that the triggers which fire always form the
+    tail of the list:
+      - ABOVE book holds -level ascending (highest level first in the tail)
+      - BELOW book holds  level ascending
+    """
+    def __init__(self):
+        # symbol -> {ABOVE: ([keys], [trigger_ids]), BELOW: ([keys], [trigger_ids])}
+        self.books = {}
+        # trigger_id -> (symbol, side, key, kind, position_id, level)
+        self.triggers = {}
+        # position_id -> set of trigger_ids
+        self.by_position = {}
+        self._ids = itertools.count(1)
+
+    def _book(self, symbol, side):
+        books = self.books.get(symbol)
+        if books is None:
+            books = {ABOVE: ([], []), BELOW: ([], [])}
+            self.books[symbol] = books
+        return books[side]
+
+    def add(self, symbol, side, level, kind, position_id=None):
+        """
+        Register a trigger and return its id.
+        """
+        if side not in (ABOVE, BELOW):
+            raise ValueError(f"side must be {ABOVE} or {BELOW}, got {side!r}")
+        key = -level if side == ABOVE else level
+        keys, ids = self._book(symbol, side)
+        pos = bisect.bisect_right(keys, key)
+        keys.insert(pos, key)
+        trigger_id = next(self._ids)
+        ids.insert(pos, trigger_id)
+        self.triggers[trigger_id] = (symbol, side, key, kind, position_id, level)
+        if position_id is not None:
+            self.by_position.setdefault(position_id, set()).add(trigger_id)
+        return trigger_id
+
+    def _forget(self, trigger_id, position_id):
+        if position_id is None:
+            return
+        owned = self.by_position.get(position_id)
+        if owned is not None:
+            owned.discard(trigger_id)
+            if not owned:
+                del self.by_position[position_id]
+
+    def cancel(self, trigger_id):
+        """
+        Remove a resting trigger. Returns False if it already fired or never existed.
+        """
+        info = self.triggers.pop(trigger_id, None)
+        if info is None:
+            return False
+        symbol, side, key = info[0], info[1], info[2]
+        self._forget(trigger_id, info[4])
+        keys, ids = self._book(symbol, side)
+        lo = bisect.bisect_left(keys, key)
+        hi = bisect.bisect_right(keys, key)
+        pos = ids.index(trigger_id, lo, hi)
+        del keys[pos]
+        del ids[pos]
+        return True
+
+    def cancel_position(self, position_id):
+        """
+        Remove every trigger belonging to 'position_id'.
+        """
+        for trigger_id in list(self.by_position.get(position_id, ())):
+            self.cancel(trigger_id)
+
+    def update(self, symbol, price):
+        """
+        Feed a new price. Removes and returns the triggers it crossed as a list
+        of (trigger_id, kind, position_id, level) tuples.
+        """
+        books = self.books.get(symbol)
+        if books is None:
+            return []
+
+        fired = []
+        for side, key in ((ABOVE, -price), (BELOW, price)):
+            keys, ids = books[side]
+            pos = bisect.bisect_left(keys, key)
+            if pos == len(keys):
+                continue
+            for trigger_id in reversed(ids[pos:]):
+                info = self.triggers.pop(trigger_id)
+                self._forget(trigger_id, info[4])
+                fired.append((trigger_id, info[3], info[4], info[5]))
+            del keys[pos:]
+            del ids[pos:]
+        return fired
+
+    def count(self, symbol=None):
+        if symbol is None:
+            return len(self.triggers)
+        books = self.books.get(symbol)
+        if books is None:
+            return 0
+        return len(books[ABOVE][0]) + len(books[BELOW][0])
+
+
+def add_position_triggers(index, symbol, position_type, entry_price, leverage,
+                          target_fraction=None, stop_fraction=None, position_id=None):
+    """
+    Register the take-profit, stop and liquidation levels for one position.
+    Liquidation comes from calc_liquidation, the others from the user's
+    target/stop fractions. Returns {kind: trigger_id}.
+    """
+    is_long = position_type.upper() == "LONG"
+    win_side, loss_side = (ABOVE, BELOW) if is_long else (BELOW, ABOVE)
+    sign = 1 if is_long else -1
+
+    ids = {}
+    if target_fraction is not None:
+        tp = entry_price * (1 + sign * target_fraction)
+        ids[TAKE_PROFIT] = index.add(symbol, win_side, tp, TAKE_PROFIT, position_id)
+    if stop_fraction is not None:
+        stop = entry_price * (1 - sign * stop_fraction)
+        ids[STOP] = index.add(symbol, loss_side, stop, STOP, position_id)
+    liq = calc_liquidation(entry_price, leverage, position_type)
+    ids[LIQUIDATION] = index.add(symbol, loss_side, liq, LIQUIDATION, position_id)
+    return ids
+
+
+# If run directly, benchmark per-tick update cost with many resting triggers
+if __name__ == "__main__":
+    import random
+    import time
+
+    random.seed(1)
+    index = TriggerIndex()
+    n_positions = 20000
+    for i in range(n_positions):
+        entry = random.uniform(90, 110)
+        add_position_triggers(index, "BTC/USDT", random.choice(["LONG", "SHORT"]), entry,
+                              leverage=random.choice([5, 10, 20, 50]),
+                              target_fraction=random.uniform(0.001, 0.05),
+                              stop_fraction=random.uniform(0.001, 0.05),
+                              position_id=i)
+    print(f"Resting triggers: {index.count()}")
+
+    price = 100.0
+    ticks = 20000
+    fired_total = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        price *= 1 + random.gauss(0, 0.0002)
+        fired_total += len(index.update("BTC/USDT", price))
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks in {elapsed:.3f}s -> {elapsed / ticks * 1e6:.1f} us/tick, fired={fired_total}, left={index.count()}")
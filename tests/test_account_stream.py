@@ -0,0 +1,57 @@
+import threading
+import time
+from modules.account_stream import AccountState
+
+
+def order(order_id, status, qty):
+    return {"topic": "order", "data": [{"orderId": order_id, "orderStatus": status, "qty": str(qty)}]}
+
+
+def execution(order_id, qty, price, fee=0.01):
+    return {"topic": "execution", "data": [{"orderId": order_id, "execType": "Trade", "execQty": str(qty),
+                                            "execPrice": str(price), "execFee": str(fee)}]}
+
+
+def test_fills_average_price_and_fees():
+    state = AccountState()
+    state.apply(execution("A", 0.4, 100))
+    state.apply(execution("A", 0.6, 110))
+    qty, price, fee = state.wait_fill("A", 1.0, timeout=0)
+    assert qty == 1.0 and abs(price - 106) < 1e-9 and abs(fee - 0.02) < 1e-12
+
+
+def test_filled_status_before_executions_waits_for_the_fills():
+    state = AccountState()
+    state.apply(order("A", "Filled", 1.0))
+
+    def late_fills():
+        time.sleep(0.05)
+        state.apply(execution("A", 0.5, 100))
+        state.apply(execution("A", 0.5, 102))
+
+    threading.Thread(target=late_fills).start()
+    start = time.monotonic()
+    fill = state.wait_fill("A", 1.0, timeout=2.0)
+    assert time.monotonic() - start >= 0.04
+    assert fill is not None and fill[0] == 1.0 and abs(fill[1] - 101) < 1e-9
+
+
+def test_filled_status_uses_order_qty_when_none_given():
+    state = AccountState()
+    state.apply(order("A", "Filled", 2.0))
+    state.apply(execution("A", 1.0, 100))
+    assert state.wait_fill("A", timeout=0.05) == (1.0, 100.0, 0.01)  # timed out, partial fill so far
+    state.apply(execution("A", 1.0, 100))
+    assert state.wait_fill("A", timeout=0)[0] == 2.0
+
+
+def test_cancelled_order_returns_without_waiting():
+    state = AccountState()
+    state.apply(order("A", "Cancelled", 1.0))
+    start = time.monotonic()
+    assert state.wait_fill("A", 1.0, timeout=2.0) is None
+    assert time.monotonic() - start < 0.5
+
+
+def test_unknown_order_times_out():
+    assert AccountState().wait_fill("missing", 1.0, timeout=0.01) is None
@@ -0,0 +1,37 @@
+import numpy as np
+from modules import paper_trader
+from modules.accrual import FUNDING_INTERVAL_SEC, fee, funding_times
+from modules.paper_trader import Position, accrue_costs, position_pnl
+
+SETTLEMENT = 1_700_006_400.0  # a multiple of FUNDING_INTERVAL_SEC
+
+
+def test_funding_times_excludes_settlement_just_after_fractional_end():
+    assert len(funding_times(SETTLEMENT - 10, SETTLEMENT - 0.5)) == 0
+    assert list(funding_times(SETTLEMENT - 10, SETTLEMENT)) == [SETTLEMENT]
+    times = funding_times(SETTLEMENT - 10, SETTLEMENT + FUNDING_INTERVAL_SEC - 0.25)
+    assert list(times) == [SETTLEMENT]
+
+
+def position(side, entry, quantity, opened_at, leverage=10):
+    p = Position("BTCUSDT", side, entry, leverage, quantity)
+    p.opened_at = opened_at
+    return p
+
+
+def test_gross_follows_side_and_ignores_leverage():
+    opened = SETTLEMENT + 60
+    long, short = position("Buy", 100.0, 2.0, opened), position("Sell", 100.0, 2.0, opened)
+    assert position_pnl(long, 110.0) == 20.0 and position_pnl(short, 110.0) == -20.0
+    net = accrue_costs([long, short], [110.0, 110.0], [0.1, None], closed_at=opened + 60)
+    assert np.allclose(net, [20.0 - 0.1, -20.0 - fee(110.0, 2.0)])
+    assert long.funding == 0.0 and short.exit_price == 110.0
+
+
+def test_funding_across_a_settlement(monkeypatch):
+    monkeypatch.setattr(paper_trader, "funding_history",
+                        lambda symbol, start, end: (np.array([SETTLEMENT]), np.array([0.001])))
+    long, short = position("Buy", 100.0, 2.0, SETTLEMENT - 60), position("Sell", 100.0, 2.0, SETTLEMENT - 60)
+    net = accrue_costs([long, short], [100.0, 100.0], [0.0, 0.0], closed_at=SETTLEMENT + 60)
+    assert np.allclose([long.funding, short.funding], [0.2, -0.2])
+    assert np.allclose(net, [-0.2, 0.2])
@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from modules import async_exchange
+from modules.async_exchange import AsyncExchanges
+from modules.resilience import ExchangeError, TIMEOUT
+
+
+@pytest.fixture
+def exchanges(monkeypatch):
+    async def no_clients():
+        pass
+
+    exchanges = AsyncExchanges()
+    monkeypatch.setattr(exchanges, "_open", no_clients)
+    yield exchanges
+    exchanges.loop.call_soon_threadsafe(exchanges.loop.stop)
+    exchanges.thread.join(5)
+
+
+def test_submit_timeout_cancels_and_raises_exchange_error(exchanges):
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ExchangeError) as e:
+        exchanges.submit(slow(), timeout=0.05)
+    assert e.value.kind == TIMEOUT and e.value.transient
+    asyncio.run_coroutine_threadsafe(asyncio.wait_for(cancelled.wait(), 1), exchanges.loop).result(2)
+
+
+def test_facade_maps_timeout_to_none(exchanges, monkeypatch):
+    async def hang(*args):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(async_exchange, "EXCHANGES", exchanges)
+    monkeypatch.setattr(exchanges, "fetch_price", hang)
+    monkeypatch.setattr(exchanges, "fetch_prices", hang)
+    monkeypatch.setattr(async_exchange, "CALL_TIMEOUT_SEC", 0.05)
+    assert async_exchange.fetch_current_price("BTC/USDT") is None
+    assert async_exchange.fetch_current_prices(["A/USDT", "B/USDT"]) == {"A/USDT": None, "B/USDT": None}
@@ -0,0 +1,68 @@
+import io
+import json
+import pytest
+from modules.batch_calc import compute_chunk, read_csv_chunks, read_jsonl_chunks, PriceBook
+
+CSV_HEADER = "symbol,position,entry,exit,leverage,capital\n"
+
+
+def chunks(reader, text):
+    return list(reader(io.StringIO(text), chunk_rows=1000))
+
+
+def test_csv_fast_path_columns():
+    [chunk] = chunks(read_csv_chunks, CSV_HEADER + "BTC,LONG,100,110,5,50\nETH,SHORT,10,9,2,20\n")
+    assert chunk["symbol"] == ["BTC", "ETH"]
+    assert chunk["capital"] == ["50", "20"]
+
+
+def test_csv_short_and_long_rows_do_not_shift_columns():
+    [chunk] = chunks(read_csv_chunks, CSV_HEADER + "BTC,LONG,100,110,5\nETH,SHORT,10,9,2,20,EXTRA\n")
+    assert list(chunk["symbol"]) == ["BTC", "ETH"]
+    assert list(chunk["capital"]) == ["", "20"]
+    assert list(chunk["position"]) == ["LONG", "SHORT"]
+
+
+def test_csv_quoted_fields():
+    [chunk] = chunks(read_csv_chunks, CSV_HEADER + '"BTC,X",LONG,100,110,5,50\n')
+    assert list(chunk["symbol"]) == ["BTC,X"]
+
+
+def test_jsonl_malformed_line_becomes_an_error_row():
+    lines = [json.dumps({"symbol": "BTC", "position": "LONG", "entry": 100, "exit": 110, "leverage": 5,
+                         "capital": 50}), '{"symbol": "ETH", broken', "[1, 2]",
+             json.dumps({"symbol": "SOL", "position": "SHORT", "entry": 10, "exit": 9, "leverage": 2,
+                         "capital": 20})]
+    [chunk] = chunks(read_jsonl_chunks, "\n".join(lines) + "\n")
+    assert chunk["symbol"] == ["BTC", None, None, "SOL"]
+    result, filled, errors = compute_chunk(chunk, PriceBook({}))
+    assert result["error"] == ["", "invalid JSON", "not a JSON object", ""]
+    assert errors == 2 and filled == 0
+    assert result["profit"][0] == pytest.approx(25.0)
+    assert result["profit"][3] == pytest.approx(4.0)
+
+
+def test_blank_entry_priced_from_book_and_junk_entry_rejected():
+    [chunk] = chunks(read_csv_chunks, CSV_HEADER + "SOL,LONG,,110,2,100\nSOL,LONG,abc,110,2,100\n")
+    result, filled, errors = compute_chunk(chunk, PriceBook({"SOLUSDT": 100.0}))
+    assert filled == 1 and errors == 1
+    assert result["profit"][0] == pytest.approx(20.0)
+    assert result["error"] == ["", "invalid entry"]
+
+
+def test_price_fetch_failure_marks_rows_instead_of_aborting(monkeypatch):
+    import ccxt
+    from modules import batch_calc, resilience, spread_monitor
+
+    def offline():
+        raise ccxt.NetworkError("no route to host")
+
+    monkeypatch.setattr(spread_monitor, "fetch_mexc_book", offline)
+    monkeypatch.setattr(batch_calc, "READ", resilience.NO_RETRY)
+    monkeypatch.setattr(resilience, "_breakers", {})
+    book = PriceBook()
+    chunk = {"symbol": ["SOL", "SOL"], "position": ["LONG", "LONG"], "entry": ["", "100"], "exit": ["110", "110"],
+             "leverage": ["5", "5"], "capital": ["100", "100"]}
+    result, filled, errors = compute_chunk(chunk, book)
+    assert book.prices == {} and book.fetches == 1
+    assert result["error"][0] == "no price for symbol" and result["error"][1] == ""
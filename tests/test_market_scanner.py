@@ -0,0 +1,28 @@
+from modules import market_scanner
+from modules.market_scanner import MarketScanner, fetch_usdt_tickers
+
+
+class Client:
+    def __init__(self, tickers):
+        self.tickers = tickers
+        self.params = None
+
+    def fetch_tickers(self, symbols=None, params=None):
+        self.params = params
+        return self.tickers
+
+
+def ticker(last):
+    return {"last": last, "bid": last * 0.999, "ask": last * 1.001, "percentage": 1.0, "quoteVolume": 1e6}
+
+
+def test_swap_style_symbols_are_scanned(monkeypatch):
+    client = Client({"BTC/USDT:USDT": ticker(100.0), "ETH/USDT": ticker(5.0), "ETH/USDT:USDT": ticker(5.2),
+                     "SOL/USDC:USDC": ticker(20.0), "XRP/BTC": ticker(1e-5)})
+    monkeypatch.setattr(market_scanner, "_client", lambda venue: client)
+    tickers = fetch_usdt_tickers("bybit")
+    assert client.params == {"type": "spot"}
+    assert set(tickers) == {"BTC/USDT", "ETH/USDT"} and tickers["ETH/USDT"]["last"] == 5.0
+
+    scanner = MarketScanner("bybit")
+    assert scanner.refresh() == 2
@@ -0,0 +1,18 @@
+import numpy as np
+from modules.calculations import calc_liquidation
+from modules.monte_carlo import estimate_liquidation_risk
+
+
+def test_step_crossing_liquidation_and_target_counts_as_liquidation():
+    # LONG with its exit below entry: one -50% step crosses both levels
+    assert calc_liquidation(100.0, 10, "LONG") < 95.0
+    result = estimate_liquidation_risk(100.0, 95.0, "LONG", [10], capital=100.0,
+                                       returns=[np.log(0.5)], steps=3, paths=20, seed=1)[10]
+    assert result["p_liquidation"] == 1.0 and result["p_target_first"] == 0.0
+    assert result["mean_pnl"] == -100.0
+
+
+def test_target_before_liquidation():
+    result = estimate_liquidation_risk(100.0, 101.0, "LONG", [10], capital=100.0,
+                                       returns=[np.log(1.02)], steps=3, paths=20, seed=1)[10]
+    assert result["p_target_first"] == 1.0 and result["p_liquidation"] == 0.0
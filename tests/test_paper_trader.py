@@ -0,0 +1,24 @@
+import pytest
+from modules import paper_trader
+
+
+@pytest.mark.parametrize("response", [
+    {"result": {}},
+    {"result": {"list": [{}]}},
+    {"result": {"list": [{"lastPrice": ""}]}},
+])
+def test_fetch_latest_price_malformed_response_is_none(monkeypatch, response):
+    monkeypatch.setattr(paper_trader, "_request", lambda *args, **kwargs: response)
+    assert paper_trader.fetch_latest_price("BTCUSDT") is None
+
+
+def test_fetch_latest_price(monkeypatch):
+    monkeypatch.setattr(paper_trader, "_request",
+                        lambda *args, **kwargs: {"result": {"list": [{"lastPrice": "101.5"}]}})
+    assert paper_trader.fetch_latest_price("BTCUSDT") == 101.5
+
+
+def test_no_symbols():
+    with pytest.raises(ValueError):
+        paper_trader.PaperTrader(5, 100, 1).run([])
+    assert paper_trader.run_paper_trader(" , ") is None
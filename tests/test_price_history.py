@@ -0,0 +1,36 @@
+import threading
+import numpy as np
+from modules.decimate import MinMaxDecimator
+from modules.price_history import PriceHistory
+
+
+def test_snapshot_is_a_copy_with_matching_total():
+    history = PriceHistory(capacity=4)
+    for i in range(6):
+        history.append(100.0 + i, ts=float(i))
+    ts, px, total = history.snapshot()
+    assert total == 6 and list(px) == [102.0, 103.0, 104.0, 105.0]
+    history.append(200.0, ts=6.0)
+    assert list(px) == [102.0, 103.0, 104.0, 105.0]
+
+
+def test_decimator_while_another_thread_appends():
+    history = PriceHistory(capacity=2048)
+    decimator = MinMaxDecimator(target_points=64)
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            history.append(100.0 + np.sin(i / 50), ts=float(i))
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(2000):
+            x, _ = decimator.update(history)
+            assert np.all(np.diff(x) >= 0)
+    finally:
+        stop.set()
+        thread.join()
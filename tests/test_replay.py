@@ -0,0 +1,41 @@
+import gzip
+import json
+import threading
+import time
+import pytest
+from modules import replay
+from modules.replay import ReplayClient, load_recording
+
+
+class Live:
+    rateLimit = 50
+    markets = None
+
+    def fetch_ticker(self, symbol):
+        raise AssertionError("live client called during replay")
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / "session.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": 0, "dur": 0.2, "client": "mexc", "method": "fetch_ticker",
+                            "args": ["BTC/USDT"], "kwargs": {}, "result": {"last": 100.0}}) + "\n")
+    return load_recording(path)
+
+
+def test_plain_attributes_pass_through(recording):
+    client = ReplayClient(recording, "mexc", speed=0, client=Live())
+    assert client.rateLimit == 50 and client.markets is None
+    assert client.fetch_ticker("BTC/USDT") == {"last": 100.0}
+
+
+def test_speed_scales_recorded_latency_and_flow_waits(recording, monkeypatch):
+    monkeypatch.setattr(replay, "SPEED", 10.0)
+    client = ReplayClient(recording, "mexc", speed=10.0)
+    start = time.monotonic()
+    client.fetch_ticker("BTC/USDT")
+    replay.sleep(0.5)
+    assert replay.wait(threading.Event(), 0.5) is False
+    assert time.monotonic() - start < 0.5
+    assert replay.scaled(None) is None
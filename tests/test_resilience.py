@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+import requests
+from modules import resilience
+from modules.resilience import (AUTH, CIRCUIT_OPEN, NETWORK, ORDER, TIMEOUT, CircuitBreaker, CircuitOpenError,
+                                ExchangeError, RetryPolicy, call)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+
+
+def failing(*errors):
+    """fn for call(): raises the given errors in turn, then returns "ok"."""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    fn.calls = calls
+    return fn
+
+
+def test_breaker_opens_after_threshold_and_probes_after_timeout():
+    clock = Clock()
+    b = CircuitBreaker("x", failure_threshold=2, reset_timeout=1.0, clock=clock)
+    for _ in range(2):
+        b.before_call()
+        b.on_failure()
+    assert b.state == b.OPEN
+    with pytest.raises(CircuitOpenError) as e:
+        b.before_call()
+    assert e.value.kind == CIRCUIT_OPEN and e.value.retry_after == 1.0
+
+    clock.now = 1.0
+    b.before_call()  # the probe
+    with pytest.raises(CircuitOpenError):
+        b.before_call()  # only one probe at a time
+    b.on_failure()
+    assert b.state == b.OPEN and b.reset_timeout == 2.0
+
+    clock.now = 3.0
+    b.before_call()
+    b.on_success()
+    assert b.state == b.CLOSED and b.reset_timeout == 1.0 and b.metrics()["rejected"] == 2
+
+
+def test_call_retries_transient_errors():
+    fn = failing(requests.Timeout("slow"), requests.ConnectionError("reset"))
+    waits = []
+    assert call("t.read", fn, sleep=waits.append) == "ok"
+    assert len(fn.calls) == 3 and len(waits) == 2
+
+
+def test_call_gives_up_after_attempts():
+    fn = failing(*[requests.Timeout("slow")] * 5)
+    with pytest.raises(ExchangeError) as e:
+        call("t.read", fn, policy=RetryPolicy(attempts=2), sleep=lambda s: None)
+    assert e.value.kind == TIMEOUT and e.value.transient and len(fn.calls) == 2
+
+
+def test_order_policy_does_not_resend_after_timeout():
+    fn = failing(requests.Timeout("slow"))
+    with pytest.raises(ExchangeError) as e:
+        call("t.order", fn, policy=ORDER, sleep=lambda s: None)
+    assert e.value.kind == TIMEOUT and len(fn.calls) == 1
+
+
+def test_non_transient_error_is_not_retried_and_keeps_circuit_closed():
+    for _ in range(10):
+        with pytest.raises(ExchangeError) as e:
+            call("t.auth", failing(PermissionError("no keys")), sleep=lambda s: None)
+        assert e.value.kind == AUTH and not e.value.transient
+    assert resilience.breaker("t.auth").state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_fails_fast_without_calling():
+    b = resilience.breaker("t.down")
+    for _ in range(b.failure_threshold):
+        b.on_failure()
+    fn = failing()
+    with pytest.raises(CircuitOpenError):
+        call("t.down", fn)
+    assert not fn.calls
+
+
+def test_network_failures_open_the_circuit():
+    fn = failing(*[requests.ConnectionError("down")] * 20)
+    policy = RetryPolicy(attempts=1)
+    threshold = resilience.breaker("t.net").failure_threshold
+    for _ in range(threshold):
+        with pytest.raises(ExchangeError) as e:
+            call("t.net", fn, policy=policy)
+        assert e.value.kind == NETWORK
+    with pytest.raises(CircuitOpenError):
+        call("t.net", fn, policy=policy)
+    assert len(fn.calls) == threshold
+
+
+def test_cancelled_probe_releases_the_half_open_circuit():
+    clock = Clock()
+    b = resilience._breakers["t.cancel"] = CircuitBreaker("t.cancel", failure_threshold=1, reset_timeout=1.0,
+                                                          clock=clock)
+    b.on_failure()
+    clock.now = 1.0
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(resilience.call_async("t.cancel", cancelled))
+    assert call("t.cancel", failing()) == "ok"
+    assert b.state == b.CLOSED
+
+
+def test_interrupted_sync_probe_releases_the_circuit():
+    clock = Clock()
+    b = resilience._breakers["t.int"] = CircuitBreaker("t.int", failure_threshold=1, reset_timeout=1.0, clock=clock)
+    b.on_failure()
+    clock.now = 1.0
+    with pytest.raises(KeyboardInterrupt):
+        call("t.int", failing(KeyboardInterrupt()))
+    assert call("t.int", failing()) == "ok"
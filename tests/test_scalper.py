@@ -0,0 +1,11 @@
+from modules.scalper import ScalperEngine
+
+
+def test_unexpected_error_ends_with_failed_state():
+    states = []
+    engine = ScalperEngine("ZERO/USDT", "LONG", 100, 0, 0.01, on_state=states.append, fetch=lambda symbol: 100.0)
+    engine.start()
+    engine.thread.join(5)
+    assert not engine.is_running()
+    assert states[-1]["status"] == "failed" and "ZeroDivisionError" in states[-1]["error"]
+
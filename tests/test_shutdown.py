@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+import pytest
+from modules import resilience
+from modules.shutdown import ShutdownCoordinator
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+
+
+class Client:
+    def __init__(self):
+        self.calls = []
+
+    def get_tickers(self, category):
+        self.calls.append("tickers")
+        return {"result": {"list": [{"symbol": "AUSDT", "lastPrice": "1.5"}, {"symbol": "BUSDT", "lastPrice": "2"}]}}
+
+    def place_batch_order(self, category, request):
+        self.calls.append("batch")
+        return {"retExtInfo": {"list": [{"code": 0}] * len(request)},
+                "result": {"list": [{"orderId": f"o-{o['symbol']}"} for o in request]}}
+
+    def place_order(self, category, **order):
+        self.calls.append("order")
+        return {"result": {"orderId": f"o-{order['symbol']}"}}
+
+
+def positions(*symbols):
+    return [SimpleNamespace(symbol=s, side="Buy", quantity=1.0) for s in symbols]
+
+
+def test_flatten_batches_and_prices():
+    client = Client()
+    report = ShutdownCoordinator(client).flatten(positions("AUSDT", "BUSDT"), deadline_sec=2)
+    assert sorted(report["closed"]) == ["AUSDT", "BUSDT"] and report["order_ids"]["AUSDT"] == "o-AUSDT"
+    assert report["exit_prices"] == {"AUSDT": 1.5, "BUSDT": 2.0}
+    assert client.calls.count("batch") == 1 and "order" not in client.calls
+
+
+def test_flatten_fails_fast_while_the_order_circuit_is_open():
+    circuit = resilience.breaker("bybit.order")
+    for _ in range(circuit.failure_threshold):
+        circuit.on_failure()
+    client = Client()
+    report = ShutdownCoordinator(client).flatten(positions("AUSDT", "BUSDT"), deadline_sec=2)
+    assert not report["closed"] and set(report["failed"]) == {"AUSDT", "BUSDT"}
+    assert "circuit_open" in report["failed"]["AUSDT"]
+    assert "batch" not in client.calls and "order" not in client.calls
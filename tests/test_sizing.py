@@ -0,0 +1,75 @@
+import gzip
+import json
+import numpy as np
+import pytest
+from modules.accrual import fee
+from modules.calculations import calc_net_profit
+from modules.paper_trader import Position, accrue_costs, position_pnl
+from modules.sizing import FixedFractionPolicy, StepPolicy, load_prices, simulate_paths
+
+
+class OneTrade:
+    def __init__(self, ret, worst):
+        self.ret = ret
+        self.worst = worst
+
+    def sample(self, rng, n):
+        return np.full(n, self.ret), np.full(n, self.worst)
+
+
+@pytest.mark.parametrize("ret", [0.004, -0.003])
+def test_trade_pnl_matches_calc_net_profit(ret):
+    policy = FixedFractionPolicy(fraction=0.1, leverage=3)
+    result = simulate_paths(policy, OneTrade(ret, min(ret, 0.0)), paths=1, trades=1, seed=0, equity=1000.0)
+    expected = calc_net_profit(100.0, 100.0 * (1 + ret), 3, 100.0, "LONG")
+    assert result["final"][0] - 1000.0 == pytest.approx(expected)
+
+
+def test_liquidation_loses_the_margin_plus_fees():
+    policy = FixedFractionPolicy(fraction=0.1, leverage=10)
+    result = simulate_paths(policy, OneTrade(-0.05, -0.2), paths=1, trades=1, seed=0, equity=1000.0)
+    fees = 100.0 * 10 * 0.00055 * (2 - 0.05)
+    assert result["final"][0] == pytest.approx(1000.0 - 100.0 - fees)
+
+
+def write_recording(path, rows):
+    with gzip.open(path, "wt") as f:
+        for symbol, price in rows:
+            f.write(json.dumps({"client": "mexc", "method": "fetch_ticker", "args": [symbol], "kwargs": {},
+                                "result": {"last": price}}) + "\n")
+
+
+def test_load_prices_keeps_symbols_apart(tmp_path):
+    path = str(tmp_path / "rec.gz")
+    write_recording(path, [("BTC/USDT", 100.0), ("ETH/USDT", 5.0), ("BTC/USDT", 101.0), ("ETH/USDT", 5.1)])
+    assert load_prices(path, "BTC/USDT").tolist() == [100.0, 101.0]
+    assert load_prices(path, "ETH/USDT").tolist() == [5.0, 5.1]
+    with pytest.raises(ValueError):
+        load_prices(path)
+
+
+def test_load_prices_single_symbol_recording_needs_no_symbol(tmp_path):
+    path = str(tmp_path / "rec.gz")
+    write_recording(path, [("BTC/USDT", 100.0), ("BTC/USDT", 101.0)])
+    assert load_prices(path).tolist() == [100.0, 101.0]
+
+
+@pytest.mark.parametrize("ret", [0.004, -0.003])
+def test_step_trade_matches_the_live_position(ret):
+    # First step trade: 3x on a $500 position, i.e. 5 units at 100 as place_trade buys them
+    result = simulate_paths(StepPolicy(base_capital=500), OneTrade(ret, min(ret, 0.0)), paths=1, trades=1, seed=0,
+                            equity=1000.0)
+    position = Position("BTCUSDT", "Buy", 100.0, 3, 5.0)
+    position.fees = fee(100.0, 5.0)
+    position.opened_at = 1_700_006_500.0
+    exit_price = 100.0 * (1 + ret)
+    net = accrue_costs([position], [exit_price], [None], closed_at=position.opened_at + 60)[0]
+    assert position_pnl(position, exit_price) == pytest.approx(500.0 * ret)
+    assert result["final"][0] - 1000.0 == pytest.approx(net)
+
+
+def test_step_liquidation_loses_the_position_margin():
+    result = simulate_paths(StepPolicy(base_capital=500), OneTrade(-0.4, -0.5), paths=1, trades=1, seed=0,
+                            equity=1000.0)
+    fees = 500.0 * 0.00055 * (2 - 0.4)
+    assert result["final"][0] == pytest.approx(1000.0 - 500.0 / 3 - fees)
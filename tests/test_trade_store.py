@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from modules.trade_store import TradeHistory, query
+
+
+def fill(history, symbols, ts0=0.0):
+    for k, symbol in enumerate(symbols):
+        history.append(symbol, "Buy" if k % 2 else "Sell", 100.0, 101.0, 1.0, 3.0, float(k), fees=0.1, ts=ts0 + k)
+
+
+def test_rows_round_trip_through_the_file(tmp_path):
+    path = str(tmp_path / "t.tcol")
+    history = TradeHistory(path, group_rows=4)
+    fill(history, ["A", "B"] * 5)  # two full groups written, two rows buffered
+    assert len(history) == 10
+    assert history[0] == {"ts": 0.0, "symbol": "A", "side": "Sell", "entry_price": 100.0, "exit_price": 101.0,
+                          "quantity": 1.0, "leverage": 3.0, "pnl": 0.0, "fees": 0.1, "funding": 0.0}
+    assert history[5]["symbol"] == "B" and history[5]["side"] == "Buy"
+    assert history[-1]["pnl"] == 9.0
+    with pytest.raises(IndexError):
+        history[10]
+
+
+def test_indices_cover_this_session_only(tmp_path):
+    path = str(tmp_path / "t.tcol")
+    earlier = TradeHistory(path)
+    fill(earlier, ["AUSDT", "BUSDT", "CUSDT"])
+    earlier.close()
+    history = TradeHistory(path)
+    fill(history, ["XUSDT", "YUSDT", "ZUSDT"], ts0=100)
+    history.close()
+    assert len(history) == 3
+    assert history[0]["symbol"] == "XUSDT" and history[-1]["symbol"] == "ZUSDT"
+    assert len(query(path)["ts"]) == 6
+
+
+def test_query_filters_by_symbol_and_time(tmp_path):
+    path = str(tmp_path / "t.tcol")
+    history = TradeHistory(path, group_rows=3)
+    fill(history, ["A", "B", "C"] * 4)
+    result = history.query(symbol="A", start=3, end=9, columns=["ts", "pnl"])
+    assert result["ts"].tolist() == [3.0, 6.0]
+    assert set(result) == {"ts", "pnl"}
+    history.close()
+    on_disk = query(path, symbol=["B", "C"], start=6)
+    assert on_disk["symbol"].tolist() == ["B", "C", "B", "C"]
+    assert len(query(path, symbol="Z")["ts"]) == 0
+    assert len(query(str(tmp_path / "missing.tcol"))["ts"]) == 0
+
+
+def test_truncated_tail_is_dropped_on_open(tmp_path):
+    path = str(tmp_path / "t.tcol")
+    history = TradeHistory(path)
+    fill(history, ["A", "B"])
+    history.close()
+    with open(path, "ab") as f:
+        f.write(b"TRG1\xff\xff")  # a write cut short
+    history = TradeHistory(path)
+    fill(history, ["C"])
+    history.close()
+    assert query(path)["symbol"].tolist() == ["A", "B", "C"]
+    assert history[-1]["symbol"] == "C"
+
+
+def test_in_memory_history_grows():
+    history = TradeHistory(group_rows=2)
+    fill(history, ["A"] * 5)
+    assert len(history) == 5 and history[-1]["pnl"] == 4.0
+    assert np.array_equal(history.query()["pnl"], np.arange(5.0))
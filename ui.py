@@ -1,6 +1,14 @@
+import argparse
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk
+from modules import profiler, replay
+from modules.logger import setup_logging
 from modules.mexc_api import fetch_current_price
+from modules.price_history import HISTORY, format_stats
+from modules.decimate import MinMaxDecimator, to_canvas_coords
+from modules.scalper import ScalperEngine
 
 class MainApp(tk.Tk):
     def __init__(self):
@@ -38,11 +46,23 @@ class MainApp(tk.Tk):
 
         # Show the menu initially
         self.show_frame("MenuFrame")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """
+        Stop background work before the window goes away.
+        """
+        self.frames["ScalperFrame"].stop_engine()
+        self.frames["CurrentPriceFrame"].stop_monitor()
+        self.destroy()
 
     def show_frame(self, frame_name):
         """
         Bring the specified frame to the front.
+        With --profile, each screen (the calc wizard counts as one) is profiled separately.
         """
+        if profiler.ENABLED:
+            profiler.start("calculation" if frame_name.startswith("Calc_") else frame_name)
         frame = self.frames[frame_name]
         frame.tkraise()
 
@@ -59,6 +79,51 @@ class MainApp(tk.Tk):
         ]:
             self.frames[step_name].reset_fields()
 
+# --------------------- PRICE CHART ------------------------
+
+class PriceChart(tk.Canvas):
+    """
+    Live line chart of a PriceHistory. Long histories are min/max
+    decimated to about one point per pixel column, and each refresh only
+    moves the existing line item (Canvas.coords) instead of redrawing.
+    """
+    def __init__(self, parent, width=400, height=150):
+        super().__init__(parent, width=width, height=height, background="white", highlightthickness=0)
+        self.width = width
+        self.height = height
+        self.decimator = MinMaxDecimator(target_points=width)
+        self.history = None
+        self.line = self.create_line(0, 0, 0, 0, fill="steelblue", width=1)
+        self.high_text = self.create_text(4, 2, anchor="nw", fill="gray40", font=("TkDefaultFont", 8))
+        self.low_text = self.create_text(4, height - 2, anchor="sw", fill="gray40", font=("TkDefaultFont", 8))
+
+    def show(self, history):
+        """
+        Switch to another symbol's history.
+        """
+        if history is not self.history:
+            self.history = history
+            self.decimator.reset()
+        self.refresh()
+
+    def refresh(self):
+        if self.history is None:
+            return
+        x, y = self.decimator.update(self.history)
+        if len(y) < 2:
+            self.coords(self.line, 0, 0, 0, 0)
+            return
+        self.coords(self.line, *to_canvas_coords(x, y, self.width, self.height))
+        self.itemconfigure(self.high_text, text=f"{y.max():.6g}")
+        self.itemconfigure(self.low_text, text=f"{y.min():.6g}")
+
+    def clear(self):
+        self.history = None
+        self.decimator.reset()
+        self.coords(self.line, 0, 0, 0, 0)
+        self.itemconfigure(self.high_text, text="")
+        self.itemconfigure(self.low_text, text="")
+
 # --------------------- MENU FRAME -------------------------
 
 class MenuFrame(ttk.Frame):
@@ -99,17 +164,27 @@ class MenuFrame(ttk.Frame):
         self.controller.show_frame("Calc_Step_Coin")
 
     def on_exit(self):
-        self.controller.destroy()
+        self.controller.on_close()
 
 # --------------------- CURRENT PRICE ----------------------
 
 class CurrentPriceFrame(ttk.Frame):
     """
-    Shows BTC price, asks for a coin, repeatedly updates coin price until user returns
+    Shows BTC price, asks for a coin, repeatedly updates coin price until user returns.
+    Prices are fetched on a background thread (a slow or failing request
+    must not freeze the window) and handed back through a queue that the
+    Tk side polls, as ScalperFrame does.
     """
+    REFRESH_MS = 2000
+    POLL_MS = 100
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
+        self.after_id = None
+        self.pair = None
+        self.session = None  # Event of the running fetch thread; set() stops it
+        self.prices = queue.Queue()
 
         self.coin_var = tk.StringVar()
         self.status_var = tk.StringVar()
@@ -128,35 +203,83 @@ class CurrentPriceFrame(ttk.Frame):
         update_btn = ttk.Button(self, text="Fetch & Monitor", command=self.on_fetch)
         update_btn.grid(row=3, column=0, pady=5)
 
-        menu_btn = ttk.Button(self, text="Back to Menu", command=lambda: controller.show_frame("MenuFrame"))
+        menu_btn = ttk.Button(self, text="Back to Menu", command=self.on_menu)
         menu_btn.grid(row=3, column=1, pady=5)
 
         ttk.Label(self, textvariable=self.status_var, wraplength=300).grid(row=4, column=0, columnspan=2, sticky="W")
 
-    def on_fetch(self):
-        # 1) Fetch BTC
-        btc = fetch_current_price("BTC/USDT")
-        if btc is not None:
-            self.btc_label_var.set(f"BTC Price: {btc:.3f} USDT")
-        else:
-            self.btc_label_var.set("BTC Price: ??? (failed)")
+        self.chart = PriceChart(self)
+        self.chart.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
+
+    def on_menu(self):
+        self.stop_monitor()
+        self.controller.show_frame("MenuFrame")
+
+    def stop_monitor(self):
+        if self.session is not None:
+            self.session.set()
+            self.session = None
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+
+    def watch(self, pair, session):
+        """
+        Worker thread: BTC once, then 'pair' every REFRESH_MS until 'session'
+        is set. Results go to self.prices as (session, kind, price).
+        """
+        self.prices.put((session, "btc", fetch_current_price("BTC/USDT")))
+        first = True
+        while not session.is_set():
+            price = fetch_current_price(pair)
+            if price is None and first:
+                self.prices.put((session, "failed", None))
+                return
+            self.prices.put((session, "pair", price))
+            first = False
+            replay.wait(session, self.REFRESH_MS / 1000)
+
+    def monitor(self):
+        """
+        Apply what the worker fetched since the last poll and extend the chart.
+        Results of an earlier, stopped session are dropped.
+        """
+        self.after_id = None
+        while True:
+            try:
+                session, kind, price = self.prices.get_nowait()
+            except queue.Empty:
+                break
+            if session is not self.session:
+                continue
+            if kind == "btc":
+                self.btc_label_var.set(f"BTC Price: {price:.3f} USDT" if price is not None else "BTC Price: ??? (failed)")
+            elif kind == "failed":
+                self.status_var.set(f"Failed to fetch {self.pair} price.")
+                self.stop_monitor()
+                return
+            elif price is not None:
+                history = HISTORY.get(self.pair)
+                history.append(price)
+                self.status_var.set(f"{self.pair} = {price:.3f} USDT\n{format_stats(history)}")
+                self.chart.refresh()
+        self.after_id = self.after(self.POLL_MS, self.monitor)
 
-        # 2) user coin
+    def on_fetch(self):
         coin = self.coin_var.get().strip().upper()
         if not coin:
             self.status_var.set("Please enter a coin ticker.")
             return
 
-        pair = f"{coin}/USDT"
-        price = fetch_current_price(pair)
-        if price is None:
-            self.status_var.set(f"Failed to fetch {pair} price.")
-            return
-
-        # 3) Monitor in a loop if you want
-        # For simplicity, just show price once. If you want repeated updates, you'd do after(...).
-        msg = f"{pair} = {price:.3f} USDT"
-        self.status_var.set(msg)
+        # Fetch BTC once and the coin until stopped, off the Tk thread
+        self.stop_monitor()
+        self.pair = f"{coin}/USDT"
+        self.session = threading.Event()
+        threading.Thread(target=self.watch, args=(self.pair, self.session), name=f"price-{self.pair}",
+                         daemon=True).start()
+        self.status_var.set(f"Fetching {self.pair}...")
+        self.chart.show(HISTORY.get(self.pair))
+        self.after_id = self.after(self.POLL_MS, self.monitor)
 
 # --------------------- CALCULATION WIZARD ------------------
 
@@ -430,26 +553,170 @@ class CalcStepSummary(ttk.Frame):
 
 class ScalperFrame(ttk.Frame):
     """
-    Basic scalper UI. 
-    In reality you might have multiple steps or real logic. 
-    Here we just show a placeholder.
+    Scalper screen. The scalping loop runs on a background ScalperEngine
+    thread and pushes states into a small bounded queue; the Tk side drains
+    that queue at most FPS times a second and only renders the newest
+    state, so bursts of ticks never pile up in the event loop.
     """
+    FPS = 10
+    QUEUE_SIZE = 32
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
+        self.engine = None
+        self.after_id = None
 
         ttk.Label(self, text="Scalper Flow", font=("TkDefaultFont", 14)).grid(row=0, column=0, columnspan=2, pady=10)
 
-        menu_btn = ttk.Button(self, text="Back to Menu", command=lambda: controller.show_frame("MenuFrame"))
-        menu_btn.grid(row=1, column=0, padx=10, pady=5)
+        self.vars = {}
+        fields = [
+            ("coin", "Coin Ticker (e.g. SOL):", ""),
+            ("position", "Position (LONG/SHORT):", "LONG"),
+            ("entry", "Entry price (blank = current):", ""),
+            ("capital", "Capital (USDT):", "100"),
+            ("leverage", "Leverage:", "10"),
+            ("fraction", "Target fraction (e.g. 0.001):", "0.001"),
+        ]
+        for row, (key, label, default) in enumerate(fields, start=1):
+            self.vars[key] = tk.StringVar(value=default)
+            ttk.Label(self, text=label).grid(row=row, column=0, sticky="W", padx=5)
+            ttk.Entry(self, textvariable=self.vars[key]).grid(row=row, column=1, padx=5, pady=2)
 
-        ttk.Label(self, text="(Placeholder for scalper logic.)").grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+        nav_frame = ttk.Frame(self)
+        nav_frame.grid(row=7, column=0, columnspan=2, pady=10)
+
+        self.start_btn = ttk.Button(nav_frame, text="Start", command=self.on_start)
+        self.start_btn.grid(row=0, column=0, padx=5)
+
+        self.stop_btn = ttk.Button(nav_frame, text="Stop", command=self.on_stop, state="disabled")
+        self.stop_btn.grid(row=0, column=1, padx=5)
+
+        menu_btn = ttk.Button(nav_frame, text="Back to Menu", command=self.on_menu)
+        menu_btn.grid(row=0, column=2, padx=5)
+
+        self.status_var = tk.StringVar(value="Idle.")
+        ttk.Label(self, textvariable=self.status_var, justify="left").grid(row=8, column=0, columnspan=2, sticky="W", padx=5)
+
+        self.chart = PriceChart(self)
+        self.chart.grid(row=9, column=0, columnspan=2, padx=5, pady=5)
+
+    def on_start(self):
+        coin = self.vars["coin"].get().strip().upper()
+        pos = self.vars["position"].get().strip().upper()
+        if not coin:
+            self.status_var.set("Please enter a coin ticker.")
+            return
+        if pos not in ["LONG", "SHORT"]:
+            self.status_var.set("Invalid position. Must be LONG or SHORT.")
+            return
+        try:
+            entry_str = self.vars["entry"].get().strip()
+            entry = float(entry_str) if entry_str else None
+            capital = float(self.vars["capital"].get())
+            leverage = float(self.vars["leverage"].get())
+            fraction = float(self.vars["fraction"].get())
+        except ValueError:
+            self.status_var.set("Invalid numeric input.")
+            return
+
+        self.stop_engine()
+        pair = f"{coin}/USDT"
+        self.engine = ScalperEngine(pair, pos, capital, leverage, fraction, entry, queue_size=self.QUEUE_SIZE)
+        self.engine.start()
+        self.chart.show(self.engine.history)
+        self.start_btn.configure(state="disabled")
+        self.stop_btn.configure(state="normal")
+        self.status_var.set(f"Scalper started for {pair}...")
+        self.schedule()
+
+    def on_stop(self):
+        self.stop_engine()
+        self.status_var.set(self.status_var.get() + "\nStopped.")
+
+    def on_menu(self):
+        self.stop_engine()
+        self.controller.show_frame("MenuFrame")
+
+    def stop_engine(self):
+        """
+        Signal the worker and stop polling. Never blocks on the worker: a
+        fetch in flight finishes on its own and the thread then exits without
+        recording it, and its states are no longer drained.
+        """
+        if self.engine is not None:
+            self.engine.stop()
+            self.engine = None
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        self.start_btn.configure(state="normal")
+        self.stop_btn.configure(state="disabled")
+
+    def schedule(self):
+        self.after_id = self.after(1000 // self.FPS, self.drain)
+
+    def drain(self):
+        """
+        Take everything queued since the last frame, render only the newest.
+        """
+        self.after_id = None
+        engine = self.engine
+        if engine is None:
+            return
+        latest = None
+        while True:
+            try:
+                latest = engine.states.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            self.render(latest)
+            if latest["status"] in ("target", "liquidation", "stopped", "failed"):
+                self.stop_engine()
+                return
+        self.schedule()
+
+    def render(self, state):
+        if state["status"] == "error":
+            self.status_var.set(f"Failed to fetch {state['symbol']}. Retrying in {state['retry_in']:.0f}s...")
+            return
+        if state["status"] == "failed":
+            self.status_var.set(f"Scalper stopped: {state['error']}")
+            return
+        if state["price"] is None:
+            return
+        lines = [
+            f"{state['symbol']} = {state['price']:.6g} (entry={state['entry']:.6g})",
+            f"Move: {state['move'] * 100:.2f}% (target={state['target'] * 100:.2f}%)",
+            f"PnL: {state['pnl']:.2f} USDT (net {state['net_pnl']:.2f} after fees and funding)",
+            f"Liquidation: {state['liq']:.6g} ({state['liq_distance'] * 100:.2f}% away)",
+        ]
+        if state["status"] == "target":
+            lines.append("Target reached!")
+        elif state["status"] == "liquidation":
+            lines.append("Liquidation level crossed!")
+        self.status_var.set("\n".join(lines))
+        self.chart.refresh()
 
 # ----------------------------------------------------------
 
 def main():
+    parser = argparse.ArgumentParser(description="Autobot GUI")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each screen (cProfile + tracemalloc) and print a summary when it is left")
+    parser.add_argument("--profile-dir", default="profiles", help="where profile files are written")
+    args = parser.parse_args()
+    setup_logging()
+    if args.profile:
+        profiler.enable(args.profile_dir)
+    replay.install_from_env()
+
     app = MainApp()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        profiler.stop()
 
 if __name__ == "__main__":
     main()